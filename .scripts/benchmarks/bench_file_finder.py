@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark pylib.file_finder.find_files against glob-then-filter discovery.
+
+Builds a synthetic tree where most files live under ignored directories
+(node_modules, bazel-out, build), the way a real checkout looks after a
+build, and times both discovery strategies on the same patterns.
+
+Usage:
+    python .scripts/benchmarks/bench_file_finder.py
+    python .scripts/benchmarks/bench_file_finder.py --files 50000 --repeat 5
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+# Add the .scripts directory to sys.path to allow importing pylib
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from pylib.file_finder import DEFAULT_IGNORES, find_files, is_ignored  # noqa: E402
+
+# Share of files placed under ignored directories
+IGNORED_SHARE = 0.9
+
+IGNORED_ROOTS = ["node_modules", "bazel-out", "build"]
+SOURCE_ROOTS = ["src", "scripts", "tools"]
+EXTENSIONS = [".sh", ".ps1", ".js", ".json", ".cpp"]
+FILES_PER_DIR = 50
+
+PATTERNS = ["**/*.sh", "**/*.ps1"]
+
+
+def glob_find_files(patterns: List[str]) -> List[str]:
+    """Reference implementation: glob the whole tree, filter afterwards."""
+    ignores = set(DEFAULT_IGNORES)
+    found = set()
+    for pattern in patterns:
+        for match in glob.glob(pattern, recursive=True):
+            if os.path.isfile(match) and not is_ignored(match, ignores):
+                found.add(os.path.normpath(match))
+    return sorted(found)
+
+
+def build_tree(root: Path, file_count: int) -> None:
+    """Create file_count empty files under root."""
+    ignored = int(file_count * IGNORED_SHARE)
+    for index in range(file_count):
+        roots = IGNORED_ROOTS if index < ignored else SOURCE_ROOTS
+        top = roots[index % len(roots)]
+        bucket = index // FILES_PER_DIR
+        directory = root / top / f"pkg{bucket % 97}" / f"dir{bucket}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{index}{EXTENSIONS[index % len(EXTENSIONS)]}").touch()
+
+
+def best_time(func: Callable[[List[str]], List[str]], repeat: int) -> float:
+    """Return the best wall time of func(PATTERNS) over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(PATTERNS)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200_000, help="Tree size")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per strategy")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Building synthetic tree with {args.files} files...")
+        build_tree(Path(tmp), args.files)
+
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            if find_files(PATTERNS) != glob_find_files(PATTERNS):
+                print("✖ Strategies returned different files", file=sys.stderr)
+                return 1
+            matched = len(find_files(PATTERNS))
+            legacy = best_time(glob_find_files, args.repeat)
+            pruned = best_time(find_files, args.repeat)
+        finally:
+            os.chdir(cwd)
+
+    print(f"Patterns: {' '.join(PATTERNS)} ({matched} matches)")
+    print(f"  glob + filter:   {legacy * 1000:8.1f}ms")
+    print(f"  pruning walker:  {pruned * 1000:8.1f}ms ({legacy / pruned:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Benchmark how the lint and format pipelines scale with the file count.
+
+Runs lint_clang.lint_files(), format_clang.format_files() and Linter.run()
+(through shlint.py and pwshlint.py) on synthetic corpora of growing size,
+with stub tools on PATH, so the suite runs offline and measures the
+scripts themselves. Each case runs in its own process (see
+pipeline_driver.py) and records its best wall time, throughput and peak RSS in
+build/benchmarks/pipeline-results.json. A case fails when it is slower or
+uses more memory than its saved baseline allows.
+
+Usage:
+    python -m pytest .scripts/benchmarks/bench_pipeline.py --bench-save-baseline
+    python -m pytest .scripts/benchmarks/bench_pipeline.py
+    python -m pytest .scripts/benchmarks/bench_pipeline.py \\
+        --bench-sizes 10,1000,100000 --bench-file-ms 5
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+from conftest import BenchmarkResults, CorpusCache
+from pipeline_driver import CORPUS_KINDS, TARGETS
+from stub_tools import stub_environment
+
+DRIVER = Path(__file__).resolve().parent / "pipeline_driver.py"
+
+# Every (target, mode) pair; the cached modes run on a warmed-up cache
+CASES: List[Tuple[str, str]] = [
+    (target, mode) for target, modes in TARGETS.items() for mode in modes
+]
+
+
+def run_driver(target: str, mode: str, corpus: Path, env: Dict[str, str]) -> Dict:
+    """Run one pipeline in a fresh process and return its measurements."""
+    result = subprocess.run(
+        [sys.executable, str(DRIVER), target, mode, str(corpus)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize(("target", "mode"), CASES, ids=[f"{t}-{m}" for t, m in CASES])
+def test_pipeline(
+    target: str,
+    mode: str,
+    size: int,
+    stubs: Path,
+    corpora: CorpusCache,
+    bench_results: BenchmarkResults,
+    request: pytest.FixtureRequest,
+) -> None:
+    """Measure one pipeline on a corpus of size files."""
+    env = stub_environment(
+        stubs,
+        request.config.getoption("bench_latency_ms"),
+        request.config.getoption("bench_file_ms"),
+    )
+    corpus = corpora.get(CORPUS_KINDS[target], size)
+    if mode == "cached":
+        run_driver(target, mode, corpus, env)
+    runs = [
+        run_driver(target, mode, corpus, env)
+        for _ in range(request.config.getoption("bench_repeat"))
+    ]
+
+    # The corpora contain files with issues, so a clean exit means the
+    # pipeline skipped or lost files
+    assert all(run["exit_code"] == 1 for run in runs)
+
+    wall = min(run["wall"] for run in runs)
+    case = f"{target}[{mode},{size}]"
+    bench_results.add(
+        case,
+        {
+            "files": size,
+            "wall": round(wall, 4),
+            "throughput": round(size / max(wall, 1e-6), 1),
+            "peak_rss_kb": min(run["peak_rss_kb"] for run in runs),
+        },
+    )
+    problems = bench_results.regressions(case)
+    assert not problems, f"{case} regressed: " + "; ".join(problems)
@@ -0,0 +1,226 @@
+"""Options, fixtures and baseline handling of the pipeline benchmarks.
+
+The options are only registered when pytest is started on this directory
+or a file in it, e.g.:
+
+    python -m pytest .scripts/benchmarks/bench_pipeline.py
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pytest
+from stub_tools import install_stubs
+from synthetic_corpus import write_corpus
+
+DEFAULT_SIZES = "10,100,1000"
+DEFAULT_BASELINE = Path("build") / "benchmarks" / "pipeline-baseline.json"
+DEFAULT_RESULTS = Path("build") / "benchmarks" / "pipeline-results.json"
+
+# Allowed slowdown of throughput, and growth of peak RSS, over the baseline
+DEFAULT_TOLERANCE = 0.25
+
+DEFAULT_REPEAT = 3
+
+# Wall time a case may exceed its baseline by on top of the tolerance, so
+# that process start-up noise does not fail the smallest corpora
+WALL_SLACK = 0.05
+
+Measurement = Dict[str, Any]
+
+RESULTS_KEY = pytest.StashKey["BenchmarkResults"]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the benchmark options."""
+    group = parser.getgroup("pipeline benchmarks")
+    group.addoption(
+        "--bench-sizes",
+        default=DEFAULT_SIZES,
+        help=f"Comma-separated corpus sizes, up to 100000 (default: {DEFAULT_SIZES})",
+    )
+    group.addoption(
+        "--bench-latency-ms",
+        type=float,
+        default=0.0,
+        help="Delay of each stub tool process (default: 0)",
+    )
+    group.addoption(
+        "--bench-file-ms",
+        type=float,
+        default=0.0,
+        help="Delay of the stub tools per file analyzed (default: 0)",
+    )
+    group.addoption(
+        "--bench-repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"Runs per case; the best one counts (default: {DEFAULT_REPEAT})",
+    )
+    group.addoption(
+        "--bench-baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help=f"Baseline to compare against (default: {DEFAULT_BASELINE})",
+    )
+    group.addoption(
+        "--bench-save-baseline",
+        action="store_true",
+        help="Save the measurements as the new baseline instead of comparing",
+    )
+    group.addoption(
+        "--bench-tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Fail when throughput drops, or peak RSS grows, by more than this "
+        f"share of the baseline (default: {DEFAULT_TOLERANCE:g})",
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """Parametrize the benchmarks over the --bench-sizes corpus sizes."""
+    if "size" in metafunc.fixturenames:
+        sizes = [
+            int(size) for size in metafunc.config.getoption("bench_sizes").split(",")
+        ]
+        metafunc.parametrize("size", sizes, ids=[f"{size}files" for size in sizes])
+
+
+class CorpusCache:
+    """Corpora generated on first use and shared by all benchmarks."""
+
+    def __init__(self, root: Path):
+        """Keep the corpora under root."""
+        self.root = root
+        self.corpora: Dict[Tuple[str, int], Path] = {}
+
+    def get(self, kind: str, size: int) -> Path:
+        """Return the directory of a corpus, writing it if needed."""
+        key = (kind, size)
+        if key not in self.corpora:
+            directory = self.root / f"{kind}-{size}"
+            write_corpus(directory, kind, size)
+            self.corpora[key] = directory
+        return self.corpora[key]
+
+
+class BenchmarkResults:
+    """Measurements of a session, compared with and saved as a baseline."""
+
+    def __init__(self, config: pytest.Config):
+        """Load the baseline selected by the options."""
+        self.path: Path = config.getoption("bench_baseline")
+        self.save_baseline: bool = config.getoption("bench_save_baseline")
+        self.tolerance: float = config.getoption("bench_tolerance")
+        self.settings = {
+            "latency_ms": config.getoption("bench_latency_ms"),
+            "file_ms": config.getoption("bench_file_ms"),
+        }
+        self.measurements: Dict[str, Measurement] = {}
+        try:
+            self.baseline: Dict[str, Measurement] = json.loads(
+                self.path.read_text(encoding="utf-8")
+            )
+        except (OSError, ValueError):
+            self.baseline = {}
+
+    def add(self, case: str, measurement: Measurement) -> None:
+        """Record the measurement of a case."""
+        self.measurements[case] = dict(measurement, **self.settings)
+
+    def regressions(self, case: str) -> List[str]:
+        """Describe how a case regressed against its baseline, if it did.
+
+        Cases without a baseline, or measured with other stub settings,
+        are not compared.
+        """
+        previous = self.baseline.get(case)
+        current = self.measurements[case]
+        if self.save_baseline or previous is None:
+            return []
+        if any(previous.get(key) != value for key, value in self.settings.items()):
+            return []
+
+        problems = []
+        ceiling = previous["wall"] / (1 - self.tolerance) + WALL_SLACK
+        if current["wall"] > ceiling:
+            problems.append(
+                f"wall {current['wall'] * 1000:.0f}ms, baseline "
+                f"{previous['wall'] * 1000:.0f}ms"
+            )
+        ceiling = previous["peak_rss_kb"] * (1 + self.tolerance)
+        if current["peak_rss_kb"] > ceiling:
+            problems.append(
+                f"peak RSS {current['peak_rss_kb'] // 1024}MB, baseline "
+                f"{previous['peak_rss_kb'] // 1024}MB"
+            )
+        return problems
+
+    def write(self, results: Path) -> Optional[Path]:
+        """Write the measurements, and the baseline if requested.
+
+        Returns:
+            The baseline path if it was written.
+        """
+        results.parent.mkdir(parents=True, exist_ok=True)
+        results.write_text(json.dumps(self.measurements, indent=1), encoding="utf-8")
+        if not self.save_baseline:
+            return None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps(dict(self.baseline, **self.measurements), indent=1),
+            encoding="utf-8",
+        )
+        return self.path
+
+
+@pytest.fixture(scope="session")
+def stubs(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Directory of the stub tool executables."""
+    return install_stubs(tmp_path_factory.mktemp("stubs"))
+
+
+@pytest.fixture(scope="session")
+def corpora(tmp_path_factory: pytest.TempPathFactory) -> CorpusCache:
+    """Synthetic corpora, shared by all benchmarks."""
+    return CorpusCache(tmp_path_factory.mktemp("corpora"))
+
+
+@pytest.fixture(scope="session")
+def bench_results(request: pytest.FixtureRequest) -> Iterator[BenchmarkResults]:
+    """Measurements of the session, written to build/benchmarks at the end."""
+    results = BenchmarkResults(request.config)
+    request.config.stash[RESULTS_KEY] = results
+    yield results
+    results.write(DEFAULT_RESULTS)
+
+
+def pytest_terminal_summary(
+    terminalreporter: Any, exitstatus: int, config: pytest.Config
+) -> None:
+    """Print the measurements of the session as a table."""
+    del exitstatus
+    results = config.stash.get(RESULTS_KEY, None)
+    if results is None or not results.measurements:
+        return
+    reporter = terminalreporter
+    reporter.section("pipeline benchmarks")
+    width = max(len(case) for case in results.measurements)
+    reporter.write_line(
+        f"{'case':<{width}}  {'wall':>9}  {'files/s':>9}  {'peak RSS':>8}  baseline"
+    )
+    for case, current in results.measurements.items():
+        previous = results.baseline.get(case)
+        change = "-"
+        if previous and previous.get("throughput"):
+            ratio = current["throughput"] / previous["throughput"]
+            change = f"{ratio - 1:+.0%} files/s"
+        reporter.write_line(
+            f"{case:<{width}}  {current['wall'] * 1000:>7.0f}ms  "
+            f"{current['throughput']:>9.0f}  {current['peak_rss_kb'] // 1024:>6}MB  "
+            f"{change}"
+        )
+    reporter.write_line(f"Results written to {DEFAULT_RESULTS}")
+    if results.save_baseline:
+        reporter.write_line(f"Saved the baseline to {results.path}")
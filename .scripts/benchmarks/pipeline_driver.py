@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Run one lint or format pipeline on a corpus and print its measurements.
+
+Each measurement runs in a fresh process, so that the peak RSS belongs to
+that pipeline alone. The benchmarks start this script with the stub tools
+on PATH; it changes into the corpus, runs the pipeline with its output
+discarded and prints one JSON object:
+
+    {"wall": seconds, "peak_rss_kb": kilobytes, "exit_code": n}
+
+Usage:
+    python pipeline_driver.py TARGET MODE CORPUS
+
+TARGET is one of TARGETS; MODE is one of the target's modes.
+"""
+
+import contextlib
+import json
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+# Add the .scripts directory to sys.path to allow importing the scripts
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+import format_clang  # noqa: E402
+import lint_clang  # noqa: E402
+from pwshlint import PwshLinter  # noqa: E402
+from pylib import Linter, find_cpp_files  # noqa: E402
+from pylib.compile_db import CompileDatabase  # noqa: E402
+from pylib.tidy_cache import LintCache  # noqa: E402
+from shlint import ShellLinter  # noqa: E402
+
+# Modes of each target; the first one runs without any result cache
+TARGETS: Dict[str, Tuple[str, ...]] = {
+    "lint_clang": ("cold", "cached"),
+    "format_clang": ("per-file", "batched"),
+    "shlint": ("cold", "cached"),
+    "pwshlint": ("cold", "cached"),
+}
+
+# Corpus kind each target runs on
+CORPUS_KINDS = {
+    "lint_clang": "cpp",
+    "format_clang": "cpp",
+    "shlint": "shell",
+    "pwshlint": "powershell",
+}
+
+
+def _lint_clang(mode: str) -> int:
+    """Run lint_clang.lint_files() the way its command line does."""
+    index_dir = Path("build") / lint_clang.CACHE_DIR_NAME
+    database = CompileDatabase.load("build", index_dir)
+    cache = None
+    if mode == "cached":
+        size = lint_clang.DEFAULT_CACHE_SIZE_MB * 1024 * 1024
+        cache = LintCache(index_dir, size, database)
+    files = find_cpp_files(["src", "include"])
+    return lint_clang.lint_files(files, cache=cache, database=database)
+
+
+def _format_clang(mode: str) -> int:
+    """Run format_clang.format_files() the way its command line does."""
+    files = find_cpp_files(["src", "include", "tests"])
+    batch_size = format_clang.DEFAULT_BATCH_SIZE if mode == "batched" else 0
+    return format_clang.format_files(files, batch_size=batch_size)
+
+
+def _linter(linter_class: Callable[[], Linter]) -> Callable[[str], int]:
+    """Return a runner of Linter.run() for a Linter subclass."""
+
+    def run(mode: str) -> int:
+        sys.argv = ["linter"] + (["--no-cache"] if mode == "cold" else [])
+        try:
+            linter_class().run()
+        except SystemExit as exc:
+            return int(exc.code or 0)
+        return 0
+
+    return run
+
+
+RUNNERS: Dict[str, Callable[[str], int]] = {
+    "lint_clang": _lint_clang,
+    "format_clang": _format_clang,
+    "shlint": _linter(ShellLinter),
+    "pwshlint": _linter(PwshLinter),
+}
+
+
+def main() -> int:
+    """Main entry point."""
+    if len(sys.argv) != 4 or sys.argv[2] not in TARGETS.get(sys.argv[1], ()):
+        print(__doc__.split("Usage:")[1].strip(), file=sys.stderr)
+        return 2
+    target, mode, corpus = sys.argv[1:]
+    os.chdir(corpus)
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            exit_code = RUNNERS[target](mode)
+        wall = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"wall": wall, "peak_rss_kb": peak, "exit_code": exit_code}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Stub clang-tidy, clang-format, shellcheck and pwsh executables.
+
+The pipeline benchmarks put these on PATH instead of the real tools, so
+they run offline on any Linux box and measure the scripts rather than the
+analyses. Each stub speaks just enough of its tool's interface for the
+scripts' parsers: clang-tidy diagnostics, clang-format --dry-run
+violations, shellcheck json1/tty reports and the PSScriptAnalyzer worker
+protocol of pwshlint.py.
+
+A file gets one diagnostic when its content contains ISSUE_MARKER. The
+latency of the stubs is read from the environment on every invocation:
+
+    BENCH_STUB_LATENCY_MS  delay per process (default: 0)
+    BENCH_STUB_FILE_MS     delay per file analyzed (default: 0)
+
+Only check mode is modeled: fix runs change nothing.
+"""
+
+import os
+import stat
+import sys
+from pathlib import Path
+from typing import Dict
+
+# Files containing this text get one diagnostic from every stub
+ISSUE_MARKER = "bench-issue"
+
+TOOLS = ("clang-tidy", "clang-format", "shellcheck", "pwsh")
+
+# Shared by all stubs; the tool is picked by the executable's name
+STUB_SOURCE = r"""
+import json
+import os
+import sys
+import time
+
+MARKER = __MARKER__
+LATENCY = float(os.environ.get("BENCH_STUB_LATENCY_MS", "0")) / 1000
+PER_FILE = float(os.environ.get("BENCH_STUB_FILE_MS", "0")) / 1000
+
+
+def has_issue(path):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            return MARKER in handle.read()
+    except OSError:
+        return False
+
+
+def operands(args):
+    return [arg for arg in args if not arg.startswith("-")]
+
+
+def clang_tidy(args):
+    if "--version" in args:
+        print("LLVM (http://llvm.org/):\n  LLVM version 17.0.6 (benchmark stub)")
+        return 0
+    path = args[-1]
+    time.sleep(PER_FILE)
+    if has_issue(path):
+        print(f"{path}:1:1: warning: stub diagnostic [bench-stub]")
+    return 0
+
+
+def clang_format(args):
+    if "--version" in args:
+        print("clang-format version 17.0.6 (benchmark stub)")
+        return 0
+    paths = operands(args)
+    time.sleep(PER_FILE * len(paths))
+    if "--dry-run" in args:
+        dirty = [path for path in paths if has_issue(path)]
+        for path in dirty:
+            print(
+                f"{path}:1:1: error: code should be clang-formatted "
+                "[-Wclang-format-violations]",
+                file=sys.stderr,
+            )
+        return 1 if dirty else 0
+    if "-i" not in args:
+        for path in paths:
+            with open(path, "rb") as handle:
+                sys.stdout.buffer.write(handle.read())
+    return 0
+
+
+def shellcheck(args):
+    if "--version" in args:
+        print("ShellCheck - shell script analysis tool\nversion: 0.10.0-stub")
+        return 0
+    paths = operands(args)
+    time.sleep(PER_FILE * len(paths))
+    dirty = [path for path in paths if has_issue(path)]
+    if "--format=json1" in args:
+        comments = [
+            {"file": path, "line": 1, "endLine": 1, "column": 1, "endColumn": 2,
+             "level": "style", "code": 2034, "message": "stub diagnostic",
+             "fix": None}
+            for path in dirty
+        ]
+        print(json.dumps({"comments": comments}))
+    elif "--format=diff" not in args:
+        for path in dirty:
+            print(f"\nIn {path} line 1:\n^-- SC2034 (style): stub diagnostic")
+    return 1 if dirty else 0
+
+
+def pwsh(args):
+    script = args[-1] if args else ""
+    if "ReadLine()" not in script:
+        # One-off Invoke-ScriptAnalyzer or Install-Module command
+        return 0
+    print(json.dumps({"ready": True, "version": "1.22.0-stub"}), flush=True)
+    for line in sys.stdin:
+        request = json.loads(line)
+        time.sleep(PER_FILE)
+        diagnostics = []
+        if has_issue(request["path"]):
+            diagnostics.append({"line": 1, "severity": "Warning",
+                                "rule": "PSBenchStub", "message": "stub diagnostic"})
+        print(json.dumps({"path": request["path"], "diagnostics": diagnostics}),
+              flush=True)
+    return 0
+
+
+TOOLS = {"clang-tidy": clang_tidy, "clang-format": clang_format,
+         "shellcheck": shellcheck, "pwsh": pwsh}
+
+time.sleep(LATENCY)
+sys.exit(TOOLS[os.path.basename(sys.argv[0])](sys.argv[1:]))
+"""
+
+
+def install_stubs(directory: Path) -> Path:
+    """Write the stub executables to directory.
+
+    The stubs run with the current interpreter in isolated mode (-I) and
+    without the site module (-S), which keeps their start-up time low.
+
+    Returns:
+        The directory, for prepending to PATH.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    source = STUB_SOURCE.replace("__MARKER__", repr(ISSUE_MARKER))
+    for tool in TOOLS:
+        path = directory / tool
+        path.write_text(f"#!{sys.executable} -IS\n{source}", encoding="utf-8")
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return directory
+
+
+def stub_environment(
+    directory: Path, latency_ms: float = 0, file_ms: float = 0
+) -> Dict[str, str]:
+    """Return an environment with the stubs in directory first on PATH."""
+    env = dict(os.environ)
+    env["PATH"] = os.pathsep.join([str(directory), env.get("PATH", "")])
+    env["BENCH_STUB_LATENCY_MS"] = f"{latency_ms:g}"
+    env["BENCH_STUB_FILE_MS"] = f"{file_ms:g}"
+    return env
@@ -0,0 +1,156 @@
+"""Synthetic C++, shell and PowerShell source trees for the benchmarks.
+
+Every corpus has a given number of lint targets, spread over directories
+of FILES_PER_DIR files so that even 100k-file trees look like a real
+checkout. Every ISSUE_EVERY-th file contains the stub tools' issue marker,
+so the scripts also exercise their diagnostic reporting.
+
+C++ corpora mirror the layout lint_clang.py expects: sources in src/,
+headers in include/ (each included by one source), and a
+build/compile_commands.json covering the sources.
+"""
+
+import json
+from pathlib import Path
+from typing import List
+
+from stub_tools import ISSUE_MARKER
+
+FILES_PER_DIR = 100
+
+# Every n-th file gets a diagnostic from the stubs
+ISSUE_EVERY = 10
+
+# Every n-th C++ target is a header, included by the source before it
+HEADER_EVERY = 4
+
+KINDS = ("cpp", "shell", "powershell")
+
+CPP_SOURCE = """\
+// {marker}
+#include <string>
+#include <vector>
+{include}
+namespace bench {{
+
+int Sum{index}(const std::vector<int>& values) {{
+  int total = 0;
+  for (int value : values) {{
+    total += value;
+  }}
+  return total;
+}}
+
+std::string Name{index}() {{ return "file{index}"; }}
+
+}}  // namespace bench
+"""
+
+CPP_HEADER = """\
+// {marker}
+#pragma once
+
+namespace bench {{
+
+inline int Twice{index}(int value) {{ return value * 2; }}
+
+}}  // namespace bench
+"""
+
+SHELL_SCRIPT = """\
+#!/bin/sh
+# {marker}
+set -eu
+
+name="file{index}"
+echo "Running ${{name}}"
+"""
+
+POWERSHELL_SCRIPT = """\
+# {marker}
+param([string]$Name = 'file{index}')
+
+Write-Output "Running $Name"
+"""
+
+
+def _directory(root: Path, top: str, index: int) -> Path:
+    """Return (and create) the directory of the index-th file under top."""
+    directory = root / top / f"mod{index // FILES_PER_DIR}"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _marker(index: int) -> str:
+    """Return the comment text of the index-th file."""
+    return ISSUE_MARKER if index % ISSUE_EVERY == ISSUE_EVERY - 1 else "generated"
+
+
+def write_cpp_corpus(root: Path, count: int) -> List[Path]:
+    """Write count C++ sources and headers plus a compilation database.
+
+    Returns:
+        The files written, relative to root.
+    """
+    files: List[Path] = []
+    commands = []
+    for index in range(count):
+        if index % HEADER_EVERY == HEADER_EVERY - 1:
+            continue
+        header = index + 1 < count and (index + 1) % HEADER_EVERY == HEADER_EVERY - 1
+        include = ""
+        if header:
+            path = _directory(root, "include", index + 1) / f"file{index + 1}.hpp"
+            path.write_text(
+                CPP_HEADER.format(marker=_marker(index + 1), index=index + 1),
+                encoding="utf-8",
+            )
+            files.append(path.relative_to(root))
+            include = f'#include "{path.parent.name}/{path.name}"\n'
+
+        path = _directory(root, "src", index) / f"file{index}.cpp"
+        path.write_text(
+            CPP_SOURCE.format(marker=_marker(index), index=index, include=include),
+            encoding="utf-8",
+        )
+        files.append(path.relative_to(root))
+        commands.append(
+            {
+                "directory": str(root),
+                "command": f"clang++ -std=c++17 -Iinclude -c {path.relative_to(root)}",
+                "file": str(path.relative_to(root)),
+            }
+        )
+
+    build = root / "build"
+    build.mkdir(exist_ok=True)
+    (build / "compile_commands.json").write_text(json.dumps(commands), encoding="utf-8")
+    return files
+
+
+def _write_scripts(root: Path, count: int, template: str, extension: str) -> List[Path]:
+    """Write count scripts from template under scripts/."""
+    files = []
+    for index in range(count):
+        path = _directory(root, "scripts", index) / f"file{index}{extension}"
+        path.write_text(
+            template.format(marker=_marker(index), index=index), encoding="utf-8"
+        )
+        files.append(path.relative_to(root))
+    return files
+
+
+def write_corpus(root: Path, kind: str, count: int) -> List[Path]:
+    """Write a corpus of one of KINDS with count lint targets to root.
+
+    Returns:
+        The lint targets, relative to root.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    if kind == "cpp":
+        return write_cpp_corpus(root, count)
+    if kind == "shell":
+        return _write_scripts(root, count, SHELL_SCRIPT, ".sh")
+    if kind == "powershell":
+        return _write_scripts(root, count, POWERSHELL_SCRIPT, ".ps1")
+    raise ValueError(f"unknown corpus kind {kind!r}")
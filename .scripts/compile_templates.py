@@ -9,6 +9,11 @@ Usage:
     python scripts/compile_templates.py --build-system cmake
     python scripts/compile_templates.py --build-system xmake
     python scripts/compile_templates.py --build-system bazel
+    python scripts/compile_templates.py --build-system compile-db
+
+The compile-db target writes compile_commands.json straight from the same
+settings, without configuring a build, so clang-tidy can run right away.
+It does not need jinja2.
 """
 
 import argparse
@@ -23,12 +28,11 @@ if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace")
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace")
 
-try:
-    from jinja2 import Environment, FileSystemLoader, StrictUndefined
-except ImportError:
-    print("❌ Error: jinja2 is not installed.", file=sys.stderr)
-    print("Install it with: uv pip install jinja2", file=sys.stderr)
-    sys.exit(1)
+# Add parent directory to path for pylib imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+# pylint: disable=wrong-import-position
+from pylib.compile_db import generate_compile_db, write_compile_db
 
 
 def get_template_context():
@@ -60,6 +64,15 @@ def compile_template(template_name: str, output_path: Path, context: dict) -> No
         )
         sys.exit(1)
 
+    # Imported here so that compile-db generation works without jinja2
+    try:
+        # pylint: disable=import-outside-toplevel
+        from jinja2 import Environment, FileSystemLoader, StrictUndefined
+    except ImportError:
+        print("❌ Error: jinja2 is not installed.", file=sys.stderr)
+        print("Install it with: uv pip install jinja2", file=sys.stderr)
+        sys.exit(1)
+
     # Setup Jinja2 environment
     env = Environment(
         loader=FileSystemLoader(templates_dir),
@@ -115,6 +128,23 @@ def compile_bazel_templates(context: dict) -> None:
     compile_template("WORKSPACE.j2", project_root / "WORKSPACE", context)
 
 
+def compile_compile_db(context: dict) -> None:
+    """Write compile_commands.json for clang-tidy without a build"""
+    project_root = Path(__file__).parent.parent
+    entries = generate_compile_db(
+        project_root,
+        context["compiler"],
+        build_type=context["build_type"],
+        target_arch=context["target_arch"],
+    )
+    try:
+        path = write_compile_db(entries, project_root / context["build_dir"])
+    except OSError as e:
+        print(f"❌ Error writing compile_commands.json: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ Generated: {path.relative_to(project_root)} ({len(entries)} entries)")
+
+
 def main():
     """Main entry point for template compilation."""
     parser = argparse.ArgumentParser(
@@ -122,7 +152,7 @@ def main():
     )
     parser.add_argument(
         "--build-system",
-        choices=["cmake", "xmake", "bazel"],
+        choices=["cmake", "xmake", "bazel", "compile-db"],
         required=True,
         help="Build system to generate configuration for",
     )
@@ -167,6 +197,8 @@ def main():
         compile_xmake_templates(context)
     elif args.build_system == "bazel":
         compile_bazel_templates(context)
+    elif args.build_system == "compile-db":
+        compile_compile_db(context)
 
     print()
     print(f"✓ Template compilation complete for {args.build_system}")
@@ -4,11 +4,13 @@
 Formats C++ source files (.cpp, .hpp, .h) in src/, include/, and tests/ directories.
 """
 
-import subprocess
+import argparse
+import re
 import sys
 import time
+from functools import partial
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # Add parent directory to path for pylib imports
 sys.path.insert(0, str(Path(__file__).parent))
@@ -16,7 +18,6 @@ sys.path.insert(0, str(Path(__file__).parent))
 # pylint: disable=wrong-import-position
 from pylib import (
     Colors,
-    find_cpp_files,
     fix_windows_console,
     print_error_count,
     print_file_changed,
@@ -26,58 +27,300 @@ from pylib import (
     print_needs_fixing,
     print_summary_header,
 )
+from pylib.atomic_write import write_atomic
+from pylib.cpp_files import find_cpp_files_from_args
+from pylib.git_files import LineRanges, add_git_arguments
+from pylib.history import (
+    add_report_arguments,
+    history_path,
+    record_run,
+    report_history,
+)
+from pylib.limits import (
+    LimitExceeded,
+    ResourceLimits,
+    add_limit_arguments,
+    is_limit_error,
+    run_limited,
+)
+from pylib.output import FileResult, print_estimate, print_limit_count
+from pylib.parallel import add_jobs_argument, default_jobs, make_batches, run_ordered
+from pylib.sharding import (
+    ShardReport,
+    add_shard_arguments,
+    is_merge,
+    load_merged,
+    print_missing_shards,
+    select_shard,
+)
+from pylib.timings import TIMINGS_NAME, TimingDatabase
+from pylib.tracing import run_traced, span
 
 # Fix Windows console for Unicode output
 fix_windows_console()
 
+# Tool name recorded in shard results files
+TOOL_NAME = "clang-format"
+
+# Default number of files passed to one clang-format call in batch mode
+DEFAULT_BATCH_SIZE = 50
+
+# "<path>:<line>:<col>: <severity>: <message>" diagnostic lines
+DIAGNOSTIC_RE = re.compile(r"^(?P<path>.*):\d+:\d+: (?:warning|error): (?P<msg>.*)$")
+
+FileOutcome = Tuple[bool, float, str]
+
+# Build directory whose caches and history clang-format runs use
+BUILD_DIR = Path("build")
 
-def check_file_needs_formatting(file: Path, style: str) -> bool:
-    """Check if a file needs formatting without modifying it."""
+# Run time history of clang-format, used to start the slowest files first
+TIMINGS_PATH = BUILD_DIR / ".format-cache" / TIMINGS_NAME
+
+
+def _lines_args(lines: Optional[List[Tuple[int, int]]]) -> List[str]:
+    """Build the clang-format --lines options for a set of line ranges."""
+    return [f"--lines={first}:{last}" for first, last in lines or []]
+
+
+def check_file_needs_formatting(
+    file: Path,
+    style: str,
+    lines: Optional[List[Tuple[int, int]]] = None,
+    limits: Optional[ResourceLimits] = None,
+) -> bool:
+    """Check if a file needs formatting without modifying it.
+
+    If lines is given, only those (first, last) line ranges are checked.
+
+    Raises:
+        LimitExceeded: If clang-format was killed by one of the limits.
+    """
     try:
-        result = subprocess.run(
-            ["clang-format", "--dry-run", "--Werror", f"--style={style}", str(file)],
-            capture_output=True,
+        result = run_limited(
+            ["clang-format", "--dry-run", "--Werror", f"--style={style}"]
+            + _lines_args(lines)
+            + [str(file)],
+            limits,
             text=True,
-            check=False,
         )
         return result.returncode != 0
     except FileNotFoundError:
         return False
 
 
-def format_single_file(file: Path, fix: bool, style: str) -> Tuple[bool, float, str]:
-    """Format a single file.
+def fix_single_file(
+    file: Path,
+    style: str,
+    lines: Optional[List[Tuple[int, int]]] = None,
+    limits: Optional[ResourceLimits] = None,
+) -> Tuple[bool, str]:
+    """Format a file with a single clang-format run.
+
+    clang-format writes the formatted source to stdout, which is compared
+    with the bytes on disk; the file is only rewritten when they differ, so
+    clean files keep their mtime and don't trigger rebuilds. If lines is
+    given, only those (first, last) line ranges are reformatted.
 
     Returns:
-        Tuple of (changed, elapsed_time, error_message)
+        Tuple of (changed, error_message)
+
+    Raises:
+        LimitExceeded: If clang-format was killed by one of the limits.
+    """
+    result = run_limited(
+        ["clang-format", f"--style={style}"] + _lines_args(lines) + [str(file)],
+        limits,
+    )
+    if result.returncode != 0:
+        error = result.stderr.decode(errors="replace").strip()
+        return False, error or "Unknown error"
+
+    if result.stdout == file.read_bytes():
+        return False, ""
+
+    write_atomic(file, result.stdout)
+    return True, ""
+
+
+def format_single_file(
+    file: Path,
+    fix: bool,
+    style: str,
+    lines: Optional[List[Tuple[int, int]]] = None,
+    limits: Optional[ResourceLimits] = None,
+) -> Tuple[bool, float, str]:
+    """Format a single file, or only the given (first, last) line ranges.
+
+    Returns:
+        Tuple of (changed, elapsed_time, error_message). If clang-format was
+        killed by one of the limits, the error message says so (see
+        is_limit_error()).
     """
     start_time = time.time()
 
     try:
-        # First check if file needs formatting
-        needs_formatting = check_file_needs_formatting(file, style)
-
-        if fix and needs_formatting:
-            # Apply formatting
-            result = subprocess.run(
-                ["clang-format", "-i", f"--style={style}", str(file)],
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            elapsed = time.time() - start_time
+        if fix:
+            changed, error = fix_single_file(file, style, lines, limits)
+        else:
+            changed, error = check_file_needs_formatting(file, style, lines, limits), ""
 
-            if result.returncode != 0:
-                error_msg = result.stderr.strip() if result.stderr else "Unknown error"
-                return False, elapsed, error_msg
-            return True, elapsed, ""
+        elapsed = time.time() - start_time
+        return changed, elapsed, error
 
+    except LimitExceeded as exc:
         elapsed = time.time() - start_time
-        return needs_formatting, elapsed, ""
+        return False, elapsed, str(exc)
 
     except FileNotFoundError:
         elapsed = time.time() - start_time
         return False, elapsed, "clang-format not found"
+    except OSError as exc:
+        elapsed = time.time() - start_time
+        return False, elapsed, str(exc)
+
+
+def _split_diagnostics(
+    stderr: str, batch: List[Path]
+) -> Tuple[Dict[str, bool], Dict[str, str]]:
+    """Attribute combined --dry-run diagnostics to the files of a batch.
+
+    Returns:
+        Tuple of (files needing formatting, per-file error messages), keyed
+        by the path string passed to clang-format.
+    """
+    names = {str(file) for file in batch}
+    dirty: Dict[str, bool] = {}
+    errors: Dict[str, str] = {}
+
+    for line in stderr.splitlines():
+        match = DIAGNOSTIC_RE.match(line)
+        if not match or match.group("path") not in names:
+            continue
+        path = match.group("path")
+        if "clang-format-violations" in match.group("msg"):
+            dirty[path] = True
+        else:
+            errors.setdefault(path, match.group("msg"))
+
+    return dirty, errors
+
+
+def format_batch(
+    batch: List[Path],
+    fix: bool,
+    style: str,
+    limits: Optional[ResourceLimits] = None,
+) -> List[FileOutcome]:
+    """Check (and optionally fix) a batch of files with one clang-format call.
+
+    The combined --dry-run diagnostics are split back into per-file results.
+    In fix mode each dirty file is then formatted by its own clang-format
+    call, whose output replaces the file atomically (see fix_single_file()).
+    If the failure cannot be attributed to individual files, or the check is
+    killed by the limits (whose time limit is scaled to the batch size), the
+    batch falls back to per-file processing, so that only the offending
+    files are reported as killed.
+
+    Returns:
+        One (changed, elapsed_time, error_message) tuple per file, in order.
+        The batch time is spread evenly across its files.
+    """
+    start_time = time.time()
+
+    def outcomes(dirty: Dict[str, bool], errors: Dict[str, str]) -> List[FileOutcome]:
+        elapsed = (time.time() - start_time) / len(batch)
+        return [
+            (
+                str(file) in dirty and str(file) not in errors,
+                elapsed,
+                errors.get(str(file), ""),
+            )
+            for file in batch
+        ]
+
+    def one_by_one() -> List[FileOutcome]:
+        return [format_single_file(file, fix, style, None, limits) for file in batch]
+
+    batch_limits = (limits or ResourceLimits()).for_batch(len(batch))
+    try:
+        result = run_limited(
+            ["clang-format", "--dry-run", "--Werror", f"--style={style}"]
+            + [str(file) for file in batch],
+            batch_limits,
+            text=True,
+        )
+    except FileNotFoundError:
+        return outcomes({}, {str(file): "clang-format not found" for file in batch})
+    except LimitExceeded:
+        return one_by_one()
+
+    dirty, errors = _split_diagnostics(result.stderr, batch)
+    if result.returncode != 0 and not dirty and not errors:
+        return one_by_one()
+
+    if fix:
+        for file in batch:
+            if str(file) in dirty and str(file) not in errors:
+                _, _, error = format_single_file(file, True, style, None, limits)
+                if error:
+                    errors[str(file)] = error
+
+    return outcomes(dirty, errors)
+
+
+def _format_all(  # pylint: disable=too-many-arguments
+    files: List[Path],
+    fix: bool,
+    style: str,
+    jobs: int,
+    batch_size: int,
+    line_ranges: Optional[LineRanges],
+    timings: TimingDatabase,
+    *,
+    limits: Optional[ResourceLimits] = None,
+) -> Iterator[FileOutcome]:
+    """Yield per-file results in input order, batching files if requested.
+
+    clang-format only accepts --lines with a single file, so restricting
+    the run to line ranges always formats one file per call. Files (or
+    batches) with the highest expected cost are started first.
+    """
+    costs = timings.costs(files)[0]
+    if line_ranges is not None:
+
+        def format_lines(file: Path) -> FileOutcome:
+            return format_single_file(file, fix, style, line_ranges.get(file), limits)
+
+        yield from run_ordered(format_lines, files, jobs, costs)
+        return
+
+    if batch_size <= 1:
+        yield from run_ordered(
+            partial(format_single_file, fix=fix, style=style, limits=limits),
+            files,
+            jobs,
+            costs,
+        )
+        return
+
+    file_costs = dict(zip(files, costs, strict=True))
+    batches = make_batches(files, batch_size)
+    for results in run_ordered(
+        partial(format_batch, fix=fix, style=style, limits=limits),
+        batches,
+        jobs,
+        [sum(file_costs[file] for file in batch) for batch in batches],
+    ):
+        yield from results
+
+
+def _record_times(
+    files: List[Path], results: Iterator[FileOutcome], timings: TimingDatabase
+) -> Iterator[FileOutcome]:
+    """Pass results through, recording the run time of each file."""
+    for file, outcome in zip(files, results, strict=True):
+        timings.record(file, outcome[1])
+        yield outcome
 
 
 def _print_file_result(
@@ -93,19 +336,73 @@ def _print_file_result(
         print_file_unchanged(file, time_str, suffix, use_color)
 
 
+def _print_results(
+    files: List[Path],
+    results: Iterator[FileOutcome],
+    fix: bool,
+    use_color: bool,
+    report: Optional[ShardReport] = None,
+) -> Tuple[int, int, int, float]:
+    """Print per-file results as they arrive, adding them to report if given.
+
+    Returns:
+        Tuple of (changed_count, error_count, killed_count, busy_time); files
+        killed by a limit are counted in both error_count and killed_count
+    """
+    changed_count = 0
+    error_count = 0
+    killed_count = 0
+    busy_time = 0.0
+
+    for file, (changed, elapsed, error) in zip(files, results, strict=True):
+        busy_time += elapsed
+
+        if error:
+            error_count += 1
+            killed_count += is_limit_error(error)
+        elif changed:
+            changed_count += 1
+
+        with span("print", file=str(file)):
+            _print_file_result(
+                file, f"{int(elapsed * 1000)}ms", error, changed, fix, use_color
+            )
+        if report is not None:
+            report.files.append(
+                FileResult(file, int(elapsed * 1000), error or None, changed)
+            )
+
+    return changed_count, error_count, killed_count, busy_time
+
+
+def _mode(fix: bool) -> str:
+    """Return the verb describing a format run."""
+    return "Formatting" if fix else "Checking"
+
+
 def _print_summary(
-    mode: str,
     total_time: float,
+    busy_time: float,
     error_count: int,
     changed_count: int,
     fix: bool,
     use_color: bool,
+    killed_count: int = 0,
 ) -> int:
-    """Print summary and return exit code."""
-    print_summary_header(mode, int(total_time * 1000), use_color)
+    """Print summary and return exit code.
+
+    total_time is the wall-clock time of the run; busy_time is the sum of the
+    per-file times. killed_count is the part of error_count killed by a limit.
+    """
+    mode = _mode(fix)
+    print_summary_header(
+        mode, int(total_time * 1000), use_color, busy_time_ms=int(busy_time * 1000)
+    )
 
     if error_count > 0:
         print_error_count(error_count, use_color)
+        if killed_count > 0:
+            print_limit_count(killed_count, use_color)
         return 1
 
     if not fix and changed_count > 0:
@@ -118,13 +415,35 @@ def _print_summary(
     return 0
 
 
-def format_files(files: List[Path], fix: bool = False, style: str = "Google") -> int:
+def format_files(  # pylint: disable=too-many-arguments
+    files: List[Path],
+    fix: bool = False,
+    style: str = "Google",
+    jobs: Optional[int] = None,
+    batch_size: int = 0,
+    line_ranges: Optional[LineRanges] = None,
+    report: Optional[ShardReport] = None,
+    *,
+    limits: Optional[ResourceLimits] = None,
+) -> int:
     """Format files with clang-format.
 
     Args:
         files: List of files to format
         fix: If True, modify files in place. If False, check only.
         style: Clang-format style to use
+        jobs: Number of parallel clang-format processes (default: CPU count)
+        batch_size: If greater than 1, pass up to this many files to each
+            clang-format call instead of launching one process per file
+        line_ranges: If given, only format these line ranges of each file
+            (as returned by git_changed_lines); batching is disabled
+        report: Collects the per-file results of a sharded run
+        limits: Time and memory limits of each clang-format call; files
+            whose call is killed are reported as errors of their own kind
+
+    Run times are kept in TIMINGS_PATH, so that later runs can start the
+    slowest files first and estimate their duration. This includes the
+    time of killed calls.
 
     Returns:
         0 if successful, non-zero if formatting errors found (in check mode)
@@ -134,50 +453,157 @@ def format_files(files: List[Path], fix: bool = False, style: str = "Google") ->
         return 0
 
     use_color = Colors.supports_color()
-    mode = "Formatting" if fix else "Checking"
 
     # Header
     if use_color:
-        print(f"{Colors.BOLD}{mode} {len(files)} file(s)...{Colors.RESET}")
+        print(f"{Colors.BOLD}{_mode(fix)} {len(files)} file(s)...{Colors.RESET}")
     else:
-        print(f"{mode} {len(files)} file(s)...")
+        print(f"{_mode(fix)} {len(files)} file(s)...")
 
-    changed_count = 0
-    error_count = 0
-    total_time = 0.0
+    if jobs is None:
+        jobs = default_jobs()
 
-    for file in files:
-        changed, elapsed, error = format_single_file(file, fix, style)
-        total_time += elapsed
-        time_str = f"{int(elapsed * 1000)}ms"
+    timings = TimingDatabase.load(TIMINGS_PATH)
+    print_estimate(*timings.costs(files), jobs, use_color)
 
-        if error:
-            error_count += 1
-        elif changed:
-            changed_count += 1
+    start_time = time.time()
+    with span("format", files=len(files), jobs=jobs):
+        changed_count, error_count, killed_count, busy_time = _print_results(
+            files,
+            _record_times(
+                files,
+                _format_all(
+                    files,
+                    fix,
+                    style,
+                    jobs,
+                    batch_size,
+                    line_ranges,
+                    timings,
+                    limits=limits,
+                ),
+                timings,
+            ),
+            fix,
+            use_color,
+            report,
+        )
+    with span("save timings"):
+        timings.save()
+    with span("record history"):
+        record_run(
+            history_path(BUILD_DIR),
+            TOOL_NAME,
+            time.time() - start_time,
+            len(files),
+            timings.samples,
+        )
+
+    return _print_summary(
+        time.time() - start_time,
+        busy_time,
+        error_count,
+        changed_count,
+        fix,
+        use_color,
+        killed_count=killed_count,
+    )
 
-        _print_file_result(file, time_str, error, changed, fix, use_color)
 
-    return _print_summary(mode, total_time, error_count, changed_count, fix, use_color)
+def merge_results(paths: List[Path]) -> int:
+    """Report the combined results files of a sharded format run.
+
+    Returns:
+        0 if every shard reported and no file needs formatting, 1 otherwise.
+    """
+    merged = load_merged(paths, TOOL_NAME)
+    if merged is None:
+        return 1
+
+    use_color = Colors.supports_color()
+    mode = _mode(merged.fix)
+    message = f"{mode} {len(merged.files)} file(s) in {merged.shard_count} shard(s)"
+    print(f"{Colors.BOLD}{message}{Colors.RESET}" if use_color else message)
+
+    outcomes = (
+        (result.changed, result.elapsed_ms / 1000, result.error or "")
+        for result in merged.files
+    )
+    changed_count, error_count, killed_count, busy_time = _print_results(
+        [result.path for result in merged.files], outcomes, merged.fix, use_color
+    )
+    exit_code = _print_summary(
+        merged.wall_time,
+        busy_time,
+        error_count,
+        changed_count,
+        merged.fix,
+        use_color,
+        killed_count=killed_count,
+    )
+    return 1 if print_missing_shards(merged, use_color) else exit_code
 
 
 def main() -> int:
     """Main entry point."""
-    fix = False
-    staged = False
-
-    if len(sys.argv) > 1:
-        if sys.argv[1] in ["fix", "-i", "--fix"]:
-            fix = True
-        elif sys.argv[1] == "--staged":
-            staged = True
-            if len(sys.argv) > 2 and sys.argv[2] in ["fix", "-i", "--fix"]:
-                fix = True
+    parser = argparse.ArgumentParser(description="Format C++ files with clang-format")
+    parser.add_argument(
+        "action",
+        nargs="?",
+        choices=["fix", "merge", "report"],
+        help="fix: same as --fix (legacy form); merge: merge sharded --results; "
+        "report: summarize the timing history",
+    )
+    parser.add_argument(
+        "-i", "--fix", action="store_true", help="Modify files in place"
+    )
+    parser.add_argument("--check", action="store_true", help="Check only (the default)")
+    parser.add_argument(
+        "--batch",
+        nargs="?",
+        type=int,
+        const=DEFAULT_BATCH_SIZE,
+        default=0,
+        metavar="N",
+        help="Pass up to N files per clang-format call (N defaults to %(const)s)",
+    )
+    add_git_arguments(parser, changed_lines=True)
+    add_jobs_argument(parser)
+    add_shard_arguments(parser)
+    add_report_arguments(parser)
+    add_limit_arguments(parser)
+    return run_traced(parser, partial(_run, parser))
+
+
+def _run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Run the action selected on the command line."""
+    if is_merge(parser, args):
+        return merge_results(args.results_files)
+    if args.action == "report":
+        return report_history(args, BUILD_DIR)
+    fix = args.fix or args.action == "fix"
 
     # Find and format files
     directories = ["src", "include", "tests"]
-    files = find_cpp_files(directories, staged_only=staged)
-    return format_files(files, fix=fix)
+    with span("find files"):
+        files, line_ranges = find_cpp_files_from_args(directories, args)
+        files = select_shard(files, args, TIMINGS_PATH)
+
+    report = ShardReport(TOOL_NAME, args.shard or (1, 1))
+    start_time = time.time()
+    exit_code = format_files(
+        files,
+        fix=fix,
+        jobs=args.jobs,
+        batch_size=args.batch,
+        line_ranges=line_ranges,
+        report=report,
+        limits=ResourceLimits.from_args(args),
+    )
+    if args.results is not None:
+        with span("write results"):
+            report.write(args.results, fix, time.time() - start_time)
+    return exit_code
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+"""Tests of how format_clang.py checks and fixes batches of files."""
+
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+from format_clang import format_batch
+
+# Stand-in for clang-format: files containing "bad" are misformatted, and
+# formatting a file upper-cases it. Every call is logged, one per line.
+FAKE_CLANG_FORMAT = """\
+import pathlib, sys
+args = sys.argv[1:]
+with open(pathlib.Path(sys.argv[0]).with_name("calls.log"), "a") as log:
+    log.write(" ".join(args) + "\\n")
+files = [arg for arg in args if not arg.startswith("-")]
+if "--dry-run" in args:
+    bad = [name for name in files if "bad" in pathlib.Path(name).read_text()]
+    for name in bad:
+        print(f"{name}:1:1: error: code should be clang-formatted "
+              "[-Wclang-format-violations]", file=sys.stderr)
+    sys.exit(1 if bad else 0)
+sys.stdout.write(pathlib.Path(files[0]).read_text().upper())
+"""
+
+
+@pytest.fixture(name="calls")
+def fixture_calls(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Put the fake clang-format first on PATH; returns its call log."""
+    tools = tmp_path / "bin"
+    tools.mkdir()
+    script = tools / "clang-format"
+    script.write_text(f"#!{sys.executable}\n{FAKE_CLANG_FORMAT}", encoding="utf-8")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tools}{os.pathsep}{os.environ['PATH']}")
+    return tools / "calls.log"
+
+
+def _sources(tmp_path: Path) -> List[Path]:
+    """One misformatted file between two clean ones."""
+    files = [tmp_path / "a.cpp", tmp_path / "b.cpp", tmp_path / "c.cpp"]
+    for file, text in zip(files, ["ok\n", "bad\n", "ok\n"], strict=True):
+        file.write_text(text, encoding="utf-8")
+    return files
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a script on PATH")
+def test_check_runs_one_call_per_batch(calls: Path, tmp_path: Path) -> None:
+    """The dry run diagnostics are split back into per-file results."""
+    files = _sources(tmp_path)
+
+    results = format_batch(files, False, "file")
+
+    assert [(changed, error) for changed, _, error in results] == [
+        (False, ""),
+        (True, ""),
+        (False, ""),
+    ]
+    assert len(calls.read_text(encoding="utf-8").splitlines()) == 1
+    assert files[1].read_text(encoding="utf-8") == "bad\n"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a script on PATH")
+def test_fix_rewrites_only_dirty_files(calls: Path, tmp_path: Path) -> None:
+    """Each dirty file is rewritten from the output of a single call."""
+    files = _sources(tmp_path)
+    clean_mtime = files[0].stat().st_mtime_ns
+
+    results = format_batch(files, True, "file")
+
+    assert [changed for changed, _, _ in results] == [False, True, False]
+    assert files[1].read_text(encoding="utf-8") == "BAD\n"
+    assert files[0].stat().st_mtime_ns == clean_mtime
+    assert calls.read_text(encoding="utf-8").splitlines()[1:] == [
+        f"--style=file {files[1]}"
+    ]
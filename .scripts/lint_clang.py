@@ -4,11 +4,16 @@
 Lints C++ source files (.cpp, .hpp, .h) in src/ and include/ directories.
 """
 
-import subprocess
+import argparse
+import json
+import os
 import sys
+import tempfile
 import time
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 # Add parent directory to path for pylib imports
 sys.path.insert(0, str(Path(__file__).parent))
@@ -16,7 +21,6 @@ sys.path.insert(0, str(Path(__file__).parent))
 # pylint: disable=wrong-import-position
 from pylib import (
     Colors,
-    find_cpp_files,
     fix_windows_console,
     print_error_count,
     print_file_changed,
@@ -26,16 +30,96 @@ from pylib import (
     print_needs_fixing,
     print_summary_header,
 )
+from pylib.compile_db import CompileDatabase
+from pylib.cpp_files import CPP_EXTENSIONS, find_cpp_files_from_args
+from pylib.distributed import (
+    TOKEN_ENV,
+    Coordinator,
+    add_distributed_arguments,
+    open_coordinator,
+    run_worker,
+)
+from pylib.git_files import LineRanges, add_git_arguments
+from pylib.history import (
+    add_report_arguments,
+    history_path,
+    record_run,
+    report_history,
+)
+from pylib.includes import IncludeScanner
+from pylib.limits import (
+    LimitExceeded,
+    ResourceLimits,
+    add_limit_arguments,
+    is_limit_error,
+    run_limited,
+)
+from pylib.output import FileResult, print_estimate, print_limit_count
+from pylib.parallel import add_jobs_argument, default_jobs, run_ordered
+from pylib.result_cache import hash_parts
+from pylib.sharding import (
+    ShardReport,
+    add_shard_arguments,
+    is_merge,
+    load_merged,
+    print_missing_shards,
+    select_shard,
+)
+from pylib.tidy_cache import LintCache
+from pylib.tidy_fixes import apply_exported_fixes, can_apply_fixes
+from pylib.tidy_profile import (
+    DEFAULT_PROFILE,
+    add_profile_argument,
+    load_check_times,
+    merge_checks_args,
+    print_check_times,
+    profile_args,
+    profiling_args,
+)
+from pylib.tidy_units import (
+    HEADER_EXTENSIONS,
+    LintUnit,
+    line_filter_args,
+    plan_units,
+    split_output,
+    task_args,
+    unit_task,
+)
+from pylib.timings import TIMINGS_NAME, TimingDatabase
+from pylib.tracing import run_traced, span
 
 # Fix Windows console for Unicode output
 fix_windows_console()
 
+# Tool name recorded in shard results files
+TOOL_NAME = "clang-tidy"
+
+# Result cache location, relative to the build directory
+CACHE_DIR_NAME = ".lint-cache"
+
+# Default size limit of the result cache in megabytes
+DEFAULT_CACHE_SIZE_MB = 64
+
+FileOutcome = Tuple[bool, float, str]
+
 
 def lint_single_file(
-    file: Path, fix: bool, build_dir: str = "build"
+    file: Path,
+    fix: bool,
+    build_dir: str = "build",
+    extra_args: Sequence[str] = (),
+    export_fixes: Optional[Path] = None,
+    limits: Optional[ResourceLimits] = None,
 ) -> Tuple[bool, float, str]:
     """Lint a single file with clang-tidy.
 
+    extra_args are passed to clang-tidy before the file name (e.g.
+    --header-filter, --line-filter or --checks; several --checks options
+    are combined into one). In fix mode, fixes are written to
+    export_fixes instead of being applied if that path is given. If
+    clang-tidy is killed by one of the limits, the output message says so
+    (see is_limit_error()).
+
     Returns:
         Tuple of (has_issues, elapsed_time, output_message)
     """
@@ -46,19 +130,19 @@ def lint_single_file(
 
         # Suppress MSVC compatibility warnings on Windows
         if sys.platform == "win32":
-            args.extend(
-                [
-                    "--checks=-clang-diagnostic-builtin-macro-redefined,"
-                    "-clang-diagnostic-unused-command-line-argument"
-                ]
-            )
+            extra_args = [
+                "--checks=-clang-diagnostic-builtin-macro-redefined,"
+                "-clang-diagnostic-unused-command-line-argument",
+                *extra_args,
+            ]
 
         if fix:
-            args.append("--fix")
+            args.append(f"--export-fixes={export_fixes}" if export_fixes else "--fix")
 
+        args.extend(merge_checks_args(extra_args))
         args.append(str(file))
 
-        result = subprocess.run(args, capture_output=True, text=True, check=False)
+        result = run_limited(args, limits, text=True)
 
         elapsed = time.time() - start_time
         has_issues = result.returncode != 0 or bool(result.stdout.strip())
@@ -69,11 +153,81 @@ def lint_single_file(
         output = result.stdout.strip() if result.stdout.strip() else ""
         return has_issues, elapsed, output
 
+    except LimitExceeded as exc:
+        elapsed = time.time() - start_time
+        return False, elapsed, str(exc)
     except FileNotFoundError:
         elapsed = time.time() - start_time
         return False, elapsed, "clang-tidy not found"
 
 
+def make_line_filter(line_ranges: LineRanges) -> str:
+    """Build a clang-tidy --line-filter value from changed line ranges.
+
+    Every changed C++ file is listed, so diagnostics in changed lines of
+    headers are still reported while linting the sources that include them.
+    """
+    return json.dumps(
+        [
+            {"name": str(path), "lines": [list(hunk) for hunk in hunks]}
+            for path, hunks in sorted(line_ranges.items())
+            if path.suffix in CPP_EXTENSIONS
+        ],
+        separators=(",", ":"),
+    )
+
+
+def _line_filter(line_ranges: Optional[LineRanges]) -> Optional[str]:
+    """Return the --line-filter value for changed line ranges, if any."""
+    return None if line_ranges is None else make_line_filter(line_ranges)
+
+
+def lint_single_file_cached(  # pylint: disable=too-many-arguments
+    file: Path,
+    fix: bool,
+    build_dir: str,
+    cache: Optional[LintCache],
+    extra_args: Sequence[str] = (),
+    export_fixes: Optional[Path] = None,
+    timings: Optional[TimingDatabase] = None,
+    *,
+    limits: Optional[ResourceLimits] = None,
+) -> Tuple[bool, float, str]:
+    """Lint a single file, replaying a cached result when one exists.
+
+    Results are only stored in check mode. In fix mode a cached clean
+    result is replayed, since clang-tidy would have nothing to fix. The
+    time of actual clang-tidy runs is recorded in timings, if given; that
+    includes runs killed by the limits, which are never cached.
+
+    Returns:
+        Tuple of (has_issues, elapsed_time, output_message)
+    """
+    start_time = time.time()
+    with span("cache lookup", file=str(file)):
+        key = cache.key(file) if cache is not None else None
+        if key is not None and extra_args:
+            key = hash_parts(key, *extra_args)
+        cached = cache.store.get(key) if key is not None else None
+    if cached is not None and not (fix and cached.get("has_issues")):
+        elapsed = time.time() - start_time
+        return bool(cached.get("has_issues")), elapsed, cached.get("output", "")
+
+    has_issues, elapsed, output = lint_single_file(
+        file, fix, build_dir, extra_args, export_fixes, limits
+    )
+    if timings is not None:
+        timings.record(file, elapsed)
+    if (
+        key is not None
+        and not fix
+        and "error:" not in output.lower()
+        and not is_limit_error(output)
+    ):
+        cache.store.put(key, {"has_issues": has_issues, "output": output})
+    return has_issues, elapsed, output
+
+
 def _print_file_result(
     file: Path,
     time_str: str,
@@ -83,7 +237,7 @@ def _print_file_result(
     use_color: bool,
 ) -> None:
     """Print the result for a single file."""
-    if output and "error:" in output.lower():
+    if is_limit_error(output) or (output and "error:" in output.lower()):
         print_file_error(file, time_str, output, use_color)
     elif has_issues:
         print_file_changed(file, time_str, fix, use_color)
@@ -97,19 +251,80 @@ def _print_file_result(
         print_file_unchanged(file, time_str, suffix, use_color)
 
 
+def _print_results(
+    files: List[Path],
+    results: Iterator[FileOutcome],
+    fix: bool,
+    use_color: bool,
+    report: Optional[ShardReport] = None,
+) -> Tuple[int, int, int, float]:
+    """Print per-file results as they arrive, adding them to report if given.
+
+    Returns:
+        Tuple of (issues_count, error_count, killed_count, busy_time); files
+        killed by a limit are counted in both error_count and killed_count
+    """
+    issues_count = 0
+    error_count = 0
+    killed_count = 0
+    busy_time = 0.0
+
+    for file, (has_issues, elapsed, output) in zip(files, results, strict=True):
+        busy_time += elapsed
+
+        if is_limit_error(output):
+            error_count += 1
+            killed_count += 1
+        elif output and "error:" in output.lower():
+            error_count += 1
+        elif has_issues:
+            issues_count += 1
+
+        with span("print", file=str(file)):
+            _print_file_result(
+                file, f"{int(elapsed * 1000)}ms", output, has_issues, fix, use_color
+            )
+        if report is not None:
+            report.files.append(
+                FileResult(
+                    file, int(elapsed * 1000), has_issues=has_issues, output=output
+                )
+            )
+
+    return issues_count, error_count, killed_count, busy_time
+
+
+def _mode(fix: bool) -> str:
+    """Return the verb describing a lint run."""
+    return "Linting and fixing" if fix else "Linting"
+
+
 def _print_summary(
-    mode: str,
     total_time: float,
+    busy_time: float,
     error_count: int,
     issues_count: int,
     fix: bool,
     use_color: bool,
+    killed_count: int = 0,
 ) -> int:
-    """Print summary and return exit code."""
-    print_summary_header(mode, int(total_time * 1000), use_color)
+    """Print summary and return exit code.
+
+    total_time is the wall-clock time of the run; busy_time is the sum of the
+    per-file times, which exceeds total_time when files are linted in parallel.
+    killed_count is the part of error_count killed by a limit.
+    """
+    print_summary_header(
+        _mode(fix),
+        int(total_time * 1000),
+        use_color,
+        busy_time_ms=int(busy_time * 1000),
+    )
 
     if error_count > 0:
         print_error_count(error_count, use_color)
+        if killed_count > 0:
+            print_limit_count(killed_count, use_color)
         return 1
 
     if not fix and issues_count > 0:
@@ -122,13 +337,322 @@ def _print_summary(
     return 0
 
 
-def lint_files(files: List[Path], fix: bool = False, build_dir: str = "build") -> int:
+def _plan(
+    files: List[Path], database: CompileDatabase, cache: Optional[LintCache]
+) -> Tuple[List[Path], List[LintUnit]]:
+    """Plan the clang-tidy runs, leaving out sources without a compile command.
+
+    Headers that no source in the database includes are linted on their
+    own; clang-tidy infers their compile command from a nearby source.
+
+    Returns:
+        Tuple of (files to lint, in order, units covering them)
+    """
+    scanner = cache.scanner if cache is not None else IncludeScanner()
+    units = plan_units(files, database, scanner)
+
+    uncovered = [unit for unit in units if unit.source not in database]
+    headers = [
+        unit.source for unit in uncovered if unit.source.suffix in HEADER_EXTENSIONS
+    ]
+    if headers:
+        print(f"⚠ Linting {len(headers)} header(s) that no compiled source includes:")
+        for header in sorted(headers):
+            print(f"  {header}")
+    skipped = {
+        file for unit in uncovered if unit.source not in headers for file in unit.files
+    }
+    if skipped:
+        print(f"⚠ Skipping {len(skipped)} file(s) not covered by {database.path}:")
+        for file in sorted(skipped):
+            print(f"  {file}")
+
+    units = [
+        unit for unit in units if unit.source in database or unit.source in headers
+    ]
+    return [file for file in files if file not in skipped], units
+
+
+def _tidy_build_dir(
+    database: CompileDatabase, units: List[LintUnit], directory: Path, build_dir: str
+) -> str:
+    """Return the -p directory for clang-tidy, trimming the database if useful.
+
+    Every clang-tidy process parses the whole compilation database, so when
+    only some of its entries are needed a database with just those entries
+    is written to directory instead. Headers linted on their own need the
+    whole database to infer their compile command from.
+    """
+    sources = list(dict.fromkeys(unit.source for unit in units))
+    if len(sources) >= len(database) or any(
+        source not in database for source in sources
+    ):
+        return build_dir
+    try:
+        return str(database.write_subset(sources, directory))
+    except OSError:
+        return build_dir
+
+
+@dataclass
+class LintOptions:  # pylint: disable=too-many-instance-attributes
+    """Settings shared by the clang-tidy runs of one lint."""
+
+    fix: bool
+    build_dir: str
+    cache: Optional[LintCache] = None
+    extra_args: List[str] = field(default_factory=list)
+    # In fix mode, directory the runs export their fixes to instead of
+    # applying them, so that they can run in parallel
+    export_dir: Optional[Path] = None
+    # Run time history, used to start the slowest units first
+    timings: Optional[TimingDatabase] = None
+    # Hands the units to remote workers instead of running them here
+    coordinator: Optional[Coordinator] = None
+    # Time and memory limits of each local clang-tidy run
+    limits: Optional[ResourceLimits] = None
+    # Settings remote workers build their own options from, instead of
+    # running clang-tidy with the coordinator's extra_args
+    line_filter: Optional[str] = None
+    profile: str = DEFAULT_PROFILE
+
+
+def _lint_unit(unit: LintUnit, options: LintOptions) -> List[FileOutcome]:
+    """Run clang-tidy for one unit and split the result across its files.
+
+    Returns:
+        One (has_issues, elapsed_time, output_message) tuple per file of the
+        unit, in order. The run time is spread evenly across the files.
+    """
+    export_fixes = None
+    if options.export_dir is not None:
+        export_fixes = options.export_dir / f"{hash_parts(str(unit.source))}.yaml"
+
+    return _unit_outcomes(
+        unit,
+        *lint_single_file_cached(
+            unit.source,
+            options.fix,
+            options.build_dir,
+            options.cache,
+            unit.header_args() + options.extra_args,
+            export_fixes,
+            options.timings,
+            limits=options.limits,
+        ),
+    )
+
+
+def _unit_task(unit: LintUnit, options: LintOptions) -> Dict[str, Any]:
+    """Describe a unit's clang-tidy run for a remote worker."""
+    return unit_task(unit, options.line_filter, options.profile)
+
+
+def _remote_outcomes(
+    unit: LintUnit, result: Dict[str, Any], options: LintOptions
+) -> List[FileOutcome]:
+    """Turn the result of a remote worker into the unit's file outcomes."""
+    if "error" in result:
+        return _unit_outcomes(unit, False, 0.0, f"Worker error: {result['error']}")
+    elapsed = float(result.get("elapsed", 0.0))
+    if result.get("timed") and options.timings is not None:
+        options.timings.record(unit.source, elapsed)
+    return _unit_outcomes(
+        unit, bool(result.get("has_issues")), elapsed, result.get("output", "")
+    )
+
+
+def run_task(
+    task: Dict[str, Any],
+    build_dir: str,
+    cache: Optional[LintCache],
+    limits: Optional[ResourceLimits] = None,
+) -> Dict[str, Any]:
+    """Run one clang-tidy task on behalf of a coordinator (worker side).
+
+    The task's paths are resolved against this checkout (see task_args()),
+    and paths in the output are rewritten from this checkout to the
+    coordinator's, so the coordinator can attribute the diagnostics.
+    """
+    source, args = task_args(task)
+    source = Path.cwd() / source
+    timings = TimingDatabase(None, {})
+    has_issues, elapsed, output = lint_single_file_cached(
+        source, False, build_dir, cache, args, timings=timings, limits=limits
+    )
+    root = str(Path.cwd().resolve())
+    if isinstance(task.get("root"), str) and task["root"] != root:
+        output = output.replace(root, task["root"])
+    return {
+        "has_issues": has_issues,
+        "elapsed": elapsed,
+        "output": output,
+        # Cache hits are not timed
+        "timed": timings.get(source) is not None,
+    }
+
+
+def _unit_outcomes(
+    unit: LintUnit, has_issues: bool, elapsed: float, output: str
+) -> List[FileOutcome]:
+    """Split the result of a unit's clang-tidy run across its files.
+
+    Returns:
+        One (has_issues, elapsed_time, output_message) tuple per file of the
+        unit, in order. The run time is spread evenly across the files.
+    """
+    elapsed /= len(unit.files)
+    outputs = split_output(output, unit)
+    if outputs is None:
+        return [(has_issues, elapsed, output) for _ in unit.files]
+    return [(bool(outputs[file]), elapsed, outputs[file]) for file in unit.files]
+
+
+def _lint_all(
+    files: List[Path],
+    units: List[LintUnit],
+    options: LintOptions,
+    jobs: int,
+    costs: Optional[List[float]] = None,
+) -> Iterator[FileOutcome]:
+    """Yield per-file lint results in input order.
+
+    Units are started in decreasing order of costs, if given.
+    """
+    if options.coordinator is not None:
+        tasks = [_unit_task(unit, options) for unit in units]
+        outcomes: Iterator[List[FileOutcome]] = map(
+            partial(_remote_outcomes, options=options),
+            units,
+            options.coordinator.map(tasks, costs),
+        )
+    else:
+        outcomes = run_ordered(partial(_lint_unit, options=options), units, jobs, costs)
+
+    # Units are ordered by their first file, so results can be handed out
+    # in file order as the units complete
+    pending = zip(units, outcomes, strict=True)
+    results: Dict[Path, FileOutcome] = {}
+    for file in files:
+        while file not in results:
+            unit_result = next(pending, None)
+            if unit_result is None:
+                raise RuntimeError(f"No lint unit covers {file}")
+            results.update(zip(unit_result[0].files, unit_result[1], strict=True))
+        yield results.pop(file)
+
+
+def _effective_jobs(jobs: Optional[int], options: LintOptions) -> int:
+    """Return the number of concurrent clang-tidy runs for a lint."""
+    if options.fix and options.export_dir is None:
+        return 1
+    return jobs if jobs is not None else default_jobs()
+
+
+def _apply_fixes(directory: Path, use_color: bool) -> int:
+    """Apply the fixes exported by the lint runs and report the outcome.
+
+    Returns:
+        Number of errors.
+    """
+    fixes = apply_exported_fixes(directory)
+    if fixes.changed_files:
+        print(f"Applied {fixes.applied} fix(es) to {len(fixes.changed_files)} file(s)")
+    for path, count in fixes.conflicts.items():
+        message = f"⚠ Skipped {count} conflicting fix(es) in {path}"
+        print(f"{Colors.YELLOW}{message}{Colors.RESET}" if use_color else message)
+    for path, error in fixes.errors.items():
+        print_file_error(path, "0ms", error, use_color)
+    return len(fixes.errors)
+
+
+def _run_lint(
+    files: List[Path],
+    units: List[LintUnit],
+    options: LintOptions,
+    jobs: Optional[int],
+    use_color: bool,
+    report: Optional[ShardReport],
+) -> Tuple[int, int, int, float]:
+    """Lint the planned units, print the results and apply exported fixes.
+
+    Returns:
+        Tuple of (issues_count, error_count, killed_count, busy_time)
+    """
+    if options.export_dir is not None:
+        options.export_dir.mkdir()
+
+    jobs = _effective_jobs(jobs, options)
+    costs = None
+    if options.timings is not None:
+        costs, unknown = options.timings.costs([unit.source for unit in units])
+        if options.coordinator is None:
+            print_estimate(costs, unknown, jobs, use_color)
+
+    with span("lint", units=len(units), jobs=jobs):
+        issues_count, error_count, killed_count, busy_time = _print_results(
+            files,
+            _lint_all(files, units, options, jobs, costs),
+            options.fix,
+            use_color,
+            report,
+        )
+    if options.export_dir is not None:
+        with span("apply fixes"):
+            error_count += _apply_fixes(options.export_dir, use_color)
+    if options.timings is not None:
+        with span("save timings"):
+            options.timings.save()
+    return issues_count, error_count, killed_count, busy_time
+
+
+def lint_files(  # pylint: disable=too-many-arguments,too-many-locals
+    files: List[Path],
+    fix: bool = False,
+    build_dir: str = "build",
+    jobs: Optional[int] = None,
+    cache: Optional[LintCache] = None,
+    line_ranges: Optional[LineRanges] = None,
+    database: Optional[CompileDatabase] = None,
+    *,
+    report: Optional[ShardReport] = None,
+    coordinator: Optional[Coordinator] = None,
+    limits: Optional[ResourceLimits] = None,
+    profile: str = DEFAULT_PROFILE,
+    extra_args: Sequence[str] = (),
+    record: bool = True,
+) -> int:
     """Lint files with clang-tidy.
 
     Args:
         files: List of files to lint
         fix: If True, apply fixes. If False, check only.
         build_dir: Build directory containing compile_commands.json
+        jobs: Number of parallel clang-tidy processes (default: CPU count).
+            In fix mode the runs export their fixes, which are merged and
+            applied in one pass at the end, since concurrent --fix runs
+            would race on shared headers. Without clang-apply-replacements
+            or PyYAML, fix mode runs sequentially with --fix instead.
+            The slowest translation units, by their run times on earlier
+            runs, are started first.
+        cache: Result cache to consult before running clang-tidy
+        line_ranges: If given, only report diagnostics on these lines
+            (as returned by git_changed_lines)
+        database: Compilation database of the build (default: loaded from
+            build_dir). Files it has no compile command for are skipped.
+        report: Collects the per-file results of a sharded run
+        coordinator: If given, the clang-tidy runs are handed to its
+            workers instead of running locally (check mode only)
+        limits: Time and memory limits of each clang-tidy run. Files whose
+            run is killed are reported as errors of their own kind, and
+            the time they took is still recorded in the run time history.
+        profile: Check profile to run (see CHECK_PROFILES). Runs of other
+            profiles than the default are recorded in the timing history
+            under their own name, so switching profiles is no regression.
+        extra_args: Further clang-tidy options of every run
+        record: Whether to record the run in the timing history and save
+            its run times for scheduling. Runs slowed down by profiling
+            should not be, or they would show up as regressions.
 
     Returns:
         0 if successful, non-zero if linting issues found
@@ -137,71 +661,307 @@ def lint_files(files: List[Path], fix: bool = False, build_dir: str = "build") -
         print("No files to lint")
         return 0
 
-    # Check if compile_commands.json exists
-    compile_db = Path(build_dir) / "compile_commands.json"
-    if not compile_db.exists():
-        # Also check root directory (some generators put it there)
-        root_compile_db = Path("compile_commands.json")
-        if not root_compile_db.exists():
-            print(
-                f"⚠ Skipping clang-tidy: no compile_commands.json found in {build_dir}/ or project root"
-            )
-            print(
-                "  This is expected for Bazel builds on macOS (Hedron has SDK header issues)"
-            )
-            return 0
+    if database is None:
+        database = CompileDatabase.load(build_dir, Path(build_dir) / CACHE_DIR_NAME)
+    if database.path is None:
+        print(
+            f"⚠ Skipping clang-tidy: no compile_commands.json found in {build_dir}/ or project root"
+        )
+        print(
+            "  This is expected for Bazel builds on macOS (Hedron has SDK header issues)"
+        )
+        print(
+            "  Generate one without a build: "
+            "python .scripts/compile_templates.py --build-system compile-db"
+        )
+        return 0
+
+    with span("plan", files=len(files)):
+        files, units = _plan(files, database, cache)
+    if not files:
+        print("No files to lint")
+        return 0
 
     use_color = Colors.supports_color()
-    mode = "Linting and fixing" if fix else "Linting"
 
     # Header
     if use_color:
-        print(f"{Colors.BOLD}{mode} {len(files)} file(s)...{Colors.RESET}")
+        print(f"{Colors.BOLD}{_mode(fix)} {len(files)} file(s)...{Colors.RESET}")
     else:
-        print(f"{mode} {len(files)} file(s)...")
+        print(f"{_mode(fix)} {len(files)} file(s)...")
 
-    issues_count = 0
-    error_count = 0
-    total_time = 0.0
+    timings = TimingDatabase.load(Path(build_dir) / CACHE_DIR_NAME / TIMINGS_NAME)
+    if not record:
+        # Still schedule by the saved run times, but do not update them
+        timings.path = None
+    line_filter = _line_filter(line_ranges)
+    start_time = time.time()
+    with tempfile.TemporaryDirectory(prefix="lint-clang-") as tmp:
+        issues_count, error_count, killed_count, busy_time = _run_lint(
+            files,
+            units,
+            LintOptions(
+                fix,
+                _tidy_build_dir(database, units, Path(tmp) / "db", build_dir),
+                cache,
+                line_filter_args(line_filter) + profile_args(profile) + [*extra_args],
+                Path(tmp) / "fixes" if fix and can_apply_fixes() else None,
+                timings,
+                coordinator,
+                limits,
+                line_filter,
+                profile,
+            ),
+            jobs,
+            use_color,
+            report,
+        )
+
+    wall_time = time.time() - start_time
+    if cache is not None:
+        with span("prune cache"):
+            cache.store.prune()
+    if record:
+        with span("record history"):
+            record_run(
+                history_path(build_dir),
+                TOOL_NAME if profile == DEFAULT_PROFILE else f"{TOOL_NAME} ({profile})",
+                wall_time,
+                len(files),
+                timings.samples,
+            )
 
-    for file in files:
-        has_issues, elapsed, output = lint_single_file(file, fix, build_dir)
-        total_time += elapsed
-        time_str = f"{int(elapsed * 1000)}ms"
+    return _print_summary(
+        wall_time,
+        busy_time,
+        error_count,
+        issues_count,
+        fix,
+        use_color,
+        killed_count,
+    )
 
-        if output and "error:" in output.lower():
-            error_count += 1
-        elif has_issues:
-            issues_count += 1
 
-        _print_file_result(file, time_str, output, has_issues, fix, use_color)
+def merge_results(paths: List[Path]) -> int:
+    """Report the combined results files of a sharded lint run.
 
-    return _print_summary(mode, total_time, error_count, issues_count, fix, use_color)
+    Returns:
+        0 if every shard reported and no file has issues, 1 otherwise.
+    """
+    merged = load_merged(paths, TOOL_NAME)
+    if merged is None:
+        return 1
+
+    use_color = Colors.supports_color()
+    message = (
+        f"{_mode(merged.fix)} {len(merged.files)} file(s) "
+        f"in {merged.shard_count} shard(s)"
+    )
+    print(f"{Colors.BOLD}{message}{Colors.RESET}" if use_color else message)
+
+    issues_count, error_count, killed_count, busy_time = _print_results(
+        [result.path for result in merged.files],
+        iter(
+            (result.has_issues, result.elapsed_ms / 1000, result.output or "")
+            for result in merged.files
+        ),
+        merged.fix,
+        use_color,
+    )
+    exit_code = _print_summary(
+        merged.wall_time,
+        busy_time,
+        error_count,
+        issues_count,
+        merged.fix,
+        use_color,
+        killed_count,
+    )
+    return 1 if print_missing_shards(merged, use_color) else exit_code
+
+
+def profile_checks(
+    files: List[Path],
+    args: argparse.Namespace,
+    database: Optional[CompileDatabase],
+    line_ranges: Optional[LineRanges],
+) -> int:
+    """Lint files with per-check profiling and rank the checks by time.
+
+    The result cache is bypassed, since a cached file would not be
+    profiled. Profiling slows clang-tidy down, so the run is neither
+    recorded in the timing history nor used for scheduling later runs.
+
+    Returns:
+        The exit code of the lint.
+    """
+    with tempfile.TemporaryDirectory(prefix="lint-clang-profile-") as tmp:
+        exit_code = lint_files(
+            files,
+            build_dir=args.build_dir,
+            jobs=args.jobs,
+            line_ranges=line_ranges,
+            database=database,
+            limits=ResourceLimits.from_args(args),
+            profile=args.profile,
+            extra_args=profiling_args(Path(tmp)),
+            record=False,
+        )
+        with span("load check profiles"):
+            times = load_check_times(Path(tmp))
+    print()
+    print_check_times(times, args.slowest)
+    return exit_code
+
+
+def _open_cache(
+    args: argparse.Namespace,
+) -> Tuple[CompileDatabase, Optional[LintCache]]:
+    """Load the compilation database and the result cache (unless disabled)."""
+    database = CompileDatabase.load(
+        args.build_dir, Path(args.build_dir) / CACHE_DIR_NAME
+    )
+    if args.no_cache:
+        return database, None
+    return database, LintCache(
+        Path(args.build_dir) / CACHE_DIR_NAME, args.cache_size * 1024 * 1024, database
+    )
+
+
+def _select_shard(
+    files: List[Path],
+    args: argparse.Namespace,
+    database: Optional[CompileDatabase],
+    cache: Optional[LintCache],
+) -> List[Path]:
+    """Select the files of this shard, keeping each planned unit together.
+
+    A header is linted through a source that includes it; sharding by unit
+    puts both on the same shard, so the header is not planned through
+    another source (or on its own) there.
+    """
+    groups = None
+    if database is not None and database.path is not None:
+        scanner = cache.scanner if cache is not None else IncludeScanner()
+        groups = [unit.files for unit in plan_units(files, database, scanner)]
+    timings = Path(args.build_dir) / CACHE_DIR_NAME / TIMINGS_NAME
+    return select_shard(files, args, timings, groups)
+
+
+def _worker_command(args: argparse.Namespace) -> List[str]:
+    """Return the command starting a local worker with the same settings."""
+    command = [sys.executable, str(Path(__file__).resolve()), "worker"]
+    command += ["-p", args.build_dir, "--cache-size", str(args.cache_size)]
+    command += ResourceLimits.from_args(args).to_args()
+    return command + (["--no-cache"] if args.no_cache else [])
 
 
 def main() -> int:
     """Main entry point."""
-    fix = False
-    staged = False
-    build_dir = "build"
-
-    i = 1
-    while i < len(sys.argv):
-        arg = sys.argv[i]
-        if arg in ["fix", "--fix"]:
-            fix = True
-        elif arg == "--staged":
-            staged = True
-        elif arg in ["-p", "--build-dir"]:
-            if i + 1 < len(sys.argv):
-                build_dir = sys.argv[i + 1]
-                i += 1
-        i += 1
+    parser = argparse.ArgumentParser(description="Lint C++ files with clang-tidy")
+    parser.add_argument(
+        "action",
+        nargs="?",
+        choices=["fix", "merge", "worker", "report", "profile-checks"],
+        help="fix: same as --fix (legacy form); merge: merge sharded --results; "
+        "worker: run clang-tidy for the coordinator at --connect; "
+        "report: summarize the timing history; "
+        "profile-checks: lint without the cache and rank the checks by time",
+    )
+    parser.add_argument("--fix", action="store_true", help="Apply fixes")
+    parser.add_argument(
+        "-p",
+        "--build-dir",
+        default="build",
+        help="Build directory containing compile_commands.json",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Do not use the result cache"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE_MB,
+        metavar="MB",
+        help=f"Result cache size limit (default: {DEFAULT_CACHE_SIZE_MB}MB)",
+    )
+    add_profile_argument(parser)
+    add_shard_arguments(parser)
+    add_git_arguments(parser, changed_lines=True)
+    add_jobs_argument(parser)
+    add_distributed_arguments(parser)
+    add_limit_arguments(parser)
+    add_report_arguments(parser)
+    return run_traced(parser, partial(_run, parser))
+
+
+def _run_worker(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Run clang-tidy for the coordinator at --connect until it stops us."""
+    if args.connect is None:
+        parser.error("the worker action needs --connect ADDR")
+    token = os.environ.get(TOKEN_ENV)
+    if not token:
+        parser.error(f"the worker action needs the shared token in ${TOKEN_ENV}")
+    task = partial(
+        run_task,
+        build_dir=args.build_dir,
+        cache=_open_cache(args)[1],
+        limits=ResourceLimits.from_args(args),
+    )
+    return run_worker(args.connect, TOOL_NAME, token, task)
+
+
+def _run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Run the action selected on the command line."""
+    if is_merge(parser, args):
+        return merge_results(args.results_files)
+    if args.action == "worker":
+        return _run_worker(parser, args)
+    if args.action == "report":
+        return report_history(args, args.build_dir)
+    fix = args.fix or args.action == "fix"
+    distributed = args.listen is not None or args.local_workers > 0
+    if fix and distributed:
+        parser.error("--fix cannot be distributed: workers fix their own checkout")
+    if args.action == "profile-checks" and (fix or distributed):
+        parser.error("profile-checks runs locally, without --fix")
 
     # Find and lint files (excluding tests for clang-tidy)
     directories = ["src", "include"]
-    files = find_cpp_files(directories, staged_only=staged)
-    return lint_files(files, fix=fix, build_dir=build_dir)
+    with span("find files"):
+        files, line_ranges = find_cpp_files_from_args(directories, args)
+
+    with span("load compile database"):
+        database, cache = _open_cache(args) if files else (None, None)
+    if args.shard is not None:
+        with span("select shard"):
+            files = _select_shard(files, args, database, cache)
+    if args.action == "profile-checks":
+        return profile_checks(files, args, database, line_ranges)
+    report = ShardReport(TOOL_NAME, args.shard or (1, 1))
+    start_time = time.time()
+    try:
+        with open_coordinator(args, TOOL_NAME, _worker_command(args)) as coordinator:
+            exit_code = lint_files(
+                files,
+                fix=fix,
+                build_dir=args.build_dir,
+                jobs=args.jobs,
+                cache=cache,
+                line_ranges=line_ranges,
+                database=database,
+                report=report,
+                coordinator=coordinator,
+                limits=ResourceLimits.from_args(args),
+                profile=args.profile,
+            )
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    if args.results is not None:
+        with span("write results"):
+            report.write(args.results, fix, time.time() - start_time)
+    return exit_code
 
 
 if __name__ == "__main__":
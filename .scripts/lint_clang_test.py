@@ -0,0 +1,115 @@
+"""Tests of how lint_clang.py plans clang-tidy runs and hands them to workers."""
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from lint_clang import LintOptions, _plan, _unit_task, run_task
+from pylib.compile_db import CompileDatabase
+from pylib.tidy_units import LintUnit, task_args
+
+
+def test_unit_task_is_relative_to_checkout(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Tasks name the unit's files relative to the coordinator's root."""
+    root = tmp_path.resolve()
+    monkeypatch.chdir(root)
+    unit = LintUnit(root / "src" / "app.cpp", [root / "include" / "app.hpp"])
+
+    task = _unit_task(unit, LintOptions(False, "build", profile="fast"))
+
+    assert task == {
+        "source": "src/app.cpp",
+        "files": ["include/app.hpp"],
+        "line_filter": None,
+        "profile": "fast",
+        "root": str(root),
+    }
+
+
+def test_worker_builds_the_clang_tidy_options(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The worker derives the options from the task's files and settings."""
+    monkeypatch.chdir(tmp_path)
+    task = {
+        "source": "src/app.cpp",
+        "files": ["include/app.hpp"],
+        "line_filter": '[{"name":"src/app.cpp","lines":[[1,2]]}]',
+        "profile": "full",
+    }
+
+    source, args = task_args(task)
+
+    assert source == Path("src/app.cpp")
+    assert args == [
+        r"--header-filter=(^|[/\])(include[/\\]app\.hpp)$",
+        '--line-filter=[{"name":"src/app.cpp","lines":[[1,2]]}]',
+    ]
+
+
+@pytest.mark.parametrize(
+    "task",
+    [
+        {"source": "../outside.cpp"},
+        {"source": "/etc/passwd"},
+        {"source": "src/app.cpp", "files": ["../../secret.hpp"]},
+        {"source": "src/app.cpp", "profile": "--load=/tmp/plugin.so"},
+        {"source": "src/app.cpp", "line_filter": "--export-fixes=/tmp/x"},
+        {"source": ["src/app.cpp"]},
+    ],
+)
+def test_worker_rejects_foreign_tasks(
+    task: Dict[str, Any], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Paths outside the checkout and unknown settings are refused."""
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(ValueError):
+        task_args(task)
+
+
+def test_run_task_resolves_against_worker_checkout(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A worker lints the task's file in its own checkout."""
+    worker_root = tmp_path.resolve() / "worker"
+    worker_root.mkdir()
+    monkeypatch.chdir(worker_root)
+    linted: List[Path] = []
+
+    def fake_lint(file: Path, *_args: Any, **_kwargs: Any) -> Any:
+        linted.append(file)
+        return True, 0.1, f"{worker_root / 'src' / 'app.cpp'}:1:1: warning: x [y]"
+
+    monkeypatch.setattr("lint_clang.lint_single_file_cached", fake_lint)
+    task = {"source": "src/app.cpp", "root": "/coordinator"}
+
+    result = run_task(task, "build", None)
+
+    assert linted == [worker_root / "src" / "app.cpp"]
+    assert result["output"].startswith("/coordinator/src/app.cpp:1:1:")
+
+
+def test_plan_lints_headers_no_source_includes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Orphan headers get a run of their own; uncovered sources are skipped."""
+    root = tmp_path.resolve()
+    monkeypatch.chdir(root)
+    (root / "src").mkdir()
+    (root / "src" / "app.cpp").write_text("int main() {}\n", encoding="utf-8")
+    (root / "src" / "orphan.hpp").write_text("int orphan();\n", encoding="utf-8")
+    (root / "src" / "extra.cpp").write_text("int extra;\n", encoding="utf-8")
+    source = root / "src" / "app.cpp"
+    database = CompileDatabase(
+        root / "compile_commands.json",
+        {str(source): {"directory": str(root), "file": str(source)}},
+    )
+    files = [Path("src/app.cpp"), Path("src/orphan.hpp"), Path("src/extra.cpp")]
+
+    planned, units = _plan(files, database, None)
+
+    assert planned == [Path("src/app.cpp"), Path("src/orphan.hpp")]
+    assert [unit.source for unit in units] == planned
@@ -5,10 +5,16 @@ This script provides a Python interface to PSScriptAnalyzer with consistent
 output formatting and optional auto-fix support.
 """
 
+import atexit
+import json
 import os
+import queue
 import shutil
 import subprocess
 import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
 
 # Add the current directory to sys.path to allow importing pylib
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,6 +22,234 @@ sys.path.insert(0, SCRIPT_DIR)
 
 from pylib.linter import Colors, Linter  # noqa: E402  # pylint: disable=wrong-import-position
 
+# PowerShell worker: imports PSScriptAnalyzer once, then answers one JSON
+# request per stdin line ({"path", "settings", "fix"}) with one JSON
+# response per stdout line ({"path", "diagnostics"} or {"path", "error"}).
+WORKER_SCRIPT = r"""
+$ErrorActionPreference = 'Stop'
+[Console]::InputEncoding = [Text.UTF8Encoding]::new($false)
+[Console]::OutputEncoding = [Text.UTF8Encoding]::new($false)
+function Send($obj) {
+    [Console]::Out.WriteLine((ConvertTo-Json -InputObject $obj -Compress -Depth 4))
+    [Console]::Out.Flush()
+}
+try {
+    Import-Module PSScriptAnalyzer
+    Send @{ ready = $true; version = (Get-Module PSScriptAnalyzer).Version.ToString() }
+} catch {
+    Send @{ ready = $false; error = $_.Exception.Message }
+    exit 1
+}
+while ($null -ne ($line = [Console]::In.ReadLine())) {
+    try {
+        $req = $line | ConvertFrom-Json
+        $params = @{ Path = $req.path; ErrorAction = 'SilentlyContinue' }
+        if ($req.settings) { $params.Settings = $req.settings }
+        if ($req.fix) { Invoke-ScriptAnalyzer @params -Fix | Out-Null }
+        $diags = @(Invoke-ScriptAnalyzer @params | ForEach-Object {
+            @{ line = $_.Line; severity = $_.Severity.ToString();
+               rule = $_.RuleName; message = $_.Message }
+        })
+        Send @{ path = $req.path; diagnostics = $diags }
+    } catch {
+        Send @{ path = $req.path; error = $_.Exception.Message }
+    }
+}
+"""
+
+# Version of the newest installed PSScriptAnalyzer, for when the worker is down
+VERSION_COMMAND = (
+    "(Get-Module PSScriptAnalyzer -ListAvailable | Sort-Object Version "
+    "-Descending | Select-Object -First 1).Version.ToString()"
+)
+
+
+# Seconds the worker may take to load PSScriptAnalyzer, and to answer one
+# request; a worker that misses either deadline is killed
+START_TIMEOUT = 60.0
+REQUEST_TIMEOUT = 120.0
+
+
+def _pump(stream: TextIO, lines: "queue.Queue[Optional[str]]") -> None:
+    """Forward the lines of a stream to a queue, then None at its end."""
+    try:
+        for line in stream:
+            lines.put(line)
+    except (OSError, ValueError):
+        pass
+    lines.put(None)
+
+
+class PwshSession:
+    """Long-lived pwsh process that runs PSScriptAnalyzer requests.
+
+    Starting pwsh and importing PSScriptAnalyzer costs about a second, so a
+    single worker is started per run and fed one file at a time. Its output
+    is read on a background thread, so that a hung worker can be detected
+    (pipes cannot be polled on Windows); it is then killed and restarted.
+    """
+
+    def __init__(self, request_timeout: float = REQUEST_TIMEOUT) -> None:
+        """Initialize a session that has not been started yet.
+
+        Args:
+            request_timeout: Seconds to wait for the result of one file.
+        """
+        self.process: Optional[subprocess.Popen] = None
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.request_timeout = request_timeout
+        self.version = ""
+        self.error = ""
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker process is available for requests."""
+        return self.process is not None
+
+    def start(self) -> bool:
+        """Start the worker and wait until PSScriptAnalyzer is loaded.
+
+        Returns:
+            True if the worker is ready, False otherwise (see self.error).
+        """
+        self.process = subprocess.Popen(  # pylint: disable=consider-using-with
+            [
+                "pwsh",
+                "-NoLogo",
+                "-NoProfile",
+                "-NonInteractive",
+                "-Command",
+                WORKER_SCRIPT,
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        self.lines = queue.Queue()
+        threading.Thread(
+            target=_pump, args=(self.process.stdout, self.lines), daemon=True
+        ).start()
+        try:
+            hello = self._read_message(START_TIMEOUT)
+        except TimeoutError as exc:
+            self.error = str(exc)
+            self.close(kill=True)
+            return False
+        if hello is None or not hello.get("ready"):
+            self.error = hello.get("error", "") if hello else "worker exited"
+            self.close()
+            return False
+
+        self.version = hello.get("version", "")
+        return True
+
+    def analyze(self, path: str, settings: str, fix: bool) -> Optional[Dict[str, Any]]:
+        """Lint (and optionally fix) one file in the worker.
+
+        A worker that does not answer in time is killed and restarted for
+        the next file, and an error response is returned for this one.
+
+        Returns:
+            The worker's response, or None if the worker is gone.
+        """
+        if self.process is None or self.process.stdin is None:
+            return None
+
+        request = {"path": path, "settings": settings, "fix": fix}
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            self.close()
+            return None
+
+        try:
+            response = self._read_message(self.request_timeout)
+        except TimeoutError as exc:
+            self.close(kill=True)
+            self.start()
+            return {"path": path, "error": str(exc)}
+        if response is None:
+            self.close()
+        return response
+
+    def _read_message(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Read the next JSON message, skipping any other worker output.
+
+        Returns:
+            The message, or None if the worker exited.
+
+        Raises:
+            TimeoutError: If no message arrives within timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self.lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise TimeoutError(
+                    f"PSScriptAnalyzer did not answer within {timeout:g}s"
+                ) from None
+            if line is None:
+                return None
+            line = line.strip()
+            if not line.startswith("{"):
+                continue
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+
+    def close(self, kill: bool = False) -> None:
+        """Stop the worker.
+
+        Args:
+            kill: Kill it right away instead of letting it finish first.
+        """
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        if not kill:
+            try:
+                if process.stdin is not None:
+                    process.stdin.close()
+                process.wait(timeout=5)
+                return
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        process.kill()
+        process.wait()
+
+
+def format_diagnostics(diagnostics: List[Dict[str, Any]]) -> str:
+    """Render worker diagnostics as a Line/Severity/RuleName/Message table."""
+    headers = ("Line", "Severity", "RuleName", "Message")
+    rows = [
+        (
+            str(diag.get("line", "")),
+            str(diag.get("severity", "")),
+            str(diag.get("rule", "")),
+            str(diag.get("message", "")),
+        )
+        for diag in diagnostics
+    ]
+    widths = [
+        max([len(header)] + [len(row[i]) for row in rows])
+        for i, header in enumerate(headers[:-1])
+    ]
+
+    def render(cells: tuple) -> str:
+        line, severity, rule, message = cells
+        return (
+            f"{line:>{widths[0]}} {severity:<{widths[1]}} {rule:<{widths[2]}} {message}"
+        ).rstrip()
+
+    lines = [render(headers), render(tuple("-" * len(h) for h in headers))]
+    lines.extend(render(row) for row in rows)
+    return "\n".join(lines)
+
 
 class PwshLinter(Linter):
     """Linter for PowerShell scripts using PSScriptAnalyzer."""
@@ -23,6 +257,7 @@ class PwshLinter(Linter):
     def __init__(self):
         """Initialize the PSScriptAnalyzer linter."""
         super().__init__("PSScriptAnalyzer", "**/*.ps1")
+        self.session = PwshSession()
 
     def check_installed(self) -> None:
         """Verify that PowerShell and PSScriptAnalyzer are installed."""
@@ -35,36 +270,72 @@ class PwshLinter(Linter):
         self._ensure_psscriptanalyzer()
 
     def _ensure_psscriptanalyzer(self) -> None:
-        """Ensure PSScriptAnalyzer module is installed."""
-        check_cmd = "Get-Module -ListAvailable -Name PSScriptAnalyzer"
-        result = subprocess.run(
-            ["pwsh", "-Command", check_cmd],
+        """Start the PSScriptAnalyzer worker, installing the module if needed.
+
+        If the worker cannot be started even after installing, linting falls
+        back to one pwsh process per file.
+        """
+        if self.session.start():
+            atexit.register(self.session.close)
+            return
+
+        print(f"{Colors.YELLOW}Installing PSScriptAnalyzer...{Colors.RESET}")
+        install_cmd = (
+            "Install-Module -Name PSScriptAnalyzer -Force "
+            "-Scope CurrentUser -SkipPublisherCheck -ErrorAction Stop"
+        )
+        install_res = subprocess.run(
+            ["pwsh", "-Command", install_cmd],
             capture_output=True,
             text=True,
             check=False,
         )
+        if install_res.returncode != 0:
+            print(
+                f"{Colors.RED}[FAIL] Failed to install PSScriptAnalyzer: "
+                f"{install_res.stderr}{Colors.RESET}"
+            )
+            sys.exit(2)
+        print(
+            f"{Colors.GREEN}[OK] PSScriptAnalyzer installed successfully{Colors.RESET}"
+        )
 
-        if result.returncode != 0 or not result.stdout.strip():
-            print(f"{Colors.YELLOW}Installing PSScriptAnalyzer...{Colors.RESET}")
-            install_cmd = (
-                "Install-Module -Name PSScriptAnalyzer -Force "
-                "-Scope CurrentUser -SkipPublisherCheck -ErrorAction Stop"
+        if self.session.start():
+            atexit.register(self.session.close)
+        else:
+            print(
+                f"{Colors.YELLOW}Warning: PSScriptAnalyzer worker unavailable "
+                f"({self.session.error}), linting one process per file{Colors.RESET}"
             )
-            install_res = subprocess.run(
-                ["pwsh", "-Command", install_cmd],
+
+    def tool_version(self) -> Optional[str]:
+        """Return the PSScriptAnalyzer module version.
+
+        The worker reports the version it loaded. Without the worker, the
+        newest installed version is queried with a one-off pwsh process;
+        if that fails too, the version is unknown and nothing is cached.
+        """
+        if self.session.version:
+            return self.session.version
+        try:
+            result = subprocess.run(
+                ["pwsh", "-NoProfile", "-NonInteractive", "-Command", VERSION_COMMAND],
                 capture_output=True,
                 text=True,
                 check=False,
             )
-            if install_res.returncode != 0:
-                print(
-                    f"{Colors.RED}[FAIL] Failed to install PSScriptAnalyzer: "
-                    f"{install_res.stderr}{Colors.RESET}"
-                )
-                sys.exit(2)
-            print(
-                f"{Colors.GREEN}[OK] PSScriptAnalyzer installed successfully{Colors.RESET}"
-            )
+        except OSError:
+            return None
+        version = result.stdout.strip()
+        if result.returncode != 0 or not version:
+            return None
+        self.session.version = version
+        return version
+
+    def settings_files(self) -> List[str]:
+        """Return the PSScriptAnalyzer settings file."""
+        root_dir = os.path.dirname(SCRIPT_DIR)
+        return [os.path.join(root_dir, ".PSScriptAnalyzerSettings.psd1")]
 
     def _get_settings_arg(self) -> str:
         """Get the settings file argument if it exists.
@@ -72,8 +343,7 @@ class PwshLinter(Linter):
         Returns:
             Settings argument string or empty string.
         """
-        root_dir = os.path.dirname(SCRIPT_DIR)
-        settings_file = os.path.join(root_dir, ".PSScriptAnalyzerSettings.psd1")
+        settings_file = self.settings_files()[0]
         if os.path.exists(settings_file):
             return f"-Settings '{settings_file}'"
         return ""
@@ -81,6 +351,9 @@ class PwshLinter(Linter):
     def lint_file(self, file_path: str, fix: bool) -> bool:
         """Lint a PowerShell script using PSScriptAnalyzer.
 
+        Uses the persistent worker when it is running, and a one-off pwsh
+        process otherwise (or if the worker dies mid-run).
+
         Args:
             file_path: Path to the PowerShell script to lint.
             fix: Whether to attempt automatic fixes.
@@ -88,6 +361,37 @@ class PwshLinter(Linter):
         Returns:
             True if issues were found, False otherwise.
         """
+        settings_file = self.settings_files()[0]
+        response = self.session.analyze(
+            os.path.abspath(file_path),
+            settings_file if os.path.exists(settings_file) else "",
+            fix,
+        )
+        if response is None:
+            return self._lint_file_oneshot(file_path, fix)
+
+        if response.get("error"):
+            return self.report_tool_error(file_path, response["error"])
+
+        diagnostics = response.get("diagnostics") or []
+        if diagnostics:
+            print(f"{Colors.WHITE}{file_path}{Colors.RESET}")
+            print(format_diagnostics(diagnostics))
+            return True
+
+        print(f"{Colors.GRAY}  OK: {file_path}{Colors.RESET}")
+        return False
+
+    def _lint_file_oneshot(self, file_path: str, fix: bool) -> bool:
+        """Lint a PowerShell script in a dedicated pwsh process.
+
+        Args:
+            file_path: Path to the PowerShell script to lint.
+            fix: Whether to attempt automatic fixes.
+
+        Returns:
+            True if issues were found or pwsh failed, False otherwise.
+        """
         settings_arg = self._get_settings_arg()
 
         if fix:
@@ -109,7 +413,12 @@ class PwshLinter(Linter):
         )
 
         output = result.stdout.strip()
-        if result.returncode == 0 and output:
+        if result.returncode != 0:
+            return self.report_tool_error(
+                file_path,
+                result.stderr.strip() or f"pwsh exited with {result.returncode}",
+            )
+        if output:
             print(f"{Colors.WHITE}{file_path}{Colors.RESET}")
             print(output)
             return True
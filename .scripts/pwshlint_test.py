@@ -0,0 +1,71 @@
+"""Tests of the persistent PSScriptAnalyzer worker session of pwshlint.py."""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from pwshlint import PwshSession
+
+# Stand-in for pwsh running the worker script: answers each request with
+# one diagnostic, and never answers for files whose name contains "hang"
+FAKE_PWSH = """\
+import json, sys, time
+print("WARNING: some banner", flush=True)
+print(json.dumps({"ready": True, "version": "1.2.3"}), flush=True)
+for line in sys.stdin:
+    path = json.loads(line)["path"]
+    if "hang" in path:
+        time.sleep(60)
+    diagnostic = {"line": 1, "severity": "Warning", "rule": "R", "message": path}
+    print(json.dumps({"path": path, "diagnostics": [diagnostic]}), flush=True)
+"""
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="needs a script on PATH"
+)
+
+
+@pytest.fixture(name="session")
+def fixture_session(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[PwshSession]:
+    """A started session of the fake worker, closed after the test."""
+    script = tmp_path / "pwsh"
+    script.write_text(f"#!{sys.executable}\n{FAKE_PWSH}", encoding="utf-8")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    session = PwshSession(request_timeout=0.5)
+    assert session.start()
+    yield session
+    session.close()
+
+
+def test_worker_answers_requests(session: PwshSession) -> None:
+    """Requests are answered in order; non-JSON output is skipped."""
+    assert session.version == "1.2.3"
+    for path in ["a.ps1", "b.ps1"]:
+        response = session.analyze(path, "", False)
+        assert response is not None
+        assert response["diagnostics"][0]["message"] == path
+
+
+def test_hung_worker_is_restarted(session: PwshSession) -> None:
+    """A request without an answer fails, and the next file gets a new worker."""
+    first = session.process
+    start = time.monotonic()
+
+    response = session.analyze("hang.ps1", "", False)
+
+    assert time.monotonic() - start < 5
+    assert response == {
+        "path": "hang.ps1",
+        "error": "PSScriptAnalyzer did not answer within 0.5s",
+    }
+    assert first is not None and first.poll() is not None
+    assert session.running
+    response = session.analyze("next.ps1", "", False)
+    assert response is not None
+    assert response["diagnostics"][0]["message"] == "next.ps1"
@@ -4,9 +4,10 @@ This package provides common abstractions and utilities for building
 consistent file linters.
 """
 
+from .colors import Colors
 from .cpp_files import find_cpp_files
 from .file_finder import find_files
-from .linter import Colors, Linter, fix_windows_console
+from .linter import Linter, fix_windows_console
 from .output import (
     print_error_count,
     print_file_changed,
@@ -0,0 +1,28 @@
+"""Atomic file replacement.
+
+This module rewrites files through a temporary file in the same directory
+followed by a rename, so readers (and an interrupted run) never see a
+partially written file.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+
+def write_atomic(file: Path, content: bytes) -> None:
+    """Replace a file's content atomically, preserving its permissions.
+
+    The file is created (with default permissions) if it does not exist.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=file.parent, prefix=f".{file.name}.")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(content)
+        if file.exists():
+            shutil.copymode(file, tmp_name)
+        os.replace(tmp_name, file)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
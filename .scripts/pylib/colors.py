@@ -0,0 +1,25 @@
+"""ANSI colors of the terminal output of all tools."""
+
+import sys
+
+
+class Colors:
+    """ANSI color codes for terminal output."""
+
+    RESET = "\033[0m"
+    RED = "\033[31m"
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    GRAY = "\033[90m"
+    WHITE = "\033[37m"
+    BOLD = "\033[1m"
+    DIM = "\033[2m"
+
+    @staticmethod
+    def supports_color() -> bool:
+        """Check if the terminal supports colors."""
+        return (
+            hasattr(sys.stdout, "isatty")
+            and sys.stdout.isatty()
+            and sys.platform != "win32"
+        ) or sys.platform == "win32"  # Windows Terminal supports ANSI colors
@@ -0,0 +1,295 @@
+"""Compilation database (compile_commands.json) utilities.
+
+This module loads a compilation database once per run and indexes it by
+resolved source path. Resolving 20k entries costs one stat per path
+component, so the resulting index is also serialized next to the tool's
+other caches and reused for as long as the database file is unchanged
+(same path, size and mtime). For clang-tidy runs that only need a few of
+the entries, a trimmed copy of the database can be written so each
+process parses a small file instead of the whole database.
+
+When no build has produced a database (or the build system cannot, like
+Bazel on macOS), generate_compile_db() derives one from the same settings
+the build templates use, without configuring a build.
+"""
+
+import contextlib
+import json
+import os
+import platform
+import shlex
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .includes import include_dirs_from_args
+
+COMPILE_DB_NAME = "compile_commands.json"
+
+# File name of the serialized index inside the index directory
+INDEX_NAME = "compile_commands.index.json"
+
+# Bumped whenever the index layout changes, invalidating old indexes
+INDEX_VERSION = 1
+
+Entry = Dict[str, Any]
+
+# Compilers that take MSVC-style (cl.exe) options
+MSVC_COMPILERS = ("msvc", "cl", "cl.exe", "clang-cl", "clang-cl.exe")
+
+# Optimization flags per build type, as set in templates/CMakeLists.txt.j2
+BUILD_TYPE_FLAGS = {
+    "Debug": ["-g", "-O0"],
+    "Release": ["-O3", "-DNDEBUG"],
+}
+MSVC_BUILD_TYPE_FLAGS = {
+    "Debug": ["/Od", "/Zi"],
+    "Release": ["/O2", "/DNDEBUG"],
+}
+
+
+def find_compile_db(build_dir: str) -> Optional[Path]:
+    """Locate compile_commands.json in the build directory or project root.
+
+    Returns:
+        Path to the database, or None if neither location has one.
+    """
+    for path in (Path(build_dir) / COMPILE_DB_NAME, Path(COMPILE_DB_NAME)):
+        if path.is_file():
+            return path
+    return None
+
+
+def _absolute_entry(entry: Entry) -> Entry:
+    """Return a copy of an entry with an absolute working directory."""
+    result = dict(entry)
+    result["directory"] = str(Path(entry.get("directory", ".")).resolve())
+    return result
+
+
+def _index_entries(entries: Any) -> Dict[str, Entry]:
+    """Key database entries by the resolved path of their source file."""
+    indexed: Dict[str, Entry] = {}
+    if not isinstance(entries, list):
+        return indexed
+    for entry in entries:
+        if not isinstance(entry, dict) or "file" not in entry:
+            continue
+        entry = _absolute_entry(entry)
+        source = Path(entry["directory"]) / entry["file"]
+        # The first entry wins, as in clang's own lookup
+        indexed.setdefault(str(source.resolve()), entry)
+    return indexed
+
+
+class CompileDatabase:
+    """Compilation database entries keyed by resolved source file path.
+
+    Entries are stored with an absolute "directory", so they stay valid
+    when written to a different location by write_subset().
+    """
+
+    def __init__(self, path: Optional[Path], entries: Dict[str, Entry]):
+        """Initialize from already indexed entries.
+
+        Args:
+            path: The database file the entries come from, if any.
+            entries: Entries keyed by resolved source path.
+        """
+        self.path = path
+        self.entries = entries
+
+    @classmethod
+    def load(
+        cls, build_dir: str, index_dir: Optional[Path] = None
+    ) -> "CompileDatabase":
+        """Load the database of a build directory, reusing a saved index.
+
+        Args:
+            build_dir: Build directory to look for compile_commands.json in
+                (the project root is checked as well).
+            index_dir: Directory to keep the serialized index in. Without
+                it, the database is always parsed and indexed from scratch.
+
+        Returns:
+            The database; empty if none exists or it cannot be parsed.
+        """
+        path = find_compile_db(build_dir)
+        if path is None:
+            return cls(None, {})
+
+        try:
+            stat = path.stat()
+        except OSError:
+            return cls(None, {})
+        stamp = {
+            "version": INDEX_VERSION,
+            "source": str(path.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+        index_path = index_dir / INDEX_NAME if index_dir is not None else None
+        if index_path is not None:
+            try:
+                saved = json.loads(index_path.read_text(encoding="utf-8"))
+                if isinstance(saved, dict) and saved.get("stamp") == stamp:
+                    return cls(path, saved["entries"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        try:
+            entries = _index_entries(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            return cls(path, {})
+
+        if index_path is not None:
+            with contextlib.suppress(OSError):
+                _write_json_atomic(index_path, {"stamp": stamp, "entries": entries})
+        return cls(path, entries)
+
+    def __len__(self) -> int:
+        """Return the number of indexed source files."""
+        return len(self.entries)
+
+    def __contains__(self, file: object) -> bool:
+        """Check whether the database has a compile command for a file."""
+        return isinstance(file, Path) and str(file.resolve()) in self.entries
+
+    def get(self, file: Path) -> Optional[Entry]:
+        """Return the entry for a file, or None if the database lacks one."""
+        return self.entries.get(str(file.resolve()))
+
+    def sources(self) -> List[Path]:
+        """Return the resolved paths of all source files in the database."""
+        return [Path(name) for name in self.entries]
+
+    def include_dirs(self, file: Path) -> List[Path]:
+        """Return the include directories of a file's compile command."""
+        entry = self.get(file)
+        if entry is None:
+            return []
+        arguments = entry.get("arguments") or shlex.split(entry.get("command", ""))
+        return include_dirs_from_args(arguments, Path(entry["directory"]))
+
+    def write_subset(self, files: Iterable[Path], directory: Path) -> Path:
+        """Write a database holding only the entries of the given files.
+
+        Args:
+            files: Files whose entries to keep; unknown files are skipped.
+            directory: Directory to write compile_commands.json into.
+
+        Returns:
+            The directory, ready to be passed to clang-tidy -p.
+
+        Raises:
+            OSError: If the database cannot be written.
+        """
+        entries = [entry for entry in map(self.get, files) if entry is not None]
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_json_atomic(directory / COMPILE_DB_NAME, entries)
+        return directory
+
+
+def compiler_arguments(
+    compiler: str, build_type: str = "Release", target_arch: str = ""
+) -> List[str]:
+    """Return the compiler and flags the CMake template would use.
+
+    Args:
+        compiler: Compiler from the template context (e.g. "clang++", "msvc").
+        build_type: "Debug" or "Release".
+        target_arch: "x86_64", "aarch64" or "" for the host architecture.
+
+    Returns:
+        Compiler command and options, without include paths or sources.
+    """
+    if compiler.lower() in MSVC_COMPILERS:
+        driver = "cl.exe" if compiler.lower() == "msvc" else compiler
+        return [driver, "/nologo", "/std:c++20", "/EHsc", "/W4"] + (
+            MSVC_BUILD_TYPE_FLAGS.get(build_type, MSVC_BUILD_TYPE_FLAGS["Release"])
+        )
+
+    args = [compiler, "-std=c++20", "-Wall", "-Wextra", "-Wpedantic"]
+    args.extend(BUILD_TYPE_FLAGS.get(build_type, BUILD_TYPE_FLAGS["Release"]))
+    if platform.system() == "Darwin":
+        if "clang" in compiler:
+            args.append("-stdlib=libc++")
+        if target_arch:
+            args.extend(["-arch", "arm64" if target_arch == "aarch64" else target_arch])
+    elif target_arch == "x86_64":
+        args.append("-m64")
+    elif target_arch == "aarch64":
+        args.append("--target=aarch64-linux-gnu")
+    return args
+
+
+def generate_compile_db(
+    project_root: Path,
+    compiler: str,
+    build_type: str = "Release",
+    target_arch: str = "",
+    source_dirs: Iterable[str] = ("src", "tests"),
+    include_dirs: Iterable[str] = ("include",),
+) -> List[Entry]:
+    """Build compile_commands.json entries for the project's sources.
+
+    Every .cpp file under the source directories gets the same flags and
+    include directories, which matches how the build templates compile the
+    project.
+
+    Args:
+        project_root: Project root; sources and includes are relative to it.
+        compiler: Compiler from the template context.
+        build_type: "Debug" or "Release".
+        target_arch: Target architecture, or "" for the host.
+        source_dirs: Directories to collect .cpp files from.
+        include_dirs: Include directories passed to every compile command.
+
+    Returns:
+        Database entries, sorted by source file.
+    """
+    root = project_root.resolve()
+    msvc = compiler.lower() in MSVC_COMPILERS
+    base = compiler_arguments(compiler, build_type, target_arch)
+    base.extend(f"{'/I' if msvc else '-I'}{directory}" for directory in include_dirs)
+    base.append("/c" if msvc else "-c")
+
+    sources = sorted(
+        path.relative_to(root).as_posix()
+        for directory in source_dirs
+        for path in (root / directory).rglob("*.cpp")
+        if path.is_file()
+    )
+    return [
+        {
+            "directory": str(root),
+            "file": source,
+            "arguments": base + [source],
+        }
+        for source in sources
+    ]
+
+
+def write_compile_db(entries: List[Entry], build_dir: Path) -> Path:
+    """Write database entries to compile_commands.json in build_dir.
+
+    Raises:
+        OSError: If the database cannot be written.
+    """
+    path = build_dir / COMPILE_DB_NAME
+    _write_json_atomic(path, entries)
+    return path
+
+
+def _write_json_atomic(path: Path, value: Any) -> None:
+    """Write JSON to a file, replacing any previous content atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            json.dump(value, tmp)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
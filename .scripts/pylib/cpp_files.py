@@ -4,55 +4,98 @@ This module provides functions to find C++ source files for formatting
 and linting operations.
 """
 
-import subprocess
+import argparse
 import sys
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
+from .git_files import (
+    LineRanges,
+    git_changed_files,
+    git_ls_files,
+    restrict_to_changed_lines,
+)
 
-def find_cpp_files(directories: List[str], staged_only: bool = False) -> List[Path]:
+CPP_EXTENSIONS = (".cpp", ".hpp", ".h")
+
+
+def find_cpp_files(
+    directories: List[str],
+    staged_only: bool = False,
+    use_git: bool = False,
+    include_untracked: bool = False,
+    since: Optional[str] = None,
+) -> List[Path]:
     """Find all C++ source files in the specified directories.
 
     Args:
         directories: List of directory names to search (e.g., ["src", "include"]).
-        staged_only: If True, only return staged files from git.
+        staged_only: If True, only return files staged in git.
+        use_git: List files from the git index instead of walking the
+            directories. Falls back to walking outside a git work tree.
+        include_untracked: With use_git, also include untracked files that
+            are not ignored by .gitignore.
+        since: Only return files changed since the merge base of this git
+            ref and HEAD (e.g. "origin/main").
 
     Returns:
         Sorted list of Path objects for matching files.
     """
     files: List[Path] = []
 
-    if staged_only:
-        files = _get_staged_cpp_files()
+    if staged_only or since:
+        listed = git_changed_files(staged=staged_only, since=since)
+        if listed is None:
+            print("Warning: Could not get changed files from git", file=sys.stderr)
+            return []
+    else:
+        listed = git_ls_files(include_untracked) if use_git else None
+
+    if listed is not None:
+        roots = [Path(directory) for directory in directories]
+        for path_str in listed:
+            path = Path(path_str)
+            if (
+                path.suffix in CPP_EXTENSIONS
+                and any(root in path.parents for root in roots)
+                and path.exists()
+            ):
+                files.append(path)
     else:
         for directory in directories:
             dir_path = Path(directory)
             if dir_path.exists():
-                for ext in ["*.cpp", "*.hpp", "*.h"]:
-                    files.extend(dir_path.rglob(ext))
+                # One walk per directory, filtering extensions in memory
+                files.extend(
+                    path
+                    for path in dir_path.rglob("*")
+                    if path.suffix in CPP_EXTENSIONS
+                )
 
     return sorted(files)
 
 
-def _get_staged_cpp_files() -> List[Path]:
-    """Get staged C++ files from git.
+def find_cpp_files_from_args(
+    directories: List[str], args: argparse.Namespace
+) -> Tuple[List[Path], Optional[LineRanges]]:
+    """Find C++ files as selected by the add_git_arguments() options.
+
+    Args:
+        directories: List of directory names to search.
+        args: Parsed arguments of a parser set up with add_git_arguments().
 
     Returns:
-        List of Path objects for staged C++ files.
+        Tuple of (files, line ranges). The line ranges are None unless
+        --changed-lines was given, in which case only files with changed
+        lines are returned.
     """
-    files: List[Path] = []
-    try:
-        result = subprocess.run(
-            ["git", "status", "--porcelain", "--cached"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        for line in result.stdout.splitlines():
-            if line and any(line.endswith(ext) for ext in [".cpp", ".hpp", ".h"]):
-                filepath = Path(line[3:].strip())
-                if filepath.exists():
-                    files.append(filepath)
-    except subprocess.CalledProcessError:
-        print("Warning: Could not get staged files from git", file=sys.stderr)
-    return files
+    files = find_cpp_files(
+        directories,
+        staged_only=args.staged,
+        use_git=args.git,
+        include_untracked=args.untracked,
+        since=args.since,
+    )
+    if not getattr(args, "changed_lines", False):
+        return files, None
+    return restrict_to_changed_lines(files, staged=args.staged, since=args.since)
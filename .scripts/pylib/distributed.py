@@ -0,0 +1,600 @@
+"""Distributing tool runs to worker processes over sockets.
+
+A Coordinator listens on a TCP ("host:port") or Unix ("unix:/path")
+socket. Workers, on the same machine or on other hosts and containers
+with a checkout of the same tree, connect to it and pull tasks one at a
+time, so faster workers simply take more of them. Messages are JSON
+objects, one per line:
+
+    coordinator -> worker   {"type": "challenge", "nonce": ...}
+    worker -> coordinator   {"type": "hello", "tool": ..., "worker": ...,
+                             "auth": ...}
+    coordinator -> worker   {"type": "task", "id": [run, index], "task": {...}}
+    worker -> coordinator   {"type": "result", "id": [run, index], "result": {...}}
+    coordinator -> worker   {"type": "stop"}
+
+Tasks are handed out in decreasing order of expected cost. Once no task
+is left to hand out, idle workers take over a copy of the oldest task
+still running on a single worker, and the first result wins, so one slow
+or stuck machine cannot hold up the end of the run. A task whose worker
+disconnects is handed out again. So is a task whose worker does not
+answer within the task timeout, but that worker stays connected: its late
+result still counts if it comes first, and it takes new tasks afterwards.
+
+Workers prove that they know the token shared with the coordinator (taken
+from $LINT_WORKER_TOKEN) by answering the challenge with an HMAC of its
+nonce, so a host that can merely reach the coordinator cannot register as
+a worker and report made-up results. The token itself is never sent.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import heapq
+import hmac
+import json
+import os
+import secrets
+import select
+import socket
+import subprocess
+import threading
+import time
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .tracing import span
+
+Message = Dict[str, Any]
+
+# How long map() waits for a first worker before giving up
+DEFAULT_CONNECT_TIMEOUT = 60.0
+
+# Environment variable holding the token shared by coordinator and workers
+TOKEN_ENV = "LINT_WORKER_TOKEN"
+
+
+def parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """Parse "host:port" or "unix:/path" into a socket family and address.
+
+    Raises:
+        ValueError: If the address is malformed or Unix sockets are not
+            supported on this platform.
+    """
+    if address.startswith("unix:"):
+        family = getattr(socket, "AF_UNIX", None)
+        if family is None:
+            raise ValueError("Unix sockets are not supported on this platform")
+        return family, address[len("unix:") :]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"expected HOST:PORT or unix:PATH, got {address!r}")
+    return socket.AF_INET6 if ":" in host else socket.AF_INET, (
+        host.strip("[]"),
+        int(port),
+    )
+
+
+def _format_address(family: int, address: Any) -> str:
+    """Format a bound socket address the way parse_address() accepts it."""
+    if family == getattr(socket, "AF_UNIX", None):
+        return f"unix:{address}"
+    host, port = address[:2]
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def _send(stream: BinaryIO, message: Message) -> None:
+    """Write one message."""
+    stream.write(json.dumps(message).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def _auth(token: str, nonce: str) -> str:
+    """Return a worker's answer to the coordinator's challenge."""
+    return hmac.new(
+        token.encode("utf-8"), nonce.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def _receive(stream: BinaryIO) -> Optional[Message]:
+    """Read one message, or None if the peer closed the connection."""
+    line = stream.readline()
+    if not line:
+        return None
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("malformed message")
+    return message
+
+
+class _TaskQueue:  # pylint: disable=too-many-instance-attributes
+    """Tasks of the current run and their state, shared by worker threads."""
+
+    def __init__(self) -> None:
+        """Initialize an empty queue."""
+        self.cond = threading.Condition()
+        self.closed = False
+        # Incremented by every run, so late results of a previous run are
+        # not mistaken for results of the current one
+        self.run = 0
+        self.tasks: List[Message] = []
+        self.pending: List[Tuple[float, int]] = []
+        # Index -> (start time, number of workers running it)
+        self.running: Dict[int, Tuple[float, int]] = {}
+        self.results: Dict[int, Message] = {}
+        # Number of connected workers
+        self.workers = 0
+
+    def reset(self, tasks: List[Message]) -> None:
+        """Start a new run with tasks carrying a "cost" field."""
+        with self.cond:
+            self.run += 1
+            self.tasks = tasks
+            self.pending = [(-task["cost"], index) for index, task in enumerate(tasks)]
+            heapq.heapify(self.pending)
+            self.running = {}
+            self.results = {}
+            self.cond.notify_all()
+
+    def take(self) -> Optional[Tuple[int, int]]:
+        """Block until there is a task for an idle worker.
+
+        Returns:
+            (run, index) of the task, or None once the queue is closed.
+        """
+        with self.cond:
+            while not self.closed:
+                while self.pending:
+                    _, index = heapq.heappop(self.pending)
+                    if index in self.results:
+                        continue
+                    _, runners = self.running.get(index, (0.0, 0))
+                    self.running[index] = (time.monotonic(), runners + 1)
+                    return self.run, index
+                # Nothing left to hand out: back up the oldest lone task
+                lone = [
+                    (start, index)
+                    for index, (start, runners) in self.running.items()
+                    if runners == 1
+                ]
+                if lone:
+                    start, index = min(lone)
+                    self.running[index] = (start, 2)
+                    return self.run, index
+                self.cond.wait()
+            return None
+
+    def finish(self, run: int, index: int, result: Optional[Message]) -> None:
+        """Record a task's result, or hand the task out again if None."""
+        with self.cond:
+            if run != self.run or index in self.results:
+                return
+            start, runners = self.running.pop(index, (0.0, 1))
+            if result is not None:
+                self.results[index] = result
+            elif runners > 1:
+                self.running[index] = (start, runners - 1)
+            else:
+                self._push(index)
+            self.cond.notify_all()
+
+    def retry(self, run: int, index: int) -> None:
+        """Hand out a task again while its worker keeps running it."""
+        with self.cond:
+            if run == self.run and index not in self.results:
+                self._push(index)
+                self.cond.notify_all()
+
+    def _push(self, index: int) -> None:
+        """Queue a task to be handed out, unless it already is."""
+        if all(queued != index for _, queued in self.pending):
+            heapq.heappush(self.pending, (-self.tasks[index]["cost"], index))
+
+    def close(self) -> None:
+        """Wake up idle workers so that they stop."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class Coordinator:
+    """Hands tasks to connected workers and collects their results.
+
+    The coordinator starts listening when created and serves workers on
+    background threads until close() is called. It is a context manager.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        tool: str,
+        token: str,
+        task_timeout: Optional[float] = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    ):
+        """Start listening for workers.
+
+        Args:
+            address: "host:port" or "unix:/path" to listen on. Port 0 picks
+                a free port; the actual address is in self.address.
+            tool: Tool name workers must announce, so a worker of another
+                tool is turned away.
+            token: Secret shared with the workers; workers that cannot
+                prove they know it are turned away.
+            task_timeout: Seconds a worker may take for one task before the
+                task is handed out again; the worker may still answer.
+            connect_timeout: Seconds map() waits while no worker is
+                connected before failing.
+
+        Raises:
+            OSError: If the address cannot be listened on.
+            ValueError: If the address is malformed.
+        """
+        if not token:
+            raise ValueError("the coordinator needs a worker token")
+        family, bind_address = parse_address(address)
+        self.tool = tool
+        self._token = token
+        self.task_timeout = task_timeout
+        self.connect_timeout = connect_timeout
+        self._listener = socket.socket(family, socket.SOCK_STREAM)
+        if family != getattr(socket, "AF_UNIX", None):
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(bind_address)
+        self._listener.listen()
+
+        self._queue = _TaskQueue()
+        self._threads: List[threading.Thread] = []
+        self._start(self._accept)
+
+    @property
+    def address(self) -> str:
+        """The address workers connect to."""
+        return _format_address(self._listener.family, self._listener.getsockname())
+
+    def __enter__(self) -> "Coordinator":
+        """Return the coordinator itself."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the coordinator."""
+        self.close()
+
+    def _start(self, target: Callable[..., None], *args: Any) -> None:
+        """Run target on a new background thread."""
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _accept(self) -> None:
+        """Accept worker connections until the listener is closed."""
+        while True:
+            try:
+                connection, _ = self._listener.accept()
+            except OSError:
+                return
+            self._start(self._serve, connection)
+
+    def _handshake(self, stream: BinaryIO) -> bool:
+        """Challenge a new worker and check its hello message."""
+        nonce = secrets.token_hex(16)
+        _send(stream, {"type": "challenge", "nonce": nonce})
+        hello = _receive(stream)
+        if hello is None or hello.get("type") != "hello":
+            return False
+        if not hmac.compare_digest(
+            str(hello.get("auth", "")), _auth(self._token, nonce)
+        ):
+            _send(stream, {"type": "stop", "reason": "authentication failed"})
+            return False
+        if hello.get("tool") != self.tool:
+            _send(stream, {"type": "stop", "reason": f"expected {self.tool}"})
+            return False
+        # Names the worker's timeline in traces
+        threading.current_thread().name = f"worker {hello.get('worker', '?')}"
+        return True
+
+    def _serve(self, connection: socket.socket) -> None:
+        """Register a new worker and feed it tasks."""
+        connection.settimeout(self.connect_timeout)
+        with connection, connection.makefile("rwb") as stream:
+            try:
+                if not self._handshake(stream):
+                    return
+            except (OSError, ValueError):
+                return
+            with self._queue.cond:
+                self._queue.workers += 1
+                self._queue.cond.notify_all()
+            try:
+                self._feed(connection, stream)
+            finally:
+                with self._queue.cond:
+                    self._queue.workers -= 1
+                    self._queue.cond.notify_all()
+
+    def _feed(self, connection: socket.socket, stream: BinaryIO) -> None:
+        """Send tasks to a worker until it fails or the coordinator closes."""
+        task: Optional[Tuple[int, int]] = None
+        try:
+            while True:
+                connection.settimeout(None)
+                task = self._queue.take()
+                if task is None:
+                    _send(stream, {"type": "stop"})
+                    return
+                run, index = task
+                with span("remote task", "remote", run=run, index=index):
+                    _send(
+                        stream,
+                        {
+                            "type": "task",
+                            "id": [run, index],
+                            "task": self._queue.tasks[index],
+                        },
+                    )
+                    reply = self._reply(connection, stream, run, index)
+                if reply is None or reply.get("id") != [run, index]:
+                    raise ConnectionError("worker disconnected")
+                self._queue.finish(run, index, reply.get("result") or {})
+                task = None
+        except (OSError, ValueError):
+            if task is not None:
+                self._queue.finish(*task, None)
+
+    def _reply(
+        self, connection: socket.socket, stream: BinaryIO, run: int, index: int
+    ) -> Optional[Message]:
+        """Wait for a worker's answer to a task.
+
+        Once the task timeout is over, the task is handed out again, but the
+        worker is kept: it may still answer first, and a busy worker is not
+        a dead one. A worker that is really gone is noticed when its
+        connection drops.
+        """
+        if self.task_timeout is not None:
+            # Wait on the socket rather than with a socket timeout, which
+            # would leave the buffered stream in an undefined state
+            readable, _, _ = select.select([connection], [], [], self.task_timeout)
+            if not readable:
+                self._queue.retry(run, index)
+        return _receive(stream)
+
+    def map(
+        self, tasks: Sequence[Message], costs: Optional[Sequence[float]] = None
+    ) -> Iterator[Message]:
+        """Run tasks on the workers, yielding their results in input order.
+
+        Args:
+            tasks: JSON-serializable task descriptions for the workers.
+            costs: Expected cost of each task; the most expensive tasks are
+                handed out first.
+
+        Raises:
+            RuntimeError: If no worker is connected for connect_timeout
+                seconds while tasks are outstanding.
+        """
+        queue = self._queue
+        queue.reset(
+            [
+                dict(task, cost=costs[index] if costs is not None else 0.0)
+                for index, task in enumerate(tasks)
+            ]
+        )
+
+        idle_since = time.monotonic()
+        for index in range(len(tasks)):
+            with queue.cond:
+                while index not in queue.results:
+                    if queue.workers:
+                        idle_since = time.monotonic()
+                    elif time.monotonic() - idle_since > self.connect_timeout:
+                        raise RuntimeError(f"No workers connected to {self.address}")
+                    queue.cond.wait(timeout=1.0)
+                result = queue.results[index]
+            yield result
+
+    def close(self, timeout: float = 1) -> None:
+        """Stop idle workers and the listener.
+
+        Workers still running a task (a backup copy, or a hung run) are
+        stopped once they finish it, or see the connection drop when this
+        process exits; close() only waits up to timeout seconds for them.
+        """
+        if self._queue.closed:
+            return
+        family, address = parse_address(self.address)
+        self._queue.close()
+        # Closing alone does not wake up a thread blocked in accept()
+        with contextlib.suppress(OSError):
+            self._listener.shutdown(socket.SHUT_RDWR)
+        self._listener.close()
+        if family == getattr(socket, "AF_UNIX", None):
+            with contextlib.suppress(OSError):
+                os.unlink(address)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+
+def run_worker(
+    address: str, tool: str, token: str, handler: Callable[[Message], Message]
+) -> int:
+    """Connect to a coordinator and run its tasks until told to stop.
+
+    Args:
+        address: Coordinator address, as given to Coordinator.
+        tool: Tool name announced to the coordinator.
+        token: Secret shared with the coordinator.
+        handler: Runs one task and returns its JSON-serializable result.
+            Exceptions are reported as {"error": message} results.
+
+    Returns:
+        0 when stopped by the coordinator, 1 if the connection failed or
+        the coordinator turned the worker away.
+    """
+    family, connect_address = parse_address(address)
+    try:
+        with socket.socket(family, socket.SOCK_STREAM) as connection:
+            connection.connect(connect_address)
+            with connection.makefile("rwb") as stream:
+                challenge = _receive(stream)
+                if challenge is None or challenge.get("type") != "challenge":
+                    raise ValueError("expected a challenge from the coordinator")
+                _send(
+                    stream,
+                    {
+                        "type": "hello",
+                        "tool": tool,
+                        "worker": f"{socket.gethostname()}:{os.getpid()}",
+                        "auth": _auth(token, str(challenge.get("nonce", ""))),
+                    },
+                )
+                while True:
+                    message = _receive(stream)
+                    if message is None or message.get("type") != "task":
+                        return _stopped(message)
+                    try:
+                        result = handler(message["task"])
+                    except Exception as exc:  # pylint: disable=broad-exception-caught
+                        result = {"error": str(exc) or type(exc).__name__}
+                    _send(
+                        stream,
+                        {"type": "result", "id": message["id"], "result": result},
+                    )
+    except (OSError, ValueError) as exc:
+        print(f"Worker error: {exc}")
+        return 1
+
+
+def _stopped(message: Optional[Message]) -> int:
+    """Return the exit code of a worker that got a message other than a task."""
+    if message is None:
+        print("Worker error: the coordinator closed the connection")
+        return 1
+    if "reason" in message:
+        print(f"Worker stopped: {message['reason']}")
+        return 1
+    return 0
+
+
+def start_local_workers(
+    command: List[str], count: int, token: str
+) -> List[subprocess.Popen]:
+    """Start worker processes on this machine.
+
+    Args:
+        command: Command running one worker connected to the coordinator.
+        count: Number of workers.
+        token: Token shared with the coordinator, passed in $LINT_WORKER_TOKEN.
+    """
+    env = dict(os.environ, **{TOKEN_ENV: token})
+    return [
+        subprocess.Popen(command, stdout=subprocess.DEVNULL, env=env)
+        for _ in range(count)
+    ]
+
+
+def stop_local_workers(processes: List[subprocess.Popen], timeout: float = 2) -> None:
+    """Wait for local workers to exit after close(), terminating stragglers.
+
+    Once all results are in, a worker still busy has nothing left to
+    contribute, so it is not waited for long.
+    """
+    deadline = time.monotonic() + timeout
+    for process in processes:
+        try:
+            process.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            process.terminate()
+            process.wait()
+
+
+def add_distributed_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options of distributed runs to a parser.
+
+    The worker side also needs a "worker" choice in the tool's action
+    argument.
+    """
+    group = parser.add_argument_group("distributed runs")
+    group.add_argument(
+        "--listen",
+        metavar="ADDR",
+        help="Hand the work to workers connecting to HOST:PORT or unix:PATH; "
+        f"the workers must share the token in ${TOKEN_ENV}",
+    )
+    group.add_argument(
+        "--local-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Start N workers on this machine (listens on a free local port "
+        "unless --listen is given)",
+    )
+    group.add_argument(
+        "--task-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Hand a task to another worker if it takes longer than this",
+    )
+    group.add_argument(
+        "--connect",
+        metavar="ADDR",
+        help=f"With the worker action: address of the coordinator, whose "
+        f"token is read from ${TOKEN_ENV}",
+    )
+
+
+@contextlib.contextmanager
+def open_coordinator(
+    args: argparse.Namespace, tool: str, worker_command: List[str]
+) -> Iterator[Optional[Coordinator]]:
+    """Set up a coordinator and local workers as requested by args.
+
+    Args:
+        args: Parsed options from add_distributed_arguments().
+        tool: Tool name workers announce.
+        worker_command: Command starting a local worker, to which
+            "--connect ADDR" is appended.
+
+    Yields:
+        The coordinator, or None if the run is not distributed.
+
+    Raises:
+        ValueError: If --listen is given without a token in $LINT_WORKER_TOKEN.
+            Runs with local workers only make up a token of their own.
+    """
+    if args.listen is None and args.local_workers <= 0:
+        yield None
+        return
+
+    token = os.environ.get(TOKEN_ENV)
+    if not token:
+        if args.listen is not None:
+            raise ValueError(
+                f"--listen needs the workers' shared token in ${TOKEN_ENV}"
+            )
+        token = secrets.token_hex(32)
+    with Coordinator(
+        args.listen or "127.0.0.1:0", tool, token, args.task_timeout
+    ) as coordinator:
+        workers = start_local_workers(
+            worker_command + ["--connect", coordinator.address],
+            args.local_workers,
+            token,
+        )
+        try:
+            yield coordinator
+        finally:
+            coordinator.close()
+            stop_local_workers(workers)
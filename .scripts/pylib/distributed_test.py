@@ -0,0 +1,156 @@
+"""Tests of distributed runs with a coordinator and two local workers.
+
+The workers are real processes connected over TCP, running a handler that
+doubles a value. Tasks can ask the handler to hang on their first attempt,
+which is how a killed worker and a straggler are simulated.
+"""
+
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+
+from .distributed import (
+    TOKEN_ENV,
+    Coordinator,
+    start_local_workers,
+    stop_local_workers,
+)
+
+TOOL = "distributed-test"
+
+TOKEN = "test-token"
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+# A task with "hang_once" hangs the first worker to take it; the marker
+# file it writes holds that worker's PID
+WORKER_SOURCE = f"""
+import os, sys, time
+sys.path.insert(0, {str(SCRIPTS_DIR)!r})
+from pylib.distributed import run_worker
+
+def handle(task):
+    marker = task.get("hang_once")
+    if marker and not os.path.exists(marker):
+        with open(marker, "w", encoding="utf-8") as handle:
+            handle.write(str(os.getpid()))
+        time.sleep(60)
+    time.sleep(task.get("sleep", 0))
+    return {{"value": task["value"] * 2, "worker": os.getpid()}}
+
+sys.exit(run_worker(sys.argv[1], {TOOL!r}, os.environ[{TOKEN_ENV!r}], handle))
+"""
+
+Workers = Tuple[Coordinator, List[subprocess.Popen]]
+
+
+@pytest.fixture(name="workers")
+def fixture_workers() -> Iterator[Workers]:
+    """A coordinator on a free local port with two local workers."""
+    with Coordinator("127.0.0.1:0", TOOL, TOKEN, connect_timeout=10) as coordinator:
+        processes = start_local_workers(_worker_command(coordinator), 2, TOKEN)
+        try:
+            yield coordinator, processes
+        finally:
+            coordinator.close()
+            stop_local_workers(processes)
+
+
+def _worker_command(coordinator: Coordinator) -> List[str]:
+    """Command running a test worker connected to the coordinator."""
+    return [sys.executable, "-c", WORKER_SOURCE, coordinator.address]
+
+
+def _wait_for(path: Path, timeout: float = 10) -> None:
+    """Wait until a file exists."""
+    deadline = time.monotonic() + timeout
+    while not path.exists():
+        assert time.monotonic() < deadline, f"{path} was not written"
+        time.sleep(0.05)
+
+
+def test_dispatch(workers: Workers) -> None:
+    """Results come back in input order, from both workers."""
+    coordinator, processes = workers
+    tasks = [{"value": index, "sleep": 0.1} for index in range(8)]
+
+    results: List[Dict[str, Any]] = list(coordinator.map(tasks))
+
+    assert [result["value"] for result in results] == [i * 2 for i in range(8)]
+    assert {result["worker"] for result in results} == {p.pid for p in processes}
+
+
+def test_killed_worker(workers: Workers, tmp_path: Path) -> None:
+    """The task of a worker killed mid-task is handed out again."""
+    coordinator, processes = workers
+    marker = tmp_path / "hung"
+    # The more expensive task goes out first; the other one keeps the
+    # second worker busy until the first one is killed
+    tasks = [{"value": 1, "hang_once": str(marker)}, {"value": 2, "sleep": 2}]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        running = executor.submit(lambda: list(coordinator.map(tasks, [2.0, 1.0])))
+
+        _wait_for(marker)
+        hung = int(marker.read_text(encoding="utf-8"))
+        victim = next(process for process in processes if process.pid == hung)
+        victim.kill()
+        victim.wait()
+
+        results = running.result(timeout=30)
+    assert [result["value"] for result in results] == [2, 4]
+    assert results[0]["worker"] != hung
+    survivor = next(process for process in processes if process.pid != hung)
+    assert survivor.poll() is None
+
+
+def test_straggler_backup(workers: Workers, tmp_path: Path) -> None:
+    """An idle worker runs a backup copy of a straggling task."""
+    coordinator, _ = workers
+    marker = tmp_path / "straggler"
+    tasks = [{"value": 1, "hang_once": str(marker)}, {"value": 2}]
+
+    start = time.monotonic()
+    results = list(coordinator.map(tasks, costs=[2.0, 1.0]))
+
+    # The straggler's first copy hangs for a minute; the backup answers
+    assert time.monotonic() - start < 30
+    assert [result["value"] for result in results] == [2, 4]
+    straggler = int(marker.read_text(encoding="utf-8"))
+    assert results[0]["worker"] != straggler
+
+
+def test_worker_with_wrong_token_is_turned_away(workers: Workers) -> None:
+    """A worker that does not know the token gets no tasks."""
+    coordinator, _ = workers
+
+    (intruder,) = start_local_workers(_worker_command(coordinator), 1, "guess")
+
+    assert intruder.wait(timeout=10) == 1
+    results = list(coordinator.map([{"value": 3}]))
+    assert results[0]["worker"] != intruder.pid
+
+
+def test_timed_out_worker_stays_connected() -> None:
+    """A task over the timeout is handed out again without losing its worker."""
+    with Coordinator(
+        "127.0.0.1:0", TOOL, TOKEN, task_timeout=0.5, connect_timeout=10
+    ) as coordinator:
+        processes = start_local_workers(_worker_command(coordinator), 2, TOKEN)
+        try:
+            slow = list(coordinator.map([{"value": 1, "sleep": 3}]))
+            assert [result["value"] for result in slow] == [2]
+            assert all(process.poll() is None for process in processes)
+
+            tasks = [{"value": index, "sleep": 0.1} for index in range(6)]
+            results = list(coordinator.map(tasks))
+            assert {result["worker"] for result in results} == {
+                process.pid for process in processes
+            }
+        finally:
+            coordinator.close()
+            stop_local_workers(processes)
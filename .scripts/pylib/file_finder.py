@@ -2,11 +2,23 @@
 
 This module provides functions to find files matching glob patterns
 while respecting common ignore directories.
+
+Patterns are matched during a single os.scandir walk that prunes ignored
+directories (and directories no pattern can match) before descending,
+instead of globbing the whole tree and filtering afterwards. Alternatively
+the candidate files can come from the git index and be filtered in memory.
+Matching follows glob.glob(recursive=True) semantics, including skipping
+hidden names unless the pattern component itself starts with a dot.
 """
 
+import fnmatch
 import glob
 import os
-from typing import List, Optional, Set
+import re
+import sys
+from typing import Dict, FrozenSet, List, Optional, Pattern, Set, Tuple, Union
+
+from .git_files import git_changed_files, git_ls_files
 
 DEFAULT_IGNORES = [
     "__pycache__",
@@ -25,6 +37,15 @@ DEFAULT_IGNORES = [
     "venv",
 ]
 
+# Path separators accepted in patterns
+SEPARATORS_RE = re.compile(r"[\\/]" if os.sep == "\\" else r"/")
+
+# A compiled pattern component: "**" or a regex for a single name
+Component = Union[str, Tuple[Pattern[str], bool]]
+
+# NFA state per pattern: the set of component indexes still reachable
+States = Tuple[FrozenSet[int], ...]
+
 
 def is_ignored(path: str, ignore_patterns: Set[str]) -> bool:
     """Check if a path should be ignored based on directory patterns.
@@ -43,14 +64,186 @@ def is_ignored(path: str, ignore_patterns: Set[str]) -> bool:
     return False
 
 
+def _compile_component(part: str) -> Component:
+    """Compile one pattern component into a matcher."""
+    if part == "**":
+        return part
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    return re.compile(fnmatch.translate(part), flags), part.startswith(".")
+
+
+def _split_pattern(pattern: str) -> Tuple[str, List[Component]]:
+    """Split a pattern into its literal root directory and magic components."""
+    parts = SEPARATORS_RE.split(pattern)
+    literal: List[str] = []
+    while len(parts) > 1 and not glob.has_magic(parts[0]):
+        literal.append(parts.pop(0))
+
+    # Joining with os.sep keeps absolute ("/abs") and drive ("C:") roots intact
+    root = (os.sep.join(literal) or os.sep) if literal else os.curdir
+    return root, [_compile_component(part) for part in parts if part]
+
+
+def _closure(components: List[Component], states: FrozenSet[int]) -> FrozenSet[int]:
+    """Add the states reachable by letting "**" match zero directories."""
+    result = set(states)
+    pending = list(states)
+    while pending:
+        index = pending.pop()
+        if (
+            index < len(components)
+            and components[index] == "**"
+            and index + 1 not in result
+        ):
+            result.add(index + 1)
+            pending.append(index + 1)
+    return frozenset(result)
+
+
+def _advance(
+    components: List[Component], states: FrozenSet[int], name: str
+) -> FrozenSet[int]:
+    """Advance a pattern's states over one path component."""
+    hidden = name.startswith(".")
+    result: Set[int] = set()
+    for index in states:
+        if index >= len(components):
+            continue
+        component = components[index]
+        if component == "**":
+            if not hidden:
+                result.add(index)
+            continue
+        regex, allow_hidden = component
+        if (allow_hidden or not hidden) and regex.match(name):
+            result.add(index + 1)
+    return _closure(components, frozenset(result))
+
+
+def _scan_directory(
+    directory: str,
+    states: States,
+    patterns: List[List[Component]],
+    ignores: Set[str],
+    found: Set[str],
+) -> List[Tuple["os.DirEntry[str]", States]]:
+    """Match the entries of one directory.
+
+    Adds matching files to found and returns the subdirectories worth
+    descending into, with the pattern states to continue from.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            entry_list = list(entries)
+    except OSError:
+        return []
+
+    subdirs: List[Tuple["os.DirEntry[str]", States]] = []
+    for entry in entry_list:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if is_dir and entry.name in ignores:
+            continue
+
+        next_states: States = tuple(
+            _advance(components, pattern_states, entry.name)
+            for components, pattern_states in zip(patterns, states, strict=True)
+        )
+        pairs = zip(patterns, next_states, strict=True)
+
+        if not is_dir:
+            if any(len(comps) in pattern_states for comps, pattern_states in pairs):
+                found.add(os.path.normpath(entry.path))
+        # Prune directories below which no pattern can match anything
+        elif any(
+            any(index < len(comps) for index in pattern_states)
+            for comps, pattern_states in pairs
+        ):
+            subdirs.append((entry, next_states))
+    return subdirs
+
+
+def _walk(
+    root: str,
+    patterns: List[List[Component]],
+    ignores: Set[str],
+    found: Set[str],
+) -> None:
+    """Walk root once, adding files that match any of the patterns."""
+    start: States = tuple(
+        _closure(components, frozenset([0])) for components in patterns
+    )
+    stack: List[Tuple[str, States]] = [(root, start)]
+    visited: Set[str] = set()
+
+    while stack:
+        directory, states = stack.pop()
+        for entry, next_states in _scan_directory(
+            directory, states, patterns, ignores, found
+        ):
+            # Symlinked directories are followed (like glob) but only once
+            if entry.is_symlink():
+                real = os.path.realpath(entry.path)
+                if real in visited:
+                    continue
+                visited.add(real)
+            stack.append((entry.path, next_states))
+
+
+def _match_listed(
+    listed: List[str],
+    root: str,
+    patterns: List[List[Component]],
+    ignores: Set[str],
+    found: Set[str],
+) -> None:
+    """Add listed paths under root that match any of the patterns."""
+    start: States = tuple(
+        _closure(components, frozenset([0])) for components in patterns
+    )
+    for path in listed:
+        relative = os.path.relpath(path, root)
+        if relative.startswith(os.pardir) or is_ignored(relative, ignores):
+            continue
+
+        states = start
+        for part in relative.split(os.sep):
+            states = tuple(
+                _advance(components, pattern_states, part)
+                for components, pattern_states in zip(patterns, states, strict=True)
+            )
+        # Report paths relative to root, the same way the walker does
+        match = os.path.normpath(os.path.join(root, relative))
+        if any(
+            len(components) in pattern_states
+            for components, pattern_states in zip(patterns, states, strict=True)
+        ) and os.path.isfile(match):
+            found.add(match)
+
+
 def find_files(
-    patterns: List[str], ignore_patterns: Optional[List[str]] = None
+    patterns: List[str],
+    ignore_patterns: Optional[List[str]] = None,
+    use_git: bool = False,
+    include_untracked: bool = False,
+    staged_only: bool = False,
+    since: Optional[str] = None,
 ) -> List[str]:
     """Find files matching glob patterns while ignoring specified directories.
 
     Args:
         patterns: List of file paths or glob patterns to match.
         ignore_patterns: Additional directory names to ignore.
+        use_git: Take candidate files from the git index (git ls-files)
+            instead of walking the filesystem. Falls back to the walker
+            outside a git work tree.
+        include_untracked: With use_git, also consider untracked files
+            that are not ignored by .gitignore.
+        staged_only: Only consider files staged in git.
+        since: Only consider files changed since the merge base of this git
+            ref and HEAD (e.g. "origin/main").
 
     Returns:
         Sorted list of matching file paths.
@@ -59,11 +252,13 @@ def find_files(
         ignore_patterns = []
 
     all_ignores = set(DEFAULT_IGNORES + ignore_patterns)
-    found_files = set()
+    found_files: Set[str] = set()
 
     if not patterns:
         return []
 
+    # Patterns sharing a literal root directory are evaluated in one walk
+    roots: Dict[str, List[List[Component]]] = {}
     for pattern in patterns:
         # If the pattern is a direct file path that exists, add it (unless ignored)
         if os.path.isfile(pattern):
@@ -71,12 +266,25 @@ def find_files(
                 found_files.add(os.path.normpath(pattern))
             continue
 
-        # Otherwise treat as glob
-        # recursive=True allows ** to match subdirectories
-        matches = glob.glob(pattern, recursive=True)
+        root, components = _split_pattern(pattern)
+        if components and not is_ignored(os.path.normpath(root), all_ignores):
+            roots.setdefault(root, []).append(components)
+
+    listed = None
+    if staged_only or since:
+        # Explicit file paths above are taken as given; patterns only
+        # match files git reports as changed
+        listed = git_changed_files(staged=staged_only, since=since)
+        if listed is None:
+            print("Warning: Could not get changed files from git", file=sys.stderr)
+            listed = []
+    elif use_git and roots:
+        listed = git_ls_files(include_untracked)
 
-        for match in matches:
-            if os.path.isfile(match) and not is_ignored(match, all_ignores):
-                found_files.add(os.path.normpath(match))
+    for root, root_patterns in roots.items():
+        if listed is not None:
+            _match_listed(listed, root, root_patterns, all_ignores, found_files)
+        else:
+            _walk(root, root_patterns, all_ignores, found_files)
 
     return sorted(found_files)
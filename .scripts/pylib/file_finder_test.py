@@ -0,0 +1,129 @@
+"""Tests of the pruning file discovery."""
+
+import glob
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from . import file_finder
+from .file_finder import find_files
+
+FILES = [
+    "a.py",
+    ".hidden.py",
+    "src/b.py",
+    "src/c.txt",
+    "src/deep/d.py",
+    "src/.cache/e.py",
+    ".scripts/f.py",
+    "node_modules/pkg/g.py",
+    "generated/h.py",
+    "docs/readme.md",
+]
+
+
+@pytest.fixture(name="tree")
+def fixture_tree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A tree of FILES, which is also the current directory."""
+    for name in FILES:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("x\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _scanned(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Record the directories the walker lists."""
+    scanned: List[str] = []
+    scandir = os.scandir
+
+    def record(path: str):
+        scanned.append(os.path.normpath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(file_finder.os, "scandir", record)
+    return scanned
+
+
+@pytest.mark.usefixtures("tree")
+@pytest.mark.parametrize(
+    "pattern",
+    ["**/*.py", "src/*", "src/**/*.py", "*.py", ".*/**/*.py", "**/.*.py", "**/d*"],
+)
+def test_matches_like_glob(pattern: str) -> None:
+    """Results are those of glob.glob(recursive=True), minus ignored dirs."""
+    expected = sorted(
+        os.path.normpath(path)
+        for path in glob.glob(pattern, recursive=True)
+        if os.path.isfile(path) and not path.startswith("node_modules")
+    )
+
+    assert find_files([pattern]) == expected
+
+
+@pytest.mark.usefixtures("tree")
+def test_unreachable_directories_are_not_walked(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ignored directories and those no pattern can reach are pruned."""
+    scanned = _scanned(monkeypatch)
+
+    found = find_files(["**/*.py", "docs/*.md"], ["generated"])
+
+    assert found == [
+        "a.py",
+        os.path.join("docs", "readme.md"),
+        os.path.join("src", "b.py"),
+        os.path.join("src", "deep", "d.py"),
+    ]
+    # docs is listed by the walk of each root: "." and "docs"
+    assert sorted(scanned) == [".", "docs", "docs", "src", os.path.join("src", "deep")]
+
+
+def test_explicit_files_are_kept_unless_ignored(tree: Path) -> None:
+    """Existing paths are taken as given, unless under an ignored directory."""
+    found = find_files(
+        [str(tree / "src" / "c.txt"), os.path.join("node_modules", "pkg", "g.py")]
+    )
+
+    assert found == [str(tree / "src" / "c.txt")]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs symlinks")
+def test_symlinked_directories_are_walked_once(tree: Path) -> None:
+    """A symlink cycle is followed once instead of looping."""
+    (tree / "src" / "deep" / "loop").symlink_to(tree / "src")
+
+    found = find_files(["src/**/*.py"])
+
+    assert found == [
+        os.path.join(*parts)
+        for parts in [
+            ("src", "b.py"),
+            ("src", "deep", "d.py"),
+            ("src", "deep", "loop", "b.py"),
+            ("src", "deep", "loop", "deep", "d.py"),
+        ]
+    ]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+@pytest.mark.usefixtures("tree")
+def test_git_listing_skips_untracked_files() -> None:
+    """With use_git, only files known to git are candidates."""
+    subprocess.run(["git", "init", "-q"], check=True)
+    subprocess.run(["git", "add", "a.py", "src"], check=True)
+
+    assert find_files(["**/*.py"], use_git=True) == [
+        "a.py",
+        os.path.join("src", "b.py"),
+        os.path.join("src", "deep", "d.py"),
+    ]
+    assert os.path.join("generated", "h.py") in find_files(
+        ["**/*.py"], use_git=True, include_untracked=True
+    )
@@ -0,0 +1,190 @@
+"""Git-backed file listing utilities.
+
+This module lists files from the git index, which makes file discovery
+cost independent of the size of untracked build output and vendor
+directories, and lists the files (or line ranges) changed in the index
+or since a given ref so that tools can check only what was touched.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .unified_diff import parse_diff
+
+# Inclusive (first, last) line ranges of added or modified lines per file
+LineRanges = Dict[Path, List[Tuple[int, int]]]
+
+
+def add_git_arguments(
+    parser: argparse.ArgumentParser, changed_lines: bool = False
+) -> None:
+    """Add the --git/--untracked file discovery options to a parser.
+
+    Args:
+        parser: The parser to extend.
+        changed_lines: Also add --changed-lines, for tools that can restrict
+            their work to line ranges.
+    """
+    parser.add_argument(
+        "--git",
+        action="store_true",
+        help="List files from the git index instead of walking the filesystem",
+    )
+    parser.add_argument(
+        "--untracked",
+        action="store_true",
+        help="With --git, also include untracked files not ignored by git",
+    )
+    parser.add_argument(
+        "--staged", action="store_true", help="Only check files staged in git"
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help="Only check files changed since the merge base with REF "
+        "(e.g. origin/main)",
+    )
+    if changed_lines:
+        parser.add_argument(
+            "--changed-lines",
+            action="store_true",
+            help="Only check lines changed according to git "
+            "(against the index, or as selected by --staged/--since)",
+        )
+
+
+def _run_git(args: List[str]) -> Optional[str]:
+    """Run a git command and return its output, or None if it failed."""
+    try:
+        result = subprocess.run(["git"] + args, capture_output=True, check=False)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode("utf-8", "surrogateescape")
+
+
+def _run_git_z(args: List[str]) -> Optional[List[str]]:
+    """Run a git command printing NUL-separated paths.
+
+    Returns:
+        The de-duplicated paths, or None if git failed or is unavailable.
+    """
+    output = _run_git(args)
+    if output is None:
+        return None
+    return list(dict.fromkeys(path for path in output.split("\0") if path))
+
+
+def git_ls_files(include_untracked: bool = False) -> Optional[List[str]]:
+    """List files known to git under the current directory.
+
+    Args:
+        include_untracked: Also list untracked files that are not ignored
+            by .gitignore.
+
+    Returns:
+        Paths relative to the current directory, or None if the current
+        directory is not inside a git work tree (or git is unavailable).
+    """
+    # --cached lists files with unresolved conflicts once per stage, which
+    # _run_git_z de-duplicates
+    args = ["ls-files", "-z", "--cached"]
+    if include_untracked:
+        args.extend(["--others", "--exclude-standard"])
+    return _run_git_z(args)
+
+
+def git_changed_files(
+    staged: bool = False, since: Optional[str] = None
+) -> Optional[List[str]]:
+    """List files added, copied, modified or renamed according to git diff.
+
+    Args:
+        staged: List changes staged in the index (relative to HEAD).
+        since: List changes in the work tree since the merge base of this
+            ref and HEAD, e.g. "origin/main" for a pull request. Takes
+            precedence over staged.
+
+    Returns:
+        Paths (new names for renames) relative to the current directory,
+        limited to it, or None if git failed.
+    """
+    args = _diff_args(staged, since)
+    if args is None:
+        return None
+    return _run_git_z(args + ["--name-only", "-z"])
+
+
+def git_changed_lines(
+    staged: bool = False, since: Optional[str] = None
+) -> Optional[LineRanges]:
+    """Map changed files to the line ranges added or modified in them.
+
+    Uses the same comparison as git_changed_files(). Files whose changes
+    only delete lines have no ranges and are left out.
+
+    Returns:
+        Inclusive (first, last) line ranges in the new version of each file,
+        keyed by path relative to the current directory, or None if git failed.
+    """
+    args = _diff_args(staged, since)
+    if args is None:
+        return None
+    output = _run_git(
+        args
+        + ["-U0", "--no-color", "--no-ext-diff", "--src-prefix=a/", "--dst-prefix=b/"]
+    )
+    if output is None:
+        return None
+
+    ranges: LineRanges = {}
+    for patch in parse_diff(output):
+        if patch.path is None:
+            continue
+        for first, count in patch.hunks:
+            if count == 0:
+                continue
+            hunks = ranges.setdefault(Path(patch.path), [])
+            if hunks and hunks[-1][1] + 1 >= first:
+                hunks[-1] = (hunks[-1][0], first + count - 1)
+            else:
+                hunks.append((first, first + count - 1))
+    return ranges
+
+
+def restrict_to_changed_lines(
+    files: List[Path], staged: bool = False, since: Optional[str] = None
+) -> Tuple[List[Path], LineRanges]:
+    """Keep only the files with added or modified lines, and their ranges.
+
+    Args:
+        files: Candidate files, as paths relative to the current directory.
+        staged: Compare the index with HEAD, as in git_changed_files().
+        since: Compare with the merge base of this ref and HEAD.
+
+    Returns:
+        Tuple of (files with changed lines, line ranges of every changed
+        file). Both are empty if git failed.
+    """
+    line_ranges = git_changed_lines(staged=staged, since=since)
+    if line_ranges is None:
+        print("Warning: Could not get changed lines from git", file=sys.stderr)
+        return [], {}
+    return [file for file in files if file in line_ranges], line_ranges
+
+
+def _diff_args(staged: bool, since: Optional[str]) -> Optional[List[str]]:
+    """Build the git diff command shared by the changed-file queries."""
+    args = ["diff", "--relative", "--diff-filter=ACMR"]
+    if since:
+        base = _run_git(["merge-base", since, "HEAD"])
+        if not base:
+            return None
+        args.append(base.strip())
+    elif staged:
+        args.append("--cached")
+    return args
@@ -0,0 +1,89 @@
+"""Tests of the git-backed file and changed line queries."""
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from .git_files import git_changed_files, git_changed_lines
+from .unified_diff import parse_diff
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def _git(*args: str) -> None:
+    """Run a git command in the current directory."""
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture(name="repo")
+def fixture_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A repository with one committed file of ten lines."""
+    monkeypatch.chdir(tmp_path)
+    _git("init", "-q")
+    (tmp_path / "a.txt").write_text(
+        "".join(f"{line}\n" for line in range(1, 11)), encoding="utf-8"
+    )
+    _git("add", "a.txt")
+    _git("commit", "-q", "-m", "initial")
+    return tmp_path
+
+
+def test_changed_lines_follow_the_hunk_counts(repo: Path) -> None:
+    """Added lines that look like file headers stay in their hunk."""
+    lines = (repo / "a.txt").read_text(encoding="utf-8").splitlines()
+    lines[1] = "++ b/elsewhere.txt"
+    lines[2] = "-- a/elsewhere.txt"
+    del lines[6]
+    lines.append("@@ -1 +1 @@")
+    (repo / "a.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    (repo / "new file.txt").write_text("x\n", encoding="utf-8")
+    _git("add", "-N", "new file.txt")
+
+    assert git_changed_lines() == {
+        Path("a.txt"): [(2, 3), (10, 10)],
+        Path("new file.txt"): [(1, 1)],
+    }
+    assert git_changed_files() == ["a.txt", "new file.txt"]
+
+
+def test_staged_deletions_have_no_ranges(repo: Path) -> None:
+    """Files whose changes only remove lines are left out."""
+    lines = (repo / "a.txt").read_text(encoding="utf-8").splitlines()
+    (repo / "a.txt").write_text("\n".join(lines[1:]) + "\n", encoding="utf-8")
+    _git("add", "a.txt")
+
+    assert git_changed_lines(staged=True) == {}
+    assert git_changed_lines() == {}
+
+
+def test_parse_diff_quoted_and_deleted_paths() -> None:
+    """Quoted names are decoded; deleted files keep their old path."""
+    diff = (
+        'diff --git "a/caf\\303\\251.txt" "b/caf\\303\\251.txt"\n'
+        '--- "a/caf\\303\\251.txt"\n'
+        '+++ "b/caf\\303\\251.txt"\n'
+        "@@ -1 +1,2 @@\n"
+        "-old\n"
+        "+new\n"
+        "+more\n"
+        "diff --git a/gone.txt b/gone.txt\n"
+        "deleted file mode 100644\n"
+        "--- a/gone.txt\n"
+        "+++ /dev/null\n"
+        "@@ -1 +0,0 @@\n"
+        "-bye\n"
+    )
+
+    patches = parse_diff(diff)
+
+    assert [(patch.path, patch.hunks) for patch in patches] == [
+        ("café.txt", [(1, 2)]),
+        ("gone.txt", [(0, 0)]),
+    ]
+    assert "".join(patch.text for patch in patches) == diff
@@ -0,0 +1,376 @@
+"""Run time history of the lint and format tools, with regression checks.
+
+TimingDatabase keeps one smoothed time per file for scheduling. Every run
+also appends its wall time and the unsmoothed time of each file the tool
+actually ran on (cache hits are left out) to a small SQLite database
+shared by all tools. The `report` action summarizes it: p50/p95 file
+times per tool, the latest runs compared with the ones before them, and
+the slowest files of the latest run. It exits non-zero when a file got
+slower than the regression ratio allows since its previous run, e.g.
+when a header change made a translation unit twice as slow to lint.
+"""
+
+import argparse
+import contextlib
+import math
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from .colors import Colors
+
+# Shared by all tools of a build directory, so one report covers all of them
+HISTORY_NAME = Path(".lint-cache") / "history.sqlite"
+
+# Runs kept per tool; older runs and their samples are deleted
+KEEP_RUNS = 100
+
+# Runs whose file times the percentiles are computed from
+PERCENTILE_RUNS = 20
+
+# Runs listed per tool in the report
+RECENT_RUNS = 5
+
+DEFAULT_SLOWEST = 10
+DEFAULT_REGRESSION_RATIO = 2.0
+
+# Files faster than this are not reported as regressions, since small
+# times are dominated by process start-up noise
+MIN_REGRESSION_MS = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tool TEXT NOT NULL,
+    started REAL NOT NULL,
+    wall_ms INTEGER NOT NULL,
+    files INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    elapsed_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples (run);
+CREATE INDEX IF NOT EXISTS samples_path ON samples (path, run);
+"""
+
+
+@dataclass
+class RunSummary:
+    """One recorded run of a tool."""
+
+    started: float
+    wall_ms: int
+    # Files passed to the tool, and how many of them it actually ran on
+    files: int
+    timed: int
+    # Sum of the times of the files it ran on
+    busy_ms: int
+
+    @property
+    def mean_ms(self) -> Optional[int]:
+        """Return the mean time of the files run, or None if all were cached."""
+        return self.busy_ms // self.timed if self.timed else None
+
+
+@dataclass
+class FileTime:
+    """Time of a file in a tool's latest run, and in the run before."""
+
+    path: str
+    elapsed_ms: int
+    previous_ms: Optional[int]
+
+    @property
+    def ratio(self) -> Optional[float]:
+        """Return how many times slower the file got, if it ran before."""
+        if not self.previous_ms:
+            return None
+        return self.elapsed_ms / self.previous_ms
+
+
+class TimingHistory:
+    """Run and per-file times of all tools, stored in SQLite."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        """Initialize from an open database connection."""
+        self.connection = connection
+
+    @classmethod
+    def open(cls, path: Path) -> "TimingHistory":
+        """Open (and create, if needed) the history database.
+
+        Raises:
+            OSError: If the directory cannot be created.
+            sqlite3.Error: If the database cannot be opened.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=10)
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.executescript(SCHEMA)
+        except sqlite3.Error:
+            connection.close()
+            raise
+        return cls(connection)
+
+    def __enter__(self) -> "TimingHistory":
+        """Enter the context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def add_run(
+        self, tool: str, wall_time: float, files: int, samples: Dict[str, float]
+    ) -> None:
+        """Append a run and drop the tool's runs beyond KEEP_RUNS.
+
+        Args:
+            tool: Tool name, e.g. "clang-tidy".
+            wall_time: Wall time of the run in seconds.
+            files: Number of files passed to the tool.
+            samples: Seconds per file key for the files the tool ran on.
+        """
+        with self.connection:
+            run = self.connection.execute(
+                "INSERT INTO runs (tool, started, wall_ms, files) VALUES (?, ?, ?, ?)",
+                (tool, time.time() - wall_time, int(wall_time * 1000), files),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO samples (run, path, elapsed_ms) VALUES (?, ?, ?)",
+                [(run, path, int(seconds * 1000)) for path, seconds in samples.items()],
+            )
+            self.connection.execute(
+                "DELETE FROM runs WHERE id IN (SELECT id FROM runs WHERE tool = ? "
+                "ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (tool, KEEP_RUNS),
+            )
+
+    def tools(self) -> List[str]:
+        """Return the tools with recorded runs."""
+        rows = self.connection.execute("SELECT DISTINCT tool FROM runs ORDER BY tool")
+        return [tool for (tool,) in rows]
+
+    def runs(self, tool: str, count: int) -> List[RunSummary]:
+        """Return the latest runs of a tool, newest first."""
+        rows = self.connection.execute(
+            "SELECT started, wall_ms, files, COUNT(samples.run), "
+            "COALESCE(SUM(elapsed_ms), 0) FROM runs "
+            "LEFT JOIN samples ON samples.run = runs.id WHERE tool = ? "
+            "GROUP BY runs.id ORDER BY runs.id DESC LIMIT ?",
+            (tool, count),
+        )
+        return [RunSummary(*row) for row in rows]
+
+    def file_times(self, tool: str, runs: int) -> List[int]:
+        """Return the file times (ms) of a tool's latest runs, sorted."""
+        rows = self.connection.execute(
+            "SELECT elapsed_ms FROM samples WHERE run IN "
+            "(SELECT id FROM runs WHERE tool = ? ORDER BY id DESC LIMIT ?) "
+            "ORDER BY elapsed_ms",
+            (tool, runs),
+        )
+        return [elapsed for (elapsed,) in rows]
+
+    def latest_files(self, tool: str) -> List[FileTime]:
+        """Return the file times of the tool's latest run that ran any file.
+
+        Each file is paired with its time in the latest earlier run that
+        ran it. Files are sorted from slowest to fastest.
+        """
+        rows = self.connection.execute(
+            """
+            SELECT s.path, s.elapsed_ms, (
+                SELECT p.elapsed_ms FROM samples p JOIN runs r ON r.id = p.run
+                WHERE r.tool = ? AND p.path = s.path AND p.run < s.run
+                ORDER BY p.run DESC LIMIT 1
+            )
+            FROM samples s
+            WHERE s.run = (
+                SELECT MAX(run) FROM samples JOIN runs ON runs.id = samples.run
+                WHERE tool = ?
+            )
+            ORDER BY s.elapsed_ms DESC, s.path
+            """,
+            (tool, tool),
+        )
+        return [FileTime(*row) for row in rows]
+
+
+def percentile(values: Sequence[int], percent: float) -> int:
+    """Return the nearest-rank percentile of sorted values (0 if empty)."""
+    if not values:
+        return 0
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def find_regressions(
+    files: Sequence[FileTime], ratio: float, min_ms: int = MIN_REGRESSION_MS
+) -> List[FileTime]:
+    """Return the files that got at least ratio times slower."""
+    return [
+        file
+        for file in files
+        if file.ratio is not None and file.ratio >= ratio and file.elapsed_ms >= min_ms
+    ]
+
+
+def history_path(build_dir: Union[str, Path]) -> Path:
+    """Return the history database of a build directory."""
+    return Path(build_dir) / HISTORY_NAME
+
+
+def record_run(
+    path: Path, tool: str, wall_time: float, files: int, samples: Dict[str, float]
+) -> None:
+    """Append a run to the history database at path, ignoring failures.
+
+    The history is only a diagnostic aid, so a read-only or locked
+    database does not fail the run.
+    """
+    with (
+        contextlib.suppress(OSError, sqlite3.Error),
+        TimingHistory.open(path) as history,
+    ):
+        history.add_run(tool, wall_time, files, samples)
+
+
+def add_report_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options of the report action to a parser."""
+    group = parser.add_argument_group("timing report")
+    group.add_argument(
+        "--history",
+        type=Path,
+        metavar="FILE",
+        help=f"Timing history database (default: {HISTORY_NAME} in the build "
+        "directory)",
+    )
+    group.add_argument(
+        "--slowest",
+        type=int,
+        default=DEFAULT_SLOWEST,
+        metavar="N",
+        help="Number of slowest files (or checks, for profile-checks) to list "
+        f"(default: {DEFAULT_SLOWEST})",
+    )
+    group.add_argument(
+        "--regression-ratio",
+        type=float,
+        default=DEFAULT_REGRESSION_RATIO,
+        metavar="R",
+        help="Fail if a file got R times slower than on its previous run "
+        f"(default: {DEFAULT_REGRESSION_RATIO:g}; 0 disables the check)",
+    )
+
+
+def _format_delta(latest: int, previous: Optional[int]) -> str:
+    """Describe the change from previous to latest milliseconds."""
+    if not previous:
+        return ""
+    return f" ({(latest - previous) / previous:+.0%} vs previous)"
+
+
+def _print_runs(runs: List[RunSummary]) -> None:
+    """Print the latest runs of a tool with their run-over-run change.
+
+    Runs are compared by the mean time of the files they ran, since the
+    wall time mostly depends on how many files were cached.
+    """
+    print("  Recent runs:")
+    for index, run in enumerate(runs):
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run.started))
+        line = f"    {started}  {run.wall_ms}ms, {run.timed} of {run.files} file(s) run"
+        if run.mean_ms is not None:
+            previous = next(
+                (older.mean_ms for older in runs[index + 1 :] if older.timed), None
+            )
+            line += f", {run.mean_ms}ms per file{_format_delta(run.mean_ms, previous)}"
+        print(line)
+
+
+def _print_files(files: List[FileTime], count: int) -> None:
+    """Print the slowest files of the latest run."""
+    if not files or count <= 0:
+        return
+    print("  Slowest files of the latest run:")
+    for file in files[:count]:
+        print(f"    {file.path} {file.elapsed_ms}ms")
+        delta = _format_delta(file.elapsed_ms, file.previous_ms)
+        if delta:
+            print(f"      was {file.previous_ms}ms{delta}")
+
+
+def _print_regressions(
+    regressions: List[FileTime], ratio: float, use_color: bool
+) -> None:
+    """Print the files that got slower than the regression ratio allows."""
+    message = f"  ✖ {len(regressions)} file(s) at least {ratio:g}x slower:"
+    print(f"{Colors.RED}{message}{Colors.RESET}" if use_color else message)
+    for file in regressions:
+        print(
+            f"    {file.path} {file.previous_ms}ms -> {file.elapsed_ms}ms "
+            f"({file.ratio:.1f}x)"
+        )
+
+
+def _report_tool(
+    history: TimingHistory, tool: str, args: argparse.Namespace, use_color: bool
+) -> int:
+    """Print the report of one tool.
+
+    Returns:
+        Number of regressions found.
+    """
+    times = history.file_times(tool, PERCENTILE_RUNS)
+    header = (
+        f"{tool}: file time p50 {percentile(times, 50)}ms, "
+        f"p95 {percentile(times, 95)}ms ({len(times)} sample(s), "
+        f"last {PERCENTILE_RUNS} runs)"
+    )
+    print(f"{Colors.BOLD}{header}{Colors.RESET}" if use_color else header)
+    _print_runs(history.runs(tool, RECENT_RUNS))
+
+    files = history.latest_files(tool)
+    _print_files(files, args.slowest)
+    if args.regression_ratio <= 0:
+        return 0
+    regressions = find_regressions(files, args.regression_ratio)
+    if regressions:
+        _print_regressions(regressions, args.regression_ratio, use_color)
+    return len(regressions)
+
+
+def report_history(args: argparse.Namespace, build_dir: Union[str, Path]) -> int:
+    """Print the timing report selected by add_report_arguments() options.
+
+    Args:
+        args: Parsed options; without --history, the history of build_dir
+            is read, the one record_run() writes to for that directory.
+        build_dir: Build directory of the tool.
+
+    Returns:
+        1 if a file regressed or the history cannot be read, 0 otherwise.
+    """
+    path = args.history or history_path(build_dir)
+    if not path.is_file():
+        print(f"No timing history at {path}")
+        return 0
+
+    use_color = Colors.supports_color()
+    try:
+        with TimingHistory.open(path) as history:
+            regressions = 0
+            for tool in history.tools():
+                regressions += _report_tool(history, tool, args, use_color)
+                print()
+    except (OSError, sqlite3.Error) as exc:
+        print(f"Error: cannot read {path}: {exc}", file=sys.stderr)
+        return 1
+    return 1 if regressions else 0
@@ -0,0 +1,94 @@
+"""Tests of the run time history and its regression check."""
+
+import argparse
+from pathlib import Path
+
+import pytest
+
+from .history import (
+    FileTime,
+    TimingHistory,
+    add_report_arguments,
+    find_regressions,
+    history_path,
+    percentile,
+    record_run,
+    report_history,
+)
+
+
+def _report_args(*argv: str) -> argparse.Namespace:
+    """Parse report options the way the scripts do."""
+    parser = argparse.ArgumentParser()
+    add_report_arguments(parser)
+    return parser.parse_args(list(argv))
+
+
+def test_runs_are_kept_per_tool(tmp_path: Path) -> None:
+    """Runs are listed newest first, with their timed files."""
+    path = history_path(tmp_path)
+    record_run(path, "tool", 1.0, 2, {"a.cpp": 0.5, "b.cpp": 0.25})
+    record_run(path, "tool", 2.0, 2, {})
+    record_run(path, "other", 3.0, 1, {"c.cpp": 1.0})
+
+    with TimingHistory.open(path) as history:
+        assert history.tools() == ["other", "tool"]
+        runs = history.runs("tool", 5)
+        assert [(run.wall_ms, run.files, run.timed) for run in runs] == [
+            (2000, 2, 0),
+            (1000, 2, 2),
+        ]
+        assert runs[0].mean_ms is None
+        assert runs[1].mean_ms == 375
+        assert history.file_times("tool", 5) == [250, 500]
+
+
+def test_latest_files_pair_with_their_previous_run(tmp_path: Path) -> None:
+    """A file's time is compared with the last earlier run that ran it."""
+    path = history_path(tmp_path)
+    record_run(path, "tool", 1.0, 2, {"a.cpp": 0.2, "b.cpp": 0.3})
+    record_run(path, "tool", 1.0, 2, {"b.cpp": 0.3})
+    record_run(path, "tool", 1.0, 2, {"a.cpp": 0.5, "b.cpp": 0.3})
+
+    with TimingHistory.open(path) as history:
+        files = history.latest_files("tool")
+
+    assert files == [FileTime("a.cpp", 500, 200), FileTime("b.cpp", 300, 300)]
+    assert [file.path for file in find_regressions(files, 2.0)] == ["a.cpp"]
+
+
+def test_fast_files_are_not_regressions() -> None:
+    """Files below the noise floor never count as slower."""
+    files = [FileTime("fast.cpp", 90, 10), FileTime("new.cpp", 900, None)]
+
+    assert not find_regressions(files, 2.0)
+
+
+def test_percentile_is_nearest_rank() -> None:
+    """Percentiles pick a recorded value."""
+    assert percentile([10, 20, 30, 40], 50) == 20
+    assert percentile([10, 20, 30, 40], 95) == 40
+    assert percentile([], 50) == 0
+
+
+def test_report_reads_the_history_the_run_wrote(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Without --history, the report reads the build directory's history."""
+    build_dir = tmp_path / "out"
+    record_run(history_path(build_dir), "tool", 1.0, 1, {"a.cpp": 0.2})
+    record_run(history_path(build_dir), "tool", 1.0, 1, {"a.cpp": 0.6})
+
+    assert report_history(_report_args(), build_dir) == 1
+    assert "a.cpp" in capsys.readouterr().out
+    assert report_history(_report_args("--regression-ratio", "0"), build_dir) == 0
+
+
+def test_report_without_history(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """A missing history is not an error."""
+    missing = tmp_path / "missing.sqlite"
+
+    assert report_history(_report_args("--history", str(missing)), tmp_path) == 0
+    assert str(missing) in capsys.readouterr().out
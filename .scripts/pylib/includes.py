@@ -0,0 +1,149 @@
+"""C++ include discovery utilities.
+
+This module resolves #include directives to files on disk without running
+the preprocessor, so callers can cheaply find the headers a translation
+unit depends on, or pick a translation unit to analyze a header through.
+Headers that cannot be found in the given include directories (typically
+system headers) are skipped.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+INCLUDE_RE = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*([<"])([^>"\r\n]+)[>"]', re.M)
+
+# Compiler flags that add a directory to the include search path
+INCLUDE_FLAGS = ("-I", "-isystem", "-iquote", "/I")
+
+
+def include_dirs_from_args(arguments: Sequence[str], directory: Path) -> List[Path]:
+    """Extract include directories from a compiler command line.
+
+    Args:
+        arguments: Compiler arguments (as in compile_commands.json).
+        directory: Working directory the command runs in.
+
+    Returns:
+        Include directories in search order, resolved against directory.
+    """
+    dirs: List[Path] = []
+    args = iter(arguments)
+    for arg in args:
+        for flag in INCLUDE_FLAGS:
+            if arg == flag:
+                value = next(args, "")
+            elif arg.startswith(flag):
+                value = arg[len(flag) :]
+            else:
+                continue
+            if value:
+                dirs.append(directory / value)
+            break
+    return dirs
+
+
+class IncludeScanner:
+    """Resolves #include directives and memoizes results per file.
+
+    A scanner is meant to live for one run; it assumes files do not change
+    while it is in use.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty memo tables."""
+        self._direct: Dict[Tuple[Path, Tuple[Path, ...]], List[Path]] = {}
+        self._digests: Dict[Path, str] = {}
+
+    def digest(self, file: Path) -> str:
+        """Return the SHA-256 hex digest of a file's content (memoized)."""
+        cached = self._digests.get(file)
+        if cached is None:
+            cached = hashlib.sha256(file.read_bytes()).hexdigest()
+            self._digests[file] = cached
+        return cached
+
+    def direct_includes(self, file: Path, include_dirs: Sequence[Path]) -> List[Path]:
+        """Return the headers a file includes directly that exist on disk."""
+        memo_key = (file, tuple(include_dirs))
+        cached = self._direct.get(memo_key)
+        if cached is not None:
+            return cached
+
+        try:
+            content = file.read_bytes()
+        except OSError:
+            content = b""
+
+        found: List[Path] = []
+        for kind, name in INCLUDE_RE.findall(content):
+            header = _resolve(
+                name.decode("utf-8", "replace"), kind == b'"', file, include_dirs
+            )
+            if header is not None and header not in found:
+                found.append(header)
+
+        self._direct[memo_key] = found
+        return found
+
+    def transitive_includes(
+        self, file: Path, include_dirs: Sequence[Path]
+    ) -> List[Path]:
+        """Return every header reachable from file, sorted and de-duplicated."""
+        root = file.resolve()
+        seen = set()
+        pending = [root]
+        while pending:
+            current = pending.pop()
+            for header in self.direct_includes(current, include_dirs):
+                if header not in seen and header != root:
+                    seen.add(header)
+                    pending.append(header)
+        return sorted(seen)
+
+
+def assign_headers(
+    headers: Sequence[Path],
+    sources: Dict[Path, Sequence[Path]],
+    scanner: IncludeScanner,
+) -> Dict[Path, Path]:
+    """Pick one translation unit to analyze each header through.
+
+    A source file with the same stem as the header (foo.cpp for foo.hpp)
+    is preferred; otherwise the first source, in the given order, that
+    includes the header (directly or transitively) is used.
+
+    Args:
+        headers: Resolved header paths.
+        sources: Resolved source paths mapped to their include directories.
+        scanner: Scanner used to follow the #include directives.
+
+    Returns:
+        Map from header to source. Headers no source includes are left out.
+    """
+    wanted = set(headers)
+    chosen: Dict[Path, Path] = {}
+    for source, include_dirs in sources.items():
+        for header in scanner.transitive_includes(source, include_dirs):
+            if header not in wanted:
+                continue
+            current = chosen.get(header)
+            if current is None or (
+                current.stem != header.stem and source.stem == header.stem
+            ):
+                chosen[header] = source
+    return chosen
+
+
+def _resolve(
+    name: str, quoted: bool, includer: Path, include_dirs: Sequence[Path]
+) -> Optional[Path]:
+    """Resolve an include name the way the compiler searches for it."""
+    candidates = [includer.parent] if quoted else []
+    candidates.extend(include_dirs)
+    for base in candidates:
+        path = base / name
+        if path.is_file():
+            return path.resolve()
+    return None
@@ -0,0 +1,223 @@
+"""Per-file time and memory limits for tool subprocesses.
+
+A single pathological input can keep clang-tidy busy for many minutes or
+make it allocate until the machine runs out of memory. run_limited() runs
+a tool with a wall-time limit, killing it when the limit is reached, and
+on Linux caps its address space with RLIMIT_AS. The limit is applied with
+prlimit() right after the process starts rather than in a preexec_fn,
+which is not safe to use from the worker threads the tools run in.
+
+A run that hits a limit raises LimitExceeded; callers report its message
+as the file's result, which is_limit_error() recognizes again later (for
+example when merging the results of sharded runs).
+"""
+
+import argparse
+import contextlib
+import os
+import shlex
+import signal
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+from .tracing import span
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Start of the result message of a file whose run was killed
+LIMIT_PREFIX = "Limit exceeded: "
+
+# Longest command line recorded in a trace span
+TRACE_COMMAND_LENGTH = 500
+
+# stderr output of a process that failed to allocate memory
+OUT_OF_MEMORY_MARKERS = ("out of memory", "bad_alloc", "cannot allocate memory")
+
+# Signals a process dies of when an allocation fails under RLIMIT_AS; they
+# only count as such together with one of the markers above
+CRASH_SIGNALS = {signal.SIGSEGV, signal.SIGABRT}
+
+
+class LimitExceeded(subprocess.SubprocessError):
+    """Raised when a process was stopped by its time or memory limit."""
+
+    def __init__(self, reason: str):
+        """Initialize with the reason, e.g. "timed out after 30s"."""
+        super().__init__(f"{LIMIT_PREFIX}{reason}")
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """Limits applied to each tool process."""
+
+    # Wall time in seconds, or None for no limit
+    timeout: Optional[float] = None
+    # Address space in megabytes (Linux only), or None for no limit
+    memory_mb: Optional[int] = None
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "ResourceLimits":
+        """Create the limits given by add_limit_arguments() options."""
+        return cls(args.timeout, args.memory_limit)
+
+    def to_args(self) -> List[str]:
+        """Return the command line options that recreate these limits."""
+        args: List[str] = []
+        if self.timeout is not None:
+            args += ["--timeout", f"{self.timeout:g}"]
+        if self.memory_mb is not None:
+            args += ["--memory-limit", str(self.memory_mb)]
+        return args
+
+    def for_batch(self, count: int) -> "ResourceLimits":
+        """Return the limits of one process handling count files.
+
+        The time limit grows with the number of files; the memory limit
+        stays per process.
+        """
+        if self.timeout is None:
+            return self
+        return ResourceLimits(self.timeout * max(count, 1), self.memory_mb)
+
+
+def _positive_float(value: str) -> float:
+    """Parse a positive number for argparse."""
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"expected a positive number, got {value!r}")
+    return number
+
+
+def _positive_int(value: str) -> int:
+    """Parse a positive integer for argparse."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return number
+
+
+def add_limit_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --timeout and --memory-limit options to a parser."""
+    group = parser.add_argument_group("resource limits")
+    group.add_argument(
+        "--timeout",
+        type=_positive_float,
+        metavar="SECONDS",
+        help="Kill the tool when one file takes longer than this (default: no limit)",
+    )
+    group.add_argument(
+        "--memory-limit",
+        type=_positive_int,
+        metavar="MB",
+        help="Limit the address space of each tool process (Linux only; "
+        "default: no limit)",
+    )
+
+
+def is_limit_error(message: Optional[str]) -> bool:
+    """Check whether a result message reports an exceeded limit."""
+    return bool(message) and message.startswith(LIMIT_PREFIX)
+
+
+def _set_memory_limit(pid: int, memory_mb: int) -> None:
+    """Cap the address space of a running process, where supported."""
+    if resource is None or not sys.platform.startswith("linux"):
+        return
+    limit = memory_mb * 1024 * 1024
+    # The process may already have exited
+    with contextlib.suppress(OSError, ValueError):
+        resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+
+
+def _out_of_memory(returncode: int, stderr: Any) -> bool:
+    """Guess whether a memory limited process failed to allocate.
+
+    SIGKILL is what the kernel's OOM killer sends. A crash, or a failing
+    exit code, only counts when the tool reported an allocation failure;
+    other signals, such as an external SIGTERM, are ordinary tool errors.
+    """
+    if returncode == 0:
+        return False
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode(errors="replace")
+    text = (stderr or "").lower()
+    allocation_failed = any(marker in text for marker in OUT_OF_MEMORY_MARKERS)
+    if returncode < 0:
+        if -returncode == getattr(signal, "SIGKILL", None):
+            return True
+        return -returncode in CRASH_SIGNALS and allocation_failed
+    return allocation_failed
+
+
+def _signal_error(returncode: int, stderr: Any) -> Any:
+    """Append the signal that ended a process to its stderr output.
+
+    Crashing tools often print nothing, so without this the caller would
+    have no error message to report.
+    """
+    try:
+        name = signal.Signals(-returncode).name
+    except ValueError:
+        name = f"signal {-returncode}"
+    message = f"error: terminated by {name}\n"
+    if isinstance(stderr, bytes):
+        return stderr + message.encode()
+    return (stderr or "") + message
+
+
+def run_limited(
+    args: Sequence[str],
+    limits: Optional[ResourceLimits] = None,
+    input: Any = None,  # pylint: disable=redefined-builtin
+    **kwargs: Any,
+) -> subprocess.CompletedProcess:
+    """Run a command like subprocess.run(capture_output=True, check=False).
+
+    Args:
+        args: Command to run.
+        limits: Limits to apply; None runs the command without limits.
+        input: Data sent to the process's stdin.
+        **kwargs: Further Popen arguments, such as text=True.
+
+    Raises:
+        LimitExceeded: If the process was killed after the time limit, or
+            failed to allocate memory under the memory limit. A process
+            ended by any other signal is returned as usual, with the signal
+            reported at the end of its stderr output.
+        OSError: If the command cannot be started.
+    """
+    limits = limits or ResourceLimits()
+    if input is not None:
+        kwargs["stdin"] = subprocess.PIPE
+    command = shlex.join(args)[:TRACE_COMMAND_LENGTH]
+    with (
+        span(os.path.basename(args[0]), "process", command=command),
+        subprocess.Popen(
+            args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+        ) as process,
+    ):
+        if limits.memory_mb is not None:
+            _set_memory_limit(process.pid, limits.memory_mb)
+        try:
+            stdout, stderr = process.communicate(input, timeout=limits.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise LimitExceeded(f"timed out after {limits.timeout:g}s") from None
+
+    if limits.memory_mb is not None and _out_of_memory(process.returncode, stderr):
+        raise LimitExceeded(f"over the memory limit of {limits.memory_mb}MB")
+    if process.returncode < 0:
+        stderr = _signal_error(process.returncode, stderr)
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
@@ -0,0 +1,108 @@
+"""Tests of the per-file time and memory limits."""
+
+import argparse
+import signal
+import sys
+import time
+
+import pytest
+
+from .limits import (
+    LimitExceeded,
+    ResourceLimits,
+    add_limit_arguments,
+    is_limit_error,
+    run_limited,
+)
+
+# Allocates 512MB and, like a C++ tool, aborts if that fails
+BAD_ALLOC = """\
+import os, sys
+try:
+    data = bytearray(512 * 1024 * 1024)
+except MemoryError:
+    sys.stderr.write("terminate called after throwing 'std::bad_alloc'\\n")
+    sys.stderr.flush()
+    os.abort()
+"""
+
+
+def _parse(*argv: str) -> argparse.Namespace:
+    """Parse limit options the way the scripts do."""
+    parser = argparse.ArgumentParser()
+    add_limit_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def test_limits_round_trip_through_the_options() -> None:
+    """Limits given on the command line are passed on unchanged."""
+    limits = ResourceLimits.from_args(
+        _parse("--timeout", "2.5", "--memory-limit", "64")
+    )
+
+    assert limits == ResourceLimits(2.5, 64)
+    assert ResourceLimits.from_args(_parse(*limits.to_args())) == limits
+    assert not ResourceLimits.from_args(_parse()).to_args()
+
+
+@pytest.mark.parametrize("argv", [["--timeout", "0"], ["--memory-limit", "x"]])
+def test_limits_must_be_positive(argv: list) -> None:
+    """Zero and non-numeric limits are rejected."""
+    with pytest.raises(SystemExit):
+        _parse(*argv)
+
+
+def test_batch_time_grows_with_the_files() -> None:
+    """A batch gets the time of all its files but the memory of one process."""
+    assert ResourceLimits(2, 64).for_batch(5) == ResourceLimits(10, 64)
+    assert ResourceLimits(2, 64).for_batch(0) == ResourceLimits(2, 64)
+    assert ResourceLimits(None, 64).for_batch(5) == ResourceLimits(None, 64)
+
+
+def test_run_without_limits_is_like_subprocess_run() -> None:
+    """Output and exit code are returned; input reaches stdin."""
+    result = run_limited(
+        [sys.executable, "-c", "import sys; print(sys.stdin.read()); sys.exit(3)"],
+        input="hello",
+        text=True,
+    )
+
+    assert (result.returncode, result.stdout) == (3, "hello\n")
+
+
+def test_timeout_kills_the_process() -> None:
+    """A process running past its time limit is killed and reported."""
+    start = time.monotonic()
+
+    with pytest.raises(LimitExceeded) as error:
+        run_limited(
+            [sys.executable, "-c", "import time; time.sleep(30)"],
+            ResourceLimits(timeout=0.5),
+        )
+
+    assert time.monotonic() - start < 10
+    assert str(error.value) == "Limit exceeded: timed out after 0.5s"
+    assert is_limit_error(str(error.value))
+    assert not is_limit_error("error: something else")
+    assert not is_limit_error(None)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs prlimit")
+def test_memory_limit_stops_allocations() -> None:
+    """A process failing to allocate under the memory limit is reported."""
+    with pytest.raises(LimitExceeded, match="memory limit of 200MB"):
+        run_limited([sys.executable, "-c", BAD_ALLOC], ResourceLimits(memory_mb=200))
+    # Without the limit, the allocation succeeds
+    assert run_limited([sys.executable, "-c", BAD_ALLOC]).returncode == 0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs POSIX signals")
+def test_other_signals_are_tool_errors() -> None:
+    """A process ended by another signal is returned with the signal named."""
+    result = run_limited(
+        [sys.executable, "-c", "import os; os.kill(os.getpid(), 15)"],
+        ResourceLimits(memory_mb=1024),
+    )
+
+    assert result.returncode == -signal.SIGTERM
+    assert result.stderr.endswith(b"error: terminated by SIGTERM\n")
@@ -5,39 +5,31 @@ file linters with consistent behavior and output formatting.
 """
 
 import argparse
+import contextlib
+import io
 import sys
+import time
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
+from .colors import Colors
 from .file_finder import find_files
+from .git_files import add_git_arguments
+from .history import history_path, record_run
+from .limits import LimitExceeded, ResourceLimits, add_limit_arguments
+from .parallel import make_batches
+from .result_cache import ResultCache, hash_parts
+from .timings import TimingDatabase
+from .tracing import add_trace_argument, span, tracing
 
-
-class Colors:
-    """ANSI color codes for terminal output."""
-
-    RESET = "\033[0m"
-    RED = "\033[31m"
-    GREEN = "\033[32m"
-    YELLOW = "\033[33m"
-    GRAY = "\033[90m"
-    WHITE = "\033[37m"
-    BOLD = "\033[1m"
-    DIM = "\033[2m"
-
-    @staticmethod
-    def supports_color() -> bool:
-        """Check if the terminal supports colors."""
-        return (
-            hasattr(sys.stdout, "isatty")
-            and sys.stdout.isatty()
-            and sys.platform != "win32"
-        ) or sys.platform == "win32"  # Windows Terminal supports ANSI colors
+# Result cache location shared by all linters
+CACHE_DIR = Path("build") / ".lint-cache"
 
 
 def fix_windows_console() -> None:
     """Fix Windows console encoding for Unicode symbols."""
     if sys.platform == "win32":
-        import io  # pylint: disable=import-outside-toplevel
-
         sys.stdout = io.TextIOWrapper(
             sys.stdout.buffer, encoding="utf-8", errors="replace"
         )
@@ -49,10 +41,22 @@ def fix_windows_console() -> None:
 class Linter(ABC):
     """Abstract base class for file linters.
 
-    Provides common argument parsing, file discovery, and result reporting.
-    Subclasses must implement check_installed() and lint_file().
+    Provides common argument parsing, file discovery, result caching and
+    result reporting. Subclasses must implement check_installed() and
+    lint_file(), and should override tool_version() and settings_files() so
+    that cached results are invalidated when the tool or its config changes.
+
+    Subclasses that run their tool through run_limited() with self.limits
+    set SUPPORTS_LIMITS, which adds the --timeout and --memory-limit
+    options, and report killed files with report_killed().
+
+    Subclasses whose lint_batch() checks many files per tool invocation set
+    BATCH_SIZE to the number of files passed to one lint_batch() call.
     """
 
+    SUPPORTS_LIMITS = False
+    BATCH_SIZE = 1
+
     def __init__(self, name: str, default_pattern: str):
         """Initialize the linter.
 
@@ -70,6 +74,18 @@ class Linter(ABC):
             "files", nargs="*", help="Files or glob patterns to lint"
         )
         self.parser.add_argument("--ignore", action="append", help="Patterns to ignore")
+        self.parser.add_argument(
+            "--no-cache", action="store_true", help="Do not use the result cache"
+        )
+        add_git_arguments(self.parser)
+        add_trace_argument(self.parser)
+        if self.SUPPORTS_LIMITS:
+            add_limit_arguments(self.parser)
+        self.limits = ResourceLimits()
+        # Files whose tool run was killed by one of the limits
+        self.killed: Set[str] = set()
+        # Files the tool failed on, whose results must not be cached
+        self.failed: Set[str] = set()
 
     @abstractmethod
     def check_installed(self) -> None:
@@ -90,6 +106,178 @@ class Linter(ABC):
             True if issues were found (and not fixed), False otherwise.
         """
 
+    def report_killed(self, file_path: str, exc: LimitExceeded) -> bool:
+        """Report a file whose tool run was killed by one of the limits.
+
+        Killed files are not cached and are counted separately in the
+        summary.
+
+        Returns:
+            True, since the file could not be checked.
+        """
+        self.killed.add(file_path)
+        print(f"{Colors.RED}  Killed: {file_path} ({exc}){Colors.RESET}")
+        return True
+
+    def report_tool_error(self, file_path: str, message: str) -> bool:
+        """Report a file the tool failed to check.
+
+        Failed files are not cached, so a transient failure of the tool is
+        retried on the next run instead of being replayed.
+
+        Returns:
+            True, since the file could not be checked.
+        """
+        self.failed.add(file_path)
+        print(f"{Colors.WHITE}{file_path}{Colors.RESET}")
+        print(f"{Colors.RED}Error: {message}{Colors.RESET}")
+        return True
+
+    def tool_version(self) -> Optional[str]:
+        """Return the version of the underlying tool, used in cache keys.
+
+        None means the version is unknown, which disables the result cache
+        for the run: results could otherwise be replayed after an upgrade.
+        """
+        return None
+
+    def settings_files(self) -> List[str]:
+        """Return the config files whose content affects lint results."""
+        return []
+
+    def _cache_base_key(self) -> Optional[str]:
+        """Hash the tool identity, version and settings into a base key.
+
+        Returns:
+            The key, or None if the tool version is unknown.
+        """
+        # Subclasses override tool_version(); only the base returns None
+        version = self.tool_version()  # pylint: disable=assignment-from-none
+        if version is None:
+            return None
+        parts = [self.name, version]
+        for settings_file in self.settings_files():
+            try:
+                with open(settings_file, "rb") as handle:
+                    content = handle.read()
+            except OSError:
+                content = b""
+            parts.extend([settings_file, content])
+        return hash_parts(*parts)
+
+    def lint_batch(self, file_paths: List[str], fix: bool) -> Iterator[bool]:
+        """Lint several files, yielding one result per file in order.
+
+        The default implementation calls lint_file() for each file.
+        Subclasses can override it to lint many files per tool invocation;
+        _lint_all() passes it at most BATCH_SIZE files at a time, and
+        whatever is printed while producing a file's result is attributed to
+        that file (for caching), so print each file's report right before
+        yielding its result.
+
+        Args:
+            file_paths: Paths of the files to lint.
+            fix: Whether to apply automatic fixes.
+
+        Yields:
+            True for each file with issues (not fixed), False otherwise.
+        """
+        for file_path in file_paths:
+            yield self.lint_file(file_path, fix)
+
+    def _lint_all(
+        self,
+        files: List[str],
+        fix: bool,
+        cache: Optional[ResultCache],
+        samples: Optional[Dict[str, float]] = None,
+    ) -> Iterator[bool]:
+        """Yield per-file results in order, replaying cached outcomes.
+
+        Files without a usable cached outcome go through lint_batch(). The
+        output printed for each of them is captured and stored with its
+        result. Outcomes are only stored in check mode; fix mode replays
+        cached clean outcomes, since there would be nothing to fix. Files
+        that were killed or that the tool failed on are never stored.
+
+        The time taken by each file that was actually linted is put in
+        samples, keyed like the timing history.
+        """
+        keys: Dict[str, str] = {}
+        replay: Dict[str, Dict[str, Any]] = {}
+        with span("cache lookup", files=len(files)):
+            base_key = self._cache_base_key() if cache is not None else None
+            if base_key is None:
+                cache = None
+            else:
+                for file_path in files:
+                    try:
+                        with open(file_path, "rb") as handle:
+                            keys[file_path] = hash_parts(
+                                base_key, file_path, handle.read()
+                            )
+                    except OSError:
+                        continue
+                    cached = cache.get(keys[file_path])
+                    if cached is not None and not (fix and cached.get("has_issues")):
+                        replay[file_path] = cached
+
+        misses = self._lint_misses([f for f in files if f not in replay], fix, samples)
+        for file_path in files:
+            if file_path in replay:
+                sys.stdout.write(replay[file_path].get("output", ""))
+                yield bool(replay[file_path].get("has_issues"))
+                continue
+
+            # _lint_misses() yields one result per file or raises
+            has_issues, output = next(misses)  # pylint: disable=stop-iteration-return
+            sys.stdout.write(output)
+
+            if (
+                cache is not None
+                and file_path in keys
+                and not fix
+                and file_path not in self.killed
+                and file_path not in self.failed
+            ):
+                cache.put(keys[file_path], {"has_issues": has_issues, "output": output})
+            yield has_issues
+
+    def _lint_misses(
+        self,
+        file_paths: List[str],
+        fix: bool,
+        samples: Optional[Dict[str, float]],
+    ) -> Iterator[Tuple[bool, str]]:
+        """Lint files in batches, yielding each result with its captured output.
+
+        Each batch of up to BATCH_SIZE files is one lint_batch() call. Its
+        time is split evenly across its files in samples, since the tool
+        checks them together; each batch's results are yielded once the
+        whole batch is done.
+        """
+        for batch in make_batches(file_paths, self.BATCH_SIZE):
+            outcomes: List[Tuple[bool, str]] = []
+            start_time = time.perf_counter()
+            results = self.lint_batch(batch, fix)
+            for file_path in batch:
+                buffer = io.StringIO()
+                with (
+                    span("lint file", file=file_path),
+                    contextlib.redirect_stdout(buffer),
+                ):
+                    has_issues = next(results, None)
+                if has_issues is None:
+                    raise RuntimeError(
+                        f"{self.name}: lint_batch() yielded too few results"
+                    )
+                outcomes.append((has_issues, buffer.getvalue()))
+            if samples is not None:
+                elapsed = (time.perf_counter() - start_time) / len(batch)
+                for file_path in batch:
+                    samples[TimingDatabase.key(Path(file_path))] = elapsed
+            yield from outcomes
+
     def run(self) -> None:
         """Run the linter on files matching the configured patterns.
 
@@ -97,13 +285,29 @@ class Linter(ABC):
         and exits with appropriate status code.
         """
         args = self.parser.parse_args()
-        self.check_installed()
+        with tracing(args.trace):
+            self._run(args)
+
+    def _run(self, args: argparse.Namespace) -> None:
+        """Lint the files selected by the parsed arguments and exit."""
+        with span("check installed"):
+            self.check_installed()
+        if self.SUPPORTS_LIMITS:
+            self.limits = ResourceLimits.from_args(args)
 
         patterns = args.files
         if not patterns:
             patterns = [self.default_pattern]
 
-        files = find_files(patterns, args.ignore)
+        with span("find files"):
+            files = find_files(
+                patterns,
+                args.ignore,
+                use_git=args.git,
+                include_untracked=args.untracked,
+                staged_only=args.staged,
+                since=args.since,
+            )
 
         if not files:
             print(f"{Colors.YELLOW}No {self.name} files found to lint{Colors.RESET}")
@@ -114,14 +318,35 @@ class Linter(ABC):
 
         has_issues = False
         file_count = 0
+        cache = None if args.no_cache else ResultCache(CACHE_DIR / self.name)
 
-        for file_path in files:
-            file_count += 1
-            if self.lint_file(file_path, args.fix):
-                has_issues = True
+        start_time = time.time()
+        samples: Dict[str, float] = {}
+        with span("lint", files=len(files)):
+            for file_has_issues in self._lint_all(files, args.fix, cache, samples):
+                file_count += 1
+                if file_has_issues:
+                    has_issues = True
+
+        if cache is not None:
+            with span("prune cache"):
+                cache.prune()
+        with span("record history"):
+            record_run(
+                history_path(CACHE_DIR.parent),
+                self.name,
+                time.time() - start_time,
+                file_count,
+                samples,
+            )
 
         print("")
         print(f"Checked {file_count} file(s)")
+        if self.killed:
+            print(
+                f"{Colors.RED}[FAIL] {len(self.killed)} file(s) timed out or went "
+                f"over the memory limit{Colors.RESET}"
+            )
 
         if has_issues:
             if args.fix:
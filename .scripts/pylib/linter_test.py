@@ -0,0 +1,87 @@
+"""Tests of the batching, caching and timing of the Linter base class."""
+
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import pytest
+
+from .linter import Linter
+from .result_cache import ResultCache
+
+
+class BatchLinter(Linter):
+    """Linter whose tool spends all of a batch's time before the first file."""
+
+    BATCH_SIZE = 2
+
+    def __init__(self) -> None:
+        super().__init__("batch-test", "**/*.txt")
+        self.batches: List[List[str]] = []
+
+    def check_installed(self) -> None:
+        """Nothing to install."""
+
+    def tool_version(self) -> str:
+        return "1.0"
+
+    def lint_file(self, file_path: str, fix: bool) -> bool:
+        return next(self.lint_batch([file_path], fix))
+
+    def lint_batch(self, file_paths: List[str], fix: bool) -> Iterator[bool]:
+        self.batches.append(list(file_paths))
+        time.sleep(0.2)
+        for file_path in file_paths:
+            print(f"checked {file_path}")
+            yield "bad" in file_path
+
+
+@pytest.fixture(name="files")
+def fixture_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Three files to lint in the current directory."""
+    monkeypatch.chdir(tmp_path)
+    names = ["a.txt", "bad.txt", "c.txt"]
+    for name in names:
+        Path(name).write_text(name, encoding="utf-8")
+    return names
+
+
+def test_batch_time_is_split_across_its_files(files: List[str]) -> None:
+    """Every file of a batch gets an equal share of the batch's time."""
+    linter = BatchLinter()
+    samples: Dict[str, float] = {}
+
+    results = list(linter._lint_all(files, False, None, samples))  # pylint: disable=protected-access
+
+    assert results == [False, True, False]
+    assert linter.batches == [["a.txt", "bad.txt"], ["c.txt"]]
+    assert samples["a.txt"] == samples["bad.txt"]
+    assert 0.08 < samples["a.txt"] < samples["c.txt"]
+
+
+def test_results_are_replayed_from_the_cache(
+    files: List[str], capsys: pytest.CaptureFixture[str]
+) -> None:
+    """A second run replays each file's result and output without the tool."""
+    cache = ResultCache(Path("cache"))
+    list(BatchLinter()._lint_all(files, False, cache))  # pylint: disable=protected-access
+    capsys.readouterr()
+
+    linter = BatchLinter()
+    results = list(linter._lint_all(files, False, cache))  # pylint: disable=protected-access
+
+    assert results == [False, True, False]
+    assert not linter.batches
+    assert capsys.readouterr().out.splitlines() == [f"checked {name}" for name in files]
+
+
+def test_unknown_tool_version_disables_the_cache() -> None:
+    """A linter that does not report its tool version is never cached."""
+
+    class UnversionedLinter(BatchLinter):
+        """Linter that keeps the default tool_version()."""
+
+        tool_version = Linter.tool_version
+
+    assert UnversionedLinter()._cache_base_key() is None  # pylint: disable=protected-access
+    assert BatchLinter()._cache_base_key() is not None  # pylint: disable=protected-access
@@ -0,0 +1,332 @@
+"""Run several file tools as one pipeline over a single file discovery.
+
+Running prettier, ruff, pylint, ESLint and the lint scripts one after
+another makes every tool start its own process tree and walk the tree
+again. Here the caller discovers the files once (see discovery_patterns());
+each Tool is given the discovered files with one of its extensions, and
+the tools run as a dependency graph:
+
+- When files are modified, a tool waits for every earlier tool that shares
+  files with it. Formatters come first, so linters see formatted code and
+  two tools never rewrite the same file at the same time.
+- Everything else runs concurrently, as long as the running tools fit in
+  the global job budget. A tool that parallelizes itself (jobs_option) is
+  granted the part of the budget that is free when it starts.
+
+The output of each tool is captured and printed as one block when the tool
+finishes, followed by a combined summary of all tools.
+"""
+
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .colors import Colors
+from .parallel import MAX_ARGV_CHARS, make_batches
+from .tracing import span
+
+STATUS_OK = "ok"
+STATUS_FAIL = "fail"
+STATUS_SKIP = "skip"
+
+STATUS_LABELS = {
+    STATUS_OK: (Colors.GREEN, "[OK]  "),
+    STATUS_FAIL: (Colors.RED, "[FAIL]"),
+    STATUS_SKIP: (Colors.GRAY, "[SKIP]"),
+}
+
+
+@dataclass(frozen=True)
+class Tool:  # pylint: disable=too-many-instance-attributes
+    """A command run on all discovered files with one of its extensions.
+
+    Attributes:
+        name: Name shown in the output.
+        extensions: Lower-case file extensions the tool handles.
+        command: Command line that only checks; the files are appended.
+        fix_command: Command line that modifies the files.
+        formatter: Whether the tool is a formatter; formatters are planned
+            before the linters of the same files.
+        jobs_option: Option taking the tool's own worker count (e.g.
+            "--jobs"), for tools that run in parallel themselves.
+        max_chars: Command-line length budget of one invocation.
+        walks_tree: Whether the tool is given "." instead of the files when
+            the whole tree is checked, so that it applies its own ignore
+            files exactly as when it is run on its own. Tools that handle
+            explicitly listed files differently get this.
+    """
+
+    name: str
+    extensions: Tuple[str, ...]
+    command: Tuple[str, ...]
+    fix_command: Tuple[str, ...]
+    formatter: bool = False
+    jobs_option: Optional[str] = None
+    max_chars: int = MAX_ARGV_CHARS
+    walks_tree: bool = False
+
+    def handles(self, path: str) -> bool:
+        """Check if the tool handles a file."""
+        return os.path.splitext(path)[1].lower() in self.extensions
+
+
+@dataclass
+class Step:
+    """A tool planned on its files.
+
+    Attributes:
+        tool: The tool to run.
+        files: Files of the tool.
+        after: Names of the steps that have to finish first.
+        targets: Arguments naming the files on the tool's command line:
+            the files themselves, or "." for a tool that walks the tree.
+    """
+
+    tool: Tool
+    files: List[str]
+    after: List[str] = field(default_factory=list)
+    targets: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StepResult:
+    """Outcome of one step."""
+
+    name: str
+    files: int
+    status: str
+    elapsed_ms: int = 0
+    jobs: int = 0
+    output: str = ""
+
+
+def discovery_patterns(tools: Sequence[Tool]) -> List[str]:
+    """Return find_files() patterns matching every file the tools handle.
+
+    Besides the usual recursive pattern, each extension also gets patterns
+    for dotfiles and for top-level hidden directories such as .scripts,
+    which glob matching would skip otherwise.
+    """
+    extensions = sorted({ext for tool in tools for ext in tool.extensions})
+    patterns = []
+    for ext in extensions:
+        patterns.extend([f"**/*{ext}", f"**/.*{ext}", f".*/**/*{ext}"])
+    return patterns
+
+
+def plan_steps(
+    tools: Sequence[Tool],
+    files: Sequence[str],
+    fix: bool,
+    whole_tree: bool = False,
+) -> List[Step]:
+    """Give each tool its files and order the steps that modify files.
+
+    Args:
+        tools: Tools to run.
+        files: Discovered files, of any type.
+        fix: Whether the tools modify files. Without fixes, no step depends
+            on another one.
+        whole_tree: Whether files are all the files of the tree, rather than
+            a selection such as the staged files; tools that walk the tree
+            are then run on "." (see Tool.walks_tree).
+
+    Returns:
+        One step per tool, formatters first.
+    """
+    ordered = sorted(tools, key=lambda tool: not tool.formatter)
+    steps = []
+    for tool in ordered:
+        step = Step(tool, [path for path in files if tool.handles(path)])
+        step.targets = ["."] if whole_tree and tool.walks_tree else step.files
+        steps.append(step)
+    if fix:
+        for index, step in enumerate(steps):
+            shared = set(step.files)
+            step.after = [
+                earlier.tool.name
+                for earlier in steps[:index]
+                if shared.intersection(earlier.files)
+            ]
+    return steps
+
+
+def run_step(step: Step, fix: bool, jobs: int) -> StepResult:
+    """Run the tool of a step on its targets.
+
+    The targets are split over several invocations only when the command
+    line would get too long for the platform.
+
+    Args:
+        step: The step to run.
+        fix: Whether to run the tool's fix command.
+        jobs: Worker count granted to tools with a jobs_option.
+    """
+    tool = step.tool
+    command = list(tool.fix_command if fix else tool.command)
+    if tool.jobs_option:
+        command += [tool.jobs_option, str(jobs)]
+    executable = shutil.which(command[0])
+    if executable is None:
+        return StepResult(
+            tool.name,
+            len(step.files),
+            STATUS_FAIL,
+            jobs=jobs,
+            output=f"{command[0]} is not installed or not on PATH\n",
+        )
+    command[0] = executable
+
+    outputs = []
+    failed = False
+    start = time.perf_counter()
+    max_chars = tool.max_chars - len(" ".join(command))
+    with span(tool.name, "process", files=len(step.files), jobs=jobs):
+        for batch in make_batches(step.targets, len(step.targets), max_chars):
+            result = subprocess.run(
+                command + batch,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                check=False,
+            )
+            outputs.append(result.stdout)
+            failed = failed or result.returncode != 0
+    return StepResult(
+        tool.name,
+        len(step.files),
+        STATUS_FAIL if failed else STATUS_OK,
+        int((time.perf_counter() - start) * 1000),
+        jobs,
+        "".join(outputs),
+    )
+
+
+class _Scheduler:
+    """Starts the steps whose dependencies are done while jobs are free."""
+
+    def __init__(self, steps: Sequence[Step], jobs: int, fix: bool):
+        # Single-job tools start first; self-parallel ones take what is left
+        self.pending = sorted(steps, key=lambda step: step.tool.jobs_option is not None)
+        self.jobs = max(1, jobs)
+        self.free = self.jobs
+        self.fix = fix
+        self.done: Dict[str, StepResult] = {}
+        self.running: Dict["Future[StepResult]", int] = {}
+
+    def start_ready(self, executor: ThreadPoolExecutor) -> List[StepResult]:
+        """Start every ready step that fits in the free jobs.
+
+        Returns:
+            Results of the ready steps without files, which are skipped.
+        """
+        skipped = []
+        for step in list(self.pending):
+            if any(name not in self.done for name in step.after):
+                continue
+            if not step.files:
+                self.pending.remove(step)
+                result = StepResult(step.tool.name, 0, STATUS_SKIP)
+                self.done[result.name] = result
+                skipped.append(result)
+            elif self.free > 0:
+                self.pending.remove(step)
+                grant = self.free if step.tool.jobs_option else 1
+                self.free -= grant
+                future = executor.submit(run_step, step, self.fix, grant)
+                self.running[future] = grant
+        return skipped
+
+    def run(self, on_finish: Callable[[StepResult], None]) -> List[StepResult]:
+        """Run all steps, calling on_finish with each result as it arrives."""
+        with ThreadPoolExecutor(
+            max_workers=self.jobs, thread_name_prefix="step"
+        ) as executor:
+            while self.pending or self.running:
+                finished = self.start_ready(executor)
+                if self.running and not finished:
+                    completed, _ = wait(self.running, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        self.free += self.running.pop(future)
+                        finished.append(future.result())
+                for result in finished:
+                    self.done[result.name] = result
+                    on_finish(result)
+        return list(self.done.values())
+
+
+def run_pipeline(
+    steps: Sequence[Step],
+    jobs: int,
+    fix: bool,
+    on_finish: Callable[[StepResult], None],
+) -> List[StepResult]:
+    """Run planned steps concurrently within a global job budget.
+
+    Args:
+        steps: Steps from plan_steps().
+        jobs: Maximum number of jobs in use at a time.
+        fix: Whether to run the tools' fix commands.
+        on_finish: Called on the calling thread with each result, in the
+            order the steps finish.
+
+    Returns:
+        The results of all steps, in the order they finished.
+    """
+    return _Scheduler(steps, jobs, fix).run(on_finish)
+
+
+def print_step_output(result: StepResult, use_color: bool) -> None:
+    """Print the header and captured output of a finished step."""
+    if result.status == STATUS_SKIP:
+        return
+    header = f"==> {result.name} ({result.files} file(s), {result.elapsed_ms}ms)"
+    if use_color:
+        color = STATUS_LABELS[result.status][0]
+        print(f"{Colors.BOLD}{color}{header}{Colors.RESET}")
+    else:
+        print(header)
+    output = result.output.rstrip()
+    if output:
+        print(output)
+    print()
+
+
+def print_pipeline_summary(
+    results: Sequence[StepResult], total_time_ms: int, use_color: bool
+) -> None:
+    """Print one line per step and the wall time of the whole pipeline.
+
+    The summed time of the steps is shown next to the wall-clock time, so
+    the gain of running them concurrently is visible.
+    """
+    busy_ms = sum(result.elapsed_ms for result in results)
+    width = max((len(result.name) for result in results), default=0)
+    header = f"Pipeline completed in {total_time_ms}ms!"
+    busy = f" ({busy_ms}ms summed across tools)"
+    if use_color:
+        print(f"{Colors.BOLD}{header}{Colors.RESET}{Colors.DIM}{busy}{Colors.RESET}")
+    else:
+        print(header + busy)
+
+    for result in sorted(results, key=lambda result: result.name):
+        color, label = STATUS_LABELS[result.status]
+        line = f"{result.name:<{width}}  {result.files:>5} file(s)"
+        if result.status != STATUS_SKIP:
+            line += f"  {result.elapsed_ms:>7}ms"
+        if result.jobs > 1:
+            line += f"  ({result.jobs} jobs)"
+        if use_color:
+            print(f"  {color}{label}{Colors.RESET} {line}")
+        else:
+            print(f"  {label} {line}")
+
+
+def pipeline_failed(results: Sequence[StepResult]) -> bool:
+    """Check if any step failed."""
+    return any(result.status == STATUS_FAIL for result in results)
@@ -0,0 +1,172 @@
+"""Tests of planning and running the tool pipeline."""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .orchestrator import (
+    STATUS_FAIL,
+    STATUS_OK,
+    STATUS_SKIP,
+    StepResult,
+    Tool,
+    plan_steps,
+    run_pipeline,
+)
+
+FILES = ["a.py", "b.json", "c.sh", "d.md"]
+
+# Stand-in for a tool: sleeps, then appends "<name> <start> <end>" to the
+# log given as first argument; fails if a file name starts with "fail"
+FAKE_TOOL = """\
+import sys, time
+log, name, *files = sys.argv[1:]
+start = time.monotonic()
+time.sleep(0.2)
+with open(log, "a", encoding="utf-8") as handle:
+    handle.write(f"{name} {start} {time.monotonic()}\\n")
+sys.exit(1 if any(file.startswith("fail") for file in files) else 0)
+"""
+
+
+def _tool(name: str, extensions: Tuple[str, ...], **kwargs) -> Tool:
+    """A tool that only names itself, for planning."""
+    return Tool(name, extensions, (name,), (name, "--fix"), **kwargs)
+
+
+def test_formatters_are_planned_first() -> None:
+    """Each tool gets its files; formatters come before linters."""
+    tools = [
+        _tool("pylint", (".py",)),
+        _tool("ruff", (".py",), formatter=True),
+        _tool("shlint", (".sh",)),
+    ]
+
+    steps = plan_steps(tools, FILES, fix=False)
+
+    assert [(step.tool.name, step.files) for step in steps] == [
+        ("ruff", ["a.py"]),
+        ("pylint", ["a.py"]),
+        ("shlint", ["c.sh"]),
+    ]
+    assert all(not step.after for step in steps)
+
+
+def test_fixes_wait_for_tools_sharing_files() -> None:
+    """With fixes, a tool waits for every earlier tool sharing a file."""
+    tools = [
+        _tool("prettier", (".json", ".md"), formatter=True),
+        _tool("eslint", (".json",)),
+        _tool("ruff", (".py",), formatter=True),
+        _tool("pylint", (".py",)),
+        _tool("markdown", (".md",)),
+    ]
+
+    steps = plan_steps(tools, FILES, fix=True)
+
+    assert {step.tool.name: step.after for step in steps} == {
+        "prettier": [],
+        "ruff": [],
+        "eslint": ["prettier"],
+        "pylint": ["ruff"],
+        "markdown": ["prettier"],
+    }
+
+
+def test_tree_walkers_get_only_a_whole_tree() -> None:
+    """A selection of files is passed as is, even to tree-walking tools."""
+    tools = [_tool("eslint", (".json",), walks_tree=True), _tool("ruff", (".py",))]
+
+    whole = plan_steps(tools, FILES, fix=False, whole_tree=True)
+    selected = plan_steps(tools, FILES, fix=False)
+
+    assert [step.targets for step in whole] == [["."], ["a.py"]]
+    assert [step.targets for step in selected] == [["b.json"], ["a.py"]]
+    assert [step.files for step in whole] == [["b.json"], ["a.py"]]
+
+
+def _run_fake(
+    tmp_path: Path, tools: List[Tool], files: List[str], fix: bool, jobs: int
+) -> Tuple[Dict[str, StepResult], Dict[str, Tuple[float, float]]]:
+    """Run fake tools; returns their results and (start, end) times."""
+    script = tmp_path / "tool.py"
+    script.write_text(FAKE_TOOL, encoding="utf-8")
+    log = tmp_path / "log"
+    tools = [
+        Tool(
+            tool.name,
+            tool.extensions,
+            (sys.executable, str(script), str(log), tool.name),
+            (sys.executable, str(script), str(log), tool.name),
+            formatter=tool.formatter,
+        )
+        for tool in tools
+    ]
+    finished: List[str] = []
+    results = run_pipeline(
+        plan_steps(tools, files, fix), jobs, fix, lambda r: finished.append(r.name)
+    )
+    assert finished == [result.name for result in results]
+    times = {}
+    if log.exists():
+        for line in log.read_text(encoding="utf-8").splitlines():
+            name, start, end = line.split()
+            times[name] = (float(start), float(end))
+    return {result.name: result for result in results}, times
+
+
+def test_pipeline_follows_the_dependencies(tmp_path: Path) -> None:
+    """Dependent steps start after their dependencies; others overlap."""
+    tools = [
+        _tool("format", (".py",), formatter=True),
+        _tool("lint", (".py",)),
+        _tool("shell", (".sh",)),
+        _tool("none", (".ps1",)),
+    ]
+    start = time.monotonic()
+
+    results, times = _run_fake(tmp_path, tools, ["a.py", "c.sh"], True, 4)
+
+    assert times["lint"][0] >= times["format"][1]
+    assert times["shell"][0] < times["format"][1]
+    assert {name: result.status for name, result in results.items()} == {
+        "format": STATUS_OK,
+        "lint": STATUS_OK,
+        "shell": STATUS_OK,
+        "none": STATUS_SKIP,
+    }
+    assert time.monotonic() - start < 2
+
+
+def test_pipeline_stays_within_the_jobs(tmp_path: Path) -> None:
+    """With one job, independent steps run one after the other."""
+    tools = [_tool("first", (".py",)), _tool("second", (".sh",))]
+
+    results, times = _run_fake(tmp_path, tools, ["a.py", "c.sh"], False, 1)
+
+    first, second = sorted(times.values())
+    assert second[0] >= first[1]
+    assert [result.status for result in results.values()] == [STATUS_OK] * 2
+
+
+def test_failing_and_missing_tools_fail_the_step(tmp_path: Path) -> None:
+    """A non-zero exit or a missing executable fails only that step."""
+    script = tmp_path / "tool.py"
+    script.write_text(FAKE_TOOL, encoding="utf-8")
+    command = (sys.executable, str(script), str(tmp_path / "log"), "fails")
+    tools = [
+        Tool("fails", (".sh",), command, command),
+        Tool("missing", (".py",), ("no-such-tool-here",), ("no-such-tool-here",)),
+    ]
+
+    steps = plan_steps(tools, ["fail.sh", "a.py", "c.sh"], fix=False)
+    results = {
+        result.name: result
+        for result in run_pipeline(steps, 2, False, lambda result: None)
+    }
+
+    assert results["fails"].status == STATUS_FAIL
+    assert results["fails"].files == 2
+    assert results["missing"].status == STATUS_FAIL
+    assert "not installed" in results["missing"].output
@@ -7,9 +7,10 @@ tools with consistent colored terminal output.
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence
 
-from .linter import Colors
+from .colors import Colors
+from .parallel import estimate_wall_time
 
 
 @dataclass
@@ -63,13 +64,52 @@ def print_file_unchanged(
         print(f"  {file} {time_str}{suffix}")
 
 
-def print_summary_header(mode: str, total_time_ms: int, use_color: bool) -> None:
-    """Print summary header with timing."""
+def print_summary_header(
+    mode: str,
+    total_time_ms: int,
+    use_color: bool,
+    busy_time_ms: Optional[int] = None,
+) -> None:
+    """Print summary header with timing.
+
+    When busy_time_ms is given, the summed per-file time is shown next to the
+    wall-clock time so the speedup of a parallel run is visible.
+    """
     print()
+    busy = ""
+    if busy_time_ms is not None:
+        busy = f" ({busy_time_ms}ms summed across files)"
     if use_color:
-        print(f"{Colors.BOLD}{mode} completed in {total_time_ms}ms!{Colors.RESET}")
+        print(
+            f"{Colors.BOLD}{mode} completed in {total_time_ms}ms!{Colors.RESET}"
+            f"{Colors.DIM}{busy}{Colors.RESET}"
+        )
     else:
-        print(f"{mode} completed in {total_time_ms}ms!")
+        print(f"{mode} completed in {total_time_ms}ms!{busy}")
+
+
+def print_estimate(
+    costs: Sequence[float], unknown: int, jobs: int, use_color: bool
+) -> None:
+    """Print the predicted duration of a run from earlier timings.
+
+    Args:
+        costs: Expected time of each item, as from TimingDatabase.costs().
+        unknown: Number of items without timing history.
+        jobs: Number of parallel workers.
+        use_color: Whether to use colored output.
+
+    Nothing is printed if no item has been timed before.
+    """
+    if unknown >= len(costs):
+        return
+    seconds = estimate_wall_time(costs, jobs)
+    note = f", {unknown} of {len(costs)} not timed before" if unknown else ""
+    message = f"Estimated time: {seconds:.1f}s with {jobs} job(s){note}"
+    if use_color:
+        print(f"{Colors.DIM}{message}{Colors.RESET}")
+    else:
+        print(message)
 
 
 def print_error_count(error_count: int, use_color: bool) -> None:
@@ -83,6 +123,15 @@ def print_error_count(error_count: int, use_color: bool) -> None:
         print(f"✖ {error_count} file(s) had errors", file=sys.stderr)
 
 
+def print_limit_count(count: int, use_color: bool) -> None:
+    """Print the number of files whose tool run was killed by a limit."""
+    message = f"✖ {count} file(s) timed out or went over the memory limit"
+    if use_color:
+        print(f"{Colors.RED}{message}{Colors.RESET}", file=sys.stderr)
+    else:
+        print(message, file=sys.stderr)
+
+
 def print_needs_fixing(count: int, fix_hint: str, use_color: bool) -> None:
     """Print message about files that need fixing."""
     if use_color:
@@ -0,0 +1,140 @@
+"""Parallel execution utilities for file processing tools.
+
+This module provides a bounded worker pool that runs a per-file function
+concurrently while handing results back in input order, so tool output
+stays deterministic regardless of how many workers are used. Given the
+expected cost of each item, the most expensive items are started first.
+"""
+
+import argparse
+import heapq
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Command-line length budget per batch (Windows caps CreateProcess at 32767)
+MAX_ARGV_CHARS = 32000 if sys.platform == "win32" else 131072
+
+
+def default_jobs() -> int:
+    """Return the default number of parallel jobs (the CPU count)."""
+    return os.cpu_count() or 1
+
+
+def parse_jobs(value: str) -> int:
+    """Parse a --jobs value, treating 0 or less as "use all CPUs".
+
+    Args:
+        value: The raw command-line value.
+
+    Returns:
+        Number of jobs to run, always at least 1.
+
+    Raises:
+        ValueError: If the value is not an integer.
+    """
+    jobs = int(value)
+    return jobs if jobs > 0 else default_jobs()
+
+
+def add_jobs_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the standard -j/--jobs option to an argument parser."""
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=parse_jobs,
+        default=default_jobs(),
+        help="Number of parallel jobs (default: CPU count, 0 = CPU count)",
+    )
+
+
+def run_ordered(
+    func: Callable[[T], R],
+    items: Sequence[T],
+    jobs: int,
+    costs: Optional[Sequence[float]] = None,
+) -> Iterator[R]:
+    """Run func over items on up to `jobs` threads, yielding results in order.
+
+    The work is subprocess-bound (the GIL is released while waiting on the
+    child), so threads are enough to keep every core busy.
+
+    Args:
+        func: Function to apply to each item.
+        items: Items to process.
+        jobs: Maximum number of concurrent workers.
+        costs: Expected cost of each item. If given, items are started in
+            decreasing order of cost (longest processing time first), so a
+            slow item cannot start last and leave the other workers idle.
+            Results are still yielded in input order.
+
+    Yields:
+        func(item) for each item, in the same order as items.
+    """
+    if jobs <= 1 or len(items) <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ThreadPoolExecutor(
+        max_workers=min(jobs, len(items)), thread_name_prefix="job"
+    ) as executor:
+        if costs is None:
+            yield from executor.map(func, items)
+            return
+
+        # The executor starts submitted work in submission order
+        order = sorted(range(len(items)), key=lambda index: -costs[index])
+        futures = [executor.submit(func, items[index]) for index in order]
+        by_index = dict(zip(order, futures, strict=True))
+        for index in range(len(items)):
+            yield by_index.pop(index).result()
+
+
+def estimate_wall_time(costs: Sequence[float], jobs: int) -> float:
+    """Predict the wall time of running items with run_ordered and costs.
+
+    Simulates the longest-processing-time-first schedule: each item, from
+    the most to the least expensive, goes to the worker that frees up first.
+
+    Returns:
+        The time at which the last worker finishes.
+    """
+    workers = [0.0] * max(1, min(jobs, len(costs)))
+    for cost in sorted(costs, reverse=True):
+        heapq.heapreplace(workers, workers[0] + cost)
+    return max(workers)
+
+
+def make_batches(
+    items: Sequence[T], batch_size: int, max_chars: int = MAX_ARGV_CHARS
+) -> List[List[T]]:
+    """Split command-line items into batches bounded by count and length.
+
+    Args:
+        items: Items to split (typically file paths), in order.
+        batch_size: Maximum number of items per batch.
+        max_chars: Maximum combined length of the items per batch.
+
+    Returns:
+        Batches of consecutive items, preserving input order.
+    """
+    batches: List[List[T]] = []
+    batch: List[T] = []
+    batch_chars = 0
+
+    for item in items:
+        item_chars = len(str(item)) + 1
+        if batch and (len(batch) >= batch_size or batch_chars + item_chars > max_chars):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append(item)
+        batch_chars += item_chars
+
+    if batch:
+        batches.append(batch)
+    return batches
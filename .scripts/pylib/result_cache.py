@@ -0,0 +1,133 @@
+"""Persistent on-disk cache for per-file tool results.
+
+This module provides a small content-addressed store: callers hash
+everything that can influence a tool's output into a key, and the stored
+result is replayed on later runs instead of launching the tool again.
+The cache is bounded in size and evicts least-recently-used entries.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# After eviction the cache is trimmed to this fraction of its maximum size,
+# so that pruning does not have to run on every invocation
+PRUNE_TARGET_RATIO = 0.8
+
+# Temporary files older than this (in seconds) were left behind by a
+# writer that died, and are removed by prune()
+ORPHAN_TMP_AGE = 60 * 60
+
+
+def hash_parts(*parts: Union[str, bytes]) -> str:
+    """Hash a sequence of strings/bytes into a hex digest.
+
+    Each part is length-prefixed, so ("ab", "c") and ("a", "bc") differ.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of JSON results stored on disk.
+
+    Entries live in `<directory>/<key[:2]>/<key>.json`. Reads refresh the
+    entry's mtime, which prune() uses as the recency order. All operations
+    are best-effort: I/O errors are treated as cache misses.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize the cache.
+
+        Args:
+            directory: Directory holding the cache entries.
+            max_bytes: Maximum total size of the entries before eviction.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result for key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result under key, replacing any previous entry atomically."""
+        path = self._entry_path(key)
+        tmp_name = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                json.dump(value, tmp)
+            os.replace(tmp_name, path)
+            tmp_name = None
+        except (OSError, TypeError, ValueError):
+            pass
+        finally:
+            if tmp_name is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_name)
+
+    def _remove_orphans(self) -> None:
+        """Remove temporary files left behind by writers that died."""
+        cutoff = time.time() - ORPHAN_TMP_AGE
+        for path in self.directory.glob("*/*.tmp"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def prune(self) -> int:
+        """Evict least-recently-used entries if the cache exceeds its size.
+
+        Stale temporary files of interrupted writes are removed as well.
+
+        Returns:
+            Number of entries removed.
+        """
+        self._remove_orphans()
+        entries: List[Tuple[float, int, Path]] = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        target = self.max_bytes * PRUNE_TARGET_RATIO
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
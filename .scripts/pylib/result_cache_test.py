@@ -0,0 +1,68 @@
+"""Tests of the on-disk result cache."""
+
+import os
+import time
+from pathlib import Path
+
+from .result_cache import ORPHAN_TMP_AGE, ResultCache, hash_parts
+
+
+def test_results_round_trip(tmp_path: Path) -> None:
+    """Stored results are read back; unknown keys are misses."""
+    cache = ResultCache(tmp_path)
+    key = hash_parts("tool", "file")
+
+    cache.put(key, {"ok": True, "output": "line\n"})
+
+    assert cache.get(key) == {"ok": True, "output": "line\n"}
+    assert cache.get(hash_parts("tool", "other")) is None
+
+
+def test_parts_are_length_prefixed() -> None:
+    """Moving a boundary between parts changes the key."""
+    assert hash_parts("ab", "c") != hash_parts("a", "bc")
+    assert hash_parts("ab", "c") == hash_parts(b"ab", b"c")
+
+
+def test_failed_put_leaves_no_temporary_file(tmp_path: Path) -> None:
+    """A value that cannot be stored is dropped without leftovers."""
+    cache = ResultCache(tmp_path)
+    key = hash_parts("unserializable")
+
+    cache.put(key, {"value": object()})
+
+    assert cache.get(key) is None
+    assert not list(tmp_path.glob("*/*"))
+
+
+def test_prune_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Reading an entry keeps it; the oldest entries go first."""
+    cache = ResultCache(tmp_path, max_bytes=200)
+    keys = [hash_parts(str(index)) for index in range(4)]
+    for age, key in enumerate(reversed(keys)):
+        cache.put(key, {"output": "x" * 50})
+        stamp = time.time() - 100 * (age + 1)
+        os.utime(cache._entry_path(key), (stamp, stamp))  # pylint: disable=protected-access
+    assert cache.get(keys[0]) is not None
+
+    assert cache.prune() == 2
+
+    assert [cache.get(key) is not None for key in keys] == [True, False, False, True]
+    assert cache.prune() == 0
+
+
+def test_prune_removes_orphaned_temporary_files(tmp_path: Path) -> None:
+    """Stale temporary files are removed; ones still being written stay."""
+    cache = ResultCache(tmp_path)
+    (tmp_path / "ab").mkdir()
+    stale = tmp_path / "ab" / "stale.tmp"
+    fresh = tmp_path / "ab" / "fresh.tmp"
+    stale.write_text("{", encoding="utf-8")
+    fresh.write_text("{", encoding="utf-8")
+    stamp = time.time() - ORPHAN_TMP_AGE - 1
+    os.utime(stale, (stamp, stamp))
+
+    cache.prune()
+
+    assert not stale.exists()
+    assert fresh.exists()
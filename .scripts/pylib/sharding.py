@@ -0,0 +1,322 @@
+"""Splitting a tool run across CI machines and merging the results.
+
+With --shard I/N, each of N machines processes its own part of the file
+list. The parts are balanced by expected cost (the timing history given
+with --shard-timings or found in the build directory, or else the file
+size) and only depend on the file list and the costs, so every machine
+computes the same partition without coordinating. Files a tool processes
+together, such as a header and the source it is linted through, are kept
+on the same shard. Each shard writes its per-file results to a JSON file, and
+the `merge` action of the tool combines the files of all shards into one
+summary and exit code.
+"""
+
+import argparse
+import heapq
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .atomic_write import write_atomic
+from .colors import Colors
+from .output import FileResult
+from .timings import TimingDatabase
+
+# Bumped whenever the results file layout changes
+RESULTS_VERSION = 1
+
+SHARD_RE = re.compile(r"^(\d+)/(\d+)$")
+
+# 1-based shard index and shard count
+Shard = Tuple[int, int]
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse a --shard value of the form I/N, with 1 <= I <= N.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is malformed.
+    """
+    match = SHARD_RE.match(value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"expected I/N, got {value!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 1..{count}")
+    return index, count
+
+
+def add_shard_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --shard, --shard-timings and --results options to a parser.
+
+    Also adds the results files taken by the merge action, as a positional
+    argument following the action argument the parser must already have.
+    """
+    parser.add_argument(
+        "results_files", nargs="*", type=Path, metavar="RESULTS", help=argparse.SUPPRESS
+    )
+    group = parser.add_argument_group("sharding")
+    group.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="Only process the I-th of N cost-balanced parts of the files",
+    )
+    group.add_argument(
+        "--shard-timings",
+        type=Path,
+        metavar="FILE",
+        help="Timing history to balance shards by; must be the same file on "
+        "every shard (default: the tool's history in the build directory if "
+        "it exists, else balance by file size)",
+    )
+    group.add_argument(
+        "--results",
+        type=Path,
+        metavar="FILE",
+        help="Write per-file results as JSON, for the merge action",
+    )
+
+
+def _file_size(file: Path) -> float:
+    """Return the size of a file, or 0 if it cannot be read."""
+    try:
+        return float(file.stat().st_size)
+    except OSError:
+        return 0.0
+
+
+def shard_files(
+    files: Sequence[Path],
+    shard: Shard,
+    timings: Optional[TimingDatabase] = None,
+    groups: Optional[Sequence[Sequence[Path]]] = None,
+) -> List[Path]:
+    """Return the files of one shard, keeping their order.
+
+    Groups are assigned from the most to the least expensive, each to the
+    shard with the lowest total cost so far (then the fewest groups, then
+    the lowest index). Equal costs are ordered by path, so the partition
+    is deterministic.
+
+    Args:
+        files: All files to process, the same list on every shard.
+        shard: The 1-based shard index and the shard count.
+        timings: Timing history to take the costs from. Without it, or if
+            it has none of the files, the file size is used as the cost.
+        groups: Files that must land on the same shard; a group costs the
+            sum of its files. Files in no group form a group of their own.
+    """
+    index, count = shard
+    members, group_costs = _group_costs(files, timings, groups or [])
+    order = sorted(
+        range(len(members)),
+        key=lambda group: (-group_costs[group], str(files[members[group][0]])),
+    )
+    # (total cost, group count, shard number); already a valid heap
+    loads = [(0.0, 0, number) for number in range(count)]
+    selected = set()
+    for group in order:
+        load, assigned, number = heapq.heappop(loads)
+        if number == index - 1:
+            selected.update(members[group])
+        heapq.heappush(loads, (load + group_costs[group], assigned + 1, number))
+    return [file for position, file in enumerate(files) if position in selected]
+
+
+def _group_costs(
+    files: Sequence[Path],
+    timings: Optional[TimingDatabase],
+    groups: Sequence[Sequence[Path]],
+) -> Tuple[List[List[int]], List[float]]:
+    """Group the files for sharding and total the expected cost of each group.
+
+    Files in no group form a group of their own; groups are ordered by
+    their first file.
+
+    Returns:
+        Tuple of (positions in files of each group's members, group costs)
+    """
+    costs: List[float] = []
+    if timings is not None:
+        costs, unknown = timings.costs(list(files))
+        if unknown == len(files):
+            costs = []
+    if not costs:
+        costs = [_file_size(file) for file in files]
+
+    group_of = {file: group[0] for group in groups for file in group}
+    members: Dict[Path, List[int]] = {}
+    for position, file in enumerate(files):
+        members.setdefault(group_of.get(file, file), []).append(position)
+    positions = list(members.values())
+    return positions, [sum(costs[member] for member in group) for group in positions]
+
+
+@dataclass
+class ShardReport:
+    """Per-file results of one shard, written to a results file."""
+
+    tool: str
+    shard: Shard = (1, 1)
+    files: List[FileResult] = field(default_factory=list)
+
+    def write(self, path: Path, fix: bool, wall_time: float) -> None:
+        """Write the results as JSON.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        data = {
+            "version": RESULTS_VERSION,
+            "tool": self.tool,
+            "shard": list(self.shard),
+            "fix": fix,
+            "wall_time_ms": int(wall_time * 1000),
+            "files": [
+                dict(asdict(result), path=str(result.path)) for result in self.files
+            ],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(data, indent=1).encode("utf-8"))
+
+
+@dataclass
+class MergedResults:
+    """Results of all shards of a sharded run."""
+
+    fix: bool
+    files: List[FileResult]
+    # Wall time of the slowest shard
+    wall_time: float
+    shard_count: int
+    # Shard numbers without a results file
+    missing: List[int]
+
+
+def _load_report(path: Path, tool: str) -> Tuple[Shard, bool, float, List[FileResult]]:
+    """Load and validate one results file.
+
+    Raises:
+        ValueError: If the file cannot be read or belongs to another tool.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"{path}: cannot read results ({exc})") from exc
+    if not isinstance(data, dict) or data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: not a results file of this version")
+    if data.get("tool") != tool:
+        raise ValueError(f"{path}: results of {data.get('tool')}, not {tool}")
+    try:
+        index, count = (int(value) for value in data["shard"])
+        files = [
+            FileResult(**dict(result, path=Path(result["path"])))
+            for result in data["files"]
+        ]
+        return (index, count), bool(data["fix"]), data["wall_time_ms"] / 1000, files
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"{path}: malformed results ({exc})") from exc
+
+
+def merge_reports(paths: Sequence[Path], tool: str) -> MergedResults:
+    """Combine the results files written by the shards of one run.
+
+    Files are reported in path order; a file reported by several shards is
+    only kept once.
+
+    Raises:
+        ValueError: If a file is unreadable, or the files do not belong to
+            the same run (different tool, mode or shard count).
+    """
+    reports = [_load_report(path, tool) for path in paths]
+    if not reports:
+        raise ValueError("no results files given")
+
+    counts = {shard[1] for shard, _, _, _ in reports}
+    modes = {fix for _, fix, _, _ in reports}
+    if len(counts) > 1 or len(modes) > 1:
+        raise ValueError("results files come from different runs")
+
+    merged = {}
+    for _, _, _, files in reports:
+        for result in files:
+            merged.setdefault(result.path, result)
+
+    count = counts.pop()
+    present = {shard[0] for shard, _, _, _ in reports}
+    return MergedResults(
+        fix=modes.pop(),
+        files=[merged[path] for path in sorted(merged)],
+        wall_time=max(wall_time for _, _, wall_time, _ in reports),
+        shard_count=count,
+        missing=[number for number in range(1, count + 1) if number not in present],
+    )
+
+
+def is_merge(parser: argparse.ArgumentParser, args: argparse.Namespace) -> bool:
+    """Check whether the merge action was requested.
+
+    Exits with a usage error if results files are given to another action.
+    """
+    if args.action == "merge":
+        return True
+    if args.results_files:
+        parser.error("results files can only be given to merge")
+    return False
+
+
+def load_merged(paths: Sequence[Path], tool: str) -> Optional[MergedResults]:
+    """Merge the results files of a sharded run, printing any error.
+
+    Returns:
+        The merged results, or None if they cannot be merged.
+    """
+    try:
+        return merge_reports(paths, tool)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return None
+
+
+def select_shard(
+    files: List[Path],
+    args: argparse.Namespace,
+    default_timings: Optional[Path] = None,
+    groups: Optional[Sequence[Sequence[Path]]] = None,
+) -> List[Path]:
+    """Apply the --shard and --shard-timings options to a file list.
+
+    Args:
+        files: All files to process.
+        args: Parsed command line, with the sharding options.
+        default_timings: The tool's own timing history, used when
+            --shard-timings is not given and the file exists.
+        groups: Files to keep on the same shard (see shard_files()).
+    """
+    if args.shard is None:
+        return files
+    path = args.shard_timings
+    if path is None and default_timings is not None and default_timings.is_file():
+        path = default_timings
+    timings = TimingDatabase.load(path) if path is not None else None
+    return shard_files(files, args.shard, timings, groups)
+
+
+def print_missing_shards(merged: MergedResults, use_color: bool) -> bool:
+    """Report shards without a results file.
+
+    Returns:
+        True if any shard is missing.
+    """
+    if not merged.missing:
+        return False
+    numbers = ", ".join(str(number) for number in merged.missing)
+    message = f"✖ Missing results of shard(s) {numbers} of {merged.shard_count}"
+    if use_color:
+        message = f"{Colors.RED}{message}{Colors.RESET}"
+    print(message, file=sys.stderr)
+    return True
@@ -0,0 +1,126 @@
+"""Tests of splitting runs into shards and merging their results."""
+
+import argparse
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from .output import FileResult
+from .sharding import (
+    ShardReport,
+    add_shard_arguments,
+    merge_reports,
+    parse_shard,
+    select_shard,
+    shard_files,
+)
+from .timings import TimingDatabase
+
+FILES = [Path(name) for name in ["a.cpp", "a.hpp", "b.cpp", "c.cpp", "d.cpp"]]
+
+
+def _shard_args(*argv: str) -> argparse.Namespace:
+    """Parse sharding options the way the scripts do."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action")
+    add_shard_arguments(parser)
+    return parser.parse_args(["check", *argv])
+
+
+# Seconds per file of FILES
+TIMES = {"a.cpp": 4.0, "a.hpp": 1.0, "b.cpp": 3.0, "c.cpp": 2.0, "d.cpp": 2.0}
+
+
+def test_parse_shard() -> None:
+    """Shards are 1-based I/N."""
+    assert parse_shard(" 2/3 ") == (2, 3)
+    for value in ["0/3", "4/3", "1-3"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
+
+
+def test_shards_partition_the_files_by_cost() -> None:
+    """Every file is in exactly one shard; costs are balanced."""
+    timings = TimingDatabase(None, TIMES)
+
+    shards = [shard_files(FILES, (index, 2), timings) for index in (1, 2)]
+
+    assert shards == [
+        [Path("a.cpp"), Path("d.cpp")],
+        [Path("a.hpp"), Path("b.cpp"), Path("c.cpp")],
+    ]
+
+
+def test_groups_stay_on_one_shard() -> None:
+    """A header lands on the shard of the source it is linted through."""
+    timings = TimingDatabase(None, TIMES)
+    groups = [[Path("a.cpp"), Path("a.hpp")]]
+
+    shards = [shard_files(FILES, (index, 2), timings, groups) for index in (1, 2)]
+
+    assert shards == [
+        [Path("a.cpp"), Path("a.hpp"), Path("d.cpp")],
+        [Path("b.cpp"), Path("c.cpp")],
+    ]
+
+
+def test_shards_fall_back_to_file_size(tmp_path: Path) -> None:
+    """Without any known time, the biggest files are spread first."""
+    files: List[Path] = []
+    for name, size in [("small", 1), ("big", 100), ("medium", 50)]:
+        files.append(tmp_path / name)
+        files[-1].write_bytes(b"x" * size)
+
+    assert shard_files(files, (1, 2), TimingDatabase(None, {})) == [tmp_path / "big"]
+    assert shard_files(files, (2, 2)) == [tmp_path / "small", tmp_path / "medium"]
+
+
+def test_default_timings_are_used_if_present(tmp_path: Path) -> None:
+    """The tool's own history balances shards unless --shard-timings is given."""
+    history = tmp_path / "timings.json"
+    history.write_text(json.dumps({"a.cpp": 1.0, "b.cpp": 9.0}), encoding="utf-8")
+    files = [Path("a.cpp"), Path("b.cpp"), Path("c.cpp")]
+
+    # By size (all missing, so 0) the order is by path: a, b, then c
+    assert select_shard(files, _shard_args("--shard", "1/2")) == files[::2]
+    assert select_shard(files, _shard_args("--shard", "1/2"), history) == [
+        Path("b.cpp")
+    ]
+    assert select_shard(files, _shard_args(), history) == files
+
+
+def _write_report(path: Path, shard: tuple, *names: str, fix: bool = False) -> Path:
+    """Write the results file of one shard."""
+    report = ShardReport("tool", shard)
+    report.files = [FileResult(Path(name), 10) for name in names]
+    report.write(path, fix, 1.5)
+    return path
+
+
+def test_merge_combines_the_shards(tmp_path: Path) -> None:
+    """Files are reported once, in path order, and missing shards listed."""
+    paths = [
+        _write_report(tmp_path / "2.json", (2, 3), "b.cpp", "a.cpp"),
+        _write_report(tmp_path / "1.json", (1, 3), "a.cpp"),
+    ]
+
+    merged = merge_reports(paths, "tool")
+
+    assert [result.path for result in merged.files] == [Path("a.cpp"), Path("b.cpp")]
+    assert merged.missing == [3]
+    assert merged.wall_time == 1.5
+
+
+def test_merge_rejects_other_runs(tmp_path: Path) -> None:
+    """Results of another tool, mode or shard count are not merged."""
+    first = _write_report(tmp_path / "1.json", (1, 2), "a.cpp")
+    other_count = _write_report(tmp_path / "2.json", (2, 3), "b.cpp")
+    fixed = _write_report(tmp_path / "3.json", (2, 2), "b.cpp", fix=True)
+
+    for path in (other_count, fixed):
+        with pytest.raises(ValueError, match="different runs"):
+            merge_reports([first, path], "tool")
+    with pytest.raises(ValueError, match="not other"):
+        merge_reports([first], "other")
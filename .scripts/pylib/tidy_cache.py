@@ -0,0 +1,79 @@
+"""Result cache of clang-tidy runs.
+
+clang-tidy results depend on much more than the linted file: every header
+it includes, its compile flags, the check configuration and the tool
+version. LintCache folds all of these into the cache key, so a cached
+result is only replayed when none of them changed.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+from .compile_db import CompileDatabase
+from .includes import IncludeScanner
+from .result_cache import ResultCache, hash_parts
+
+
+def _tidy_version() -> str:
+    """Return the output of clang-tidy --version, or "" if unavailable."""
+    try:
+        result = subprocess.run(
+            ["clang-tidy", "--version"], capture_output=True, text=True, check=False
+        )
+    except FileNotFoundError:
+        return ""
+    return result.stdout.strip()
+
+
+class LintCache:
+    """Content-addressed cache of clang-tidy results.
+
+    The key of a file hashes its content, the content of every header it
+    transitively includes, its compile command, .clang-tidy and the
+    clang-tidy version, so any change that could affect the diagnostics
+    misses the cache.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, database: CompileDatabase):
+        """Initialize the cache for one lint run.
+
+        Args:
+            directory: Directory to keep the cached results in.
+            max_bytes: Size limit of the cache before LRU eviction.
+            database: Compilation database of the build.
+        """
+        self.store = ResultCache(directory, max_bytes)
+        self.database = database
+        self.scanner = IncludeScanner()
+        config = Path(".clang-tidy")
+        self.base_key = hash_parts(
+            _tidy_version(),
+            config.read_bytes() if config.exists() else b"",
+            sys.platform,
+        )
+
+    def key(self, file: Path) -> Optional[str]:
+        """Compute the cache key of a file, or None if it cannot be cached.
+
+        Files without a compile command of their own, such as headers that
+        no source includes, are not cached: the command clang-tidy infers
+        for them is not known here.
+        """
+        if file not in self.database:
+            return None
+        include_dirs = self.database.include_dirs(file)
+
+        try:
+            parts = [
+                self.base_key,
+                json.dumps(self.database.get(file), sort_keys=True),
+                self.scanner.digest(file),
+            ]
+            for header in self.scanner.transitive_includes(file, include_dirs):
+                parts.extend([str(header), self.scanner.digest(header)])
+        except OSError:
+            return None
+        return hash_parts(*parts)
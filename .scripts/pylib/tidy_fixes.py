@@ -0,0 +1,221 @@
+"""Merging and applying fixes exported by clang-tidy.
+
+Concurrent `clang-tidy --fix` runs race on the headers they share, so fix
+mode instead has every run write its replacements with --export-fixes and
+applies them afterwards in a single pass. clang-apply-replacements is used
+when it is installed; otherwise the YAML files are merged here (this needs
+PyYAML). Identical replacements coming from several translation units are
+applied once, and replacements that overlap an earlier one are skipped.
+Either way the replaced code is then reformatted with clang-format, the way
+`clang-tidy --fix --format-style` would have done it.
+"""
+
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .atomic_write import write_atomic
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# (offset, length, replacement text); offsets and lengths are in bytes
+Replacement = Tuple[int, int, str]
+
+# Style the replaced code is formatted with; "file" uses the .clang-format
+# found above each source
+DEFAULT_STYLE = "file"
+
+
+@dataclass
+class FixResult:
+    """Outcome of applying exported fixes."""
+
+    applied: int = 0
+    changed_files: List[Path] = field(default_factory=list)
+    conflicts: Dict[Path, int] = field(default_factory=dict)
+    errors: Dict[Path, str] = field(default_factory=dict)
+
+
+def can_apply_fixes() -> bool:
+    """Check whether exported fixes can be applied in this environment."""
+    return bool(shutil.which("clang-apply-replacements")) or yaml is not None
+
+
+def _iter_replacements(document: Any) -> Iterator[Dict[str, Any]]:
+    """Yield the replacement records of one exported fixes document."""
+    if not isinstance(document, dict):
+        return
+    for diagnostic in document.get("Diagnostics") or []:
+        # clang-tidy 9+ nests the fixes in DiagnosticMessage
+        message = diagnostic.get("DiagnosticMessage") or {}
+        yield from message.get("Replacements") or diagnostic.get("Replacements") or []
+        for note in diagnostic.get("Notes") or []:
+            yield from note.get("Replacements") or []
+
+
+def load_replacements(directory: Path) -> Dict[Path, List[Replacement]]:
+    """Collect the replacements of every exported fixes file in directory.
+
+    Returns:
+        Replacements per resolved file path, de-duplicated and sorted.
+
+    Raises:
+        RuntimeError: If PyYAML is not installed.
+    """
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to apply exported fixes")
+
+    merged: Dict[Path, set] = {}
+    for fixes_file in sorted(directory.glob("*.yaml")):
+        try:
+            documents = list(yaml.safe_load_all(fixes_file.read_text("utf-8")))
+        except (OSError, yaml.YAMLError):
+            continue
+        for document in documents:
+            for record in _iter_replacements(document):
+                path = Path(record["FilePath"]).resolve()
+                text = record.get("ReplacementText")
+                merged.setdefault(path, set()).add(
+                    (
+                        int(record["Offset"]),
+                        int(record["Length"]),
+                        "" if text is None else str(text),
+                    )
+                )
+    return {path: sorted(replacements) for path, replacements in merged.items()}
+
+
+def _non_overlapping(
+    replacements: List[Replacement],
+) -> Tuple[List[Replacement], int]:
+    """Drop replacements that overlap an earlier one.
+
+    Returns:
+        Tuple of (replacements to apply, number of dropped conflicts)
+    """
+    kept: List[Replacement] = []
+    conflicts = 0
+    end = -1
+    for offset, length, text in replacements:
+        # Two insertions at the same offset would also be ambiguous
+        if kept and (offset < end or (offset == kept[-1][0] and length == 0)):
+            conflicts += 1
+            continue
+        kept.append((offset, length, text))
+        end = offset + length
+    return kept, conflicts
+
+
+def _changed_lines(
+    content: bytes, replacements: List[Replacement]
+) -> List[Tuple[int, int]]:
+    """Find the (first, last) lines the replacements occupy once applied."""
+    lines: List[Tuple[int, int]] = []
+    shift = 0
+    for offset, length, text in replacements:
+        start = offset + shift
+        end = start + len(text.encode("utf-8"))
+        first = content.count(b"\n", 0, start) + 1
+        lines.append((first, content.count(b"\n", 0, max(start, end - 1)) + 1))
+        shift = end - (offset + length)
+    return lines
+
+
+def _format_lines(
+    path: Path, content: bytes, lines: List[Tuple[int, int]], style: str
+) -> bytes:
+    """Reformat the given lines of a file's new content with clang-format.
+
+    Returns:
+        The formatted content, or content itself if clang-format is missing.
+
+    Raises:
+        OSError: If clang-format fails.
+    """
+    tool = shutil.which("clang-format")
+    if tool is None:
+        return content
+    ranges = [f"--lines={first}:{last}" for first, last in lines]
+    result = subprocess.run(
+        [tool, f"--style={style}", f"--assume-filename={path}", *ranges],
+        input=content,
+        capture_output=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        error = result.stderr.decode(errors="replace").strip()
+        raise OSError(error or "clang-format failed")
+    return result.stdout
+
+
+def _apply_to_file(path: Path, replacements: List[Replacement], style: str) -> bool:
+    """Apply sorted, non-overlapping replacements to a file and format them.
+
+    Returns:
+        True if the file content changed.
+
+    Raises:
+        OSError: If the file cannot be rewritten or formatted.
+    """
+    original = path.read_bytes()
+    content = bytearray(original)
+    for offset, length, text in reversed(replacements):
+        content[offset : offset + length] = text.encode("utf-8")
+    lines = _changed_lines(bytes(content), replacements)
+    formatted = _format_lines(path, bytes(content), lines, style)
+    if formatted == original:
+        return False
+    write_atomic(path, formatted)
+    return True
+
+
+def _apply_with_tool(directory: Path, style: str) -> Optional[FixResult]:
+    """Apply fixes with clang-apply-replacements, if it is installed."""
+    tool = shutil.which("clang-apply-replacements")
+    if tool is None:
+        return None
+    result = subprocess.run(
+        [tool, "-format", f"-style={style}", str(directory)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    fixes = FixResult()
+    if result.returncode != 0:
+        message = (result.stderr or result.stdout).strip() or "Unknown error"
+        fixes.errors[directory] = message
+    return fixes
+
+
+def apply_exported_fixes(directory: Path, style: str = DEFAULT_STYLE) -> FixResult:
+    """Merge the fixes exported into directory and apply them in one pass.
+
+    Args:
+        directory: Directory holding the --export-fixes YAML files.
+        style: clang-format style the replaced code is formatted with.
+
+    Returns:
+        What was applied. With clang-apply-replacements only errors are
+        reported, since the tool does not say which files it changed.
+    """
+    fixes = _apply_with_tool(directory, style)
+    if fixes is not None:
+        return fixes
+
+    fixes = FixResult()
+    for path, replacements in load_replacements(directory).items():
+        kept, conflicts = _non_overlapping(replacements)
+        if conflicts:
+            fixes.conflicts[path] = conflicts
+        try:
+            if _apply_to_file(path, kept, style):
+                fixes.changed_files.append(path)
+                fixes.applied += len(kept)
+        except OSError as exc:
+            fixes.errors[path] = str(exc)
+    return fixes
@@ -0,0 +1,123 @@
+"""Tests of merging and applying the fixes exported by clang-tidy."""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+from . import tidy_fixes
+from .tidy_fixes import apply_exported_fixes, load_replacements
+
+pytestmark = [
+    pytest.mark.skipif(tidy_fixes.yaml is None, reason="needs PyYAML"),
+    pytest.mark.skipif(sys.platform == "win32", reason="needs script tools"),
+]
+
+# Stand-in for clang-format and clang-apply-replacements: logs its arguments
+# as JSON and echoes its input in upper case
+FAKE_TOOL = """\
+import json, pathlib, sys
+pathlib.Path(sys.argv[0] + ".log").write_text(json.dumps(sys.argv[1:]))
+sys.stdout.write(sys.stdin.read().upper())
+"""
+
+
+def _export(directory: Path, name: str, path: Path, *replacements: tuple) -> None:
+    """Write an exported fixes file holding the given replacements."""
+    records = [
+        {
+            "FilePath": str(path),
+            "Offset": offset,
+            "Length": length,
+            "ReplacementText": text,
+        }
+        for offset, length, text in replacements
+    ]
+    document = {"Diagnostics": [{"DiagnosticMessage": {"Replacements": records}}]}
+    # JSON is valid YAML, so PyYAML reads it like clang-tidy's output
+    (directory / f"{name}.yaml").write_text(json.dumps(document), encoding="utf-8")
+
+
+def _tools(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, *installed: str
+) -> Dict[str, Path]:
+    """Install fake tools; any tool not listed is reported as missing."""
+    paths: Dict[str, Path] = {}
+    for name in installed:
+        script = tmp_path / name
+        script.write_text(f"#!{sys.executable}\n{FAKE_TOOL}", encoding="utf-8")
+        script.chmod(0o755)
+        paths[name] = script
+
+    def which(name: str) -> Optional[str]:
+        return str(paths[name]) if name in paths else None
+
+    monkeypatch.setattr(tidy_fixes.shutil, "which", which)
+    return paths
+
+
+@pytest.fixture(name="source")
+def fixture_source(tmp_path: Path) -> Path:
+    """A source file and an empty fixes directory next to it."""
+    (tmp_path / "fixes").mkdir()
+    path = tmp_path / "a.cpp"
+    path.write_bytes(b"int a;\nint b;\nint c;\n")
+    return path
+
+
+def test_shared_fixes_are_applied_once(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, source: Path
+) -> None:
+    """Duplicates from other units are merged and overlapping fixes skipped."""
+    _tools(monkeypatch, tmp_path)
+    fixes = tmp_path / "fixes"
+    _export(fixes, "one", source, (4, 1, "x"), (11, 1, "y"))
+    _export(fixes, "two", source, (4, 1, "x"), (4, 2, "z;"))
+
+    assert load_replacements(fixes) == {
+        source.resolve(): [(4, 1, "x"), (4, 2, "z;"), (11, 1, "y")]
+    }
+    result = apply_exported_fixes(fixes)
+
+    assert source.read_bytes() == b"int x;\nint y;\nint c;\n"
+    assert result.applied == 2
+    assert result.changed_files == [source.resolve()]
+    assert result.conflicts == {source.resolve(): 1}
+    assert not result.errors
+
+
+def test_applied_fixes_are_formatted(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, source: Path
+) -> None:
+    """Without clang-apply-replacements, only the fixed lines are formatted."""
+    tools = _tools(monkeypatch, tmp_path, "clang-format")
+    _export(tmp_path / "fixes", "one", source, (18, 1, "c2;\nint c3"))
+
+    result = apply_exported_fixes(tmp_path / "fixes")
+
+    assert result.changed_files == [source.resolve()]
+    assert source.read_bytes() == b"INT A;\nINT B;\nINT C2;\nINT C3;\n"
+    log = json.loads(Path(f"{tools['clang-format']}.log").read_text("utf-8"))
+    assert log == [
+        "--style=file",
+        f"--assume-filename={source.resolve()}",
+        "--lines=3:4",
+    ]
+
+
+def test_tool_formats_the_fixes(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, source: Path
+) -> None:
+    """clang-apply-replacements is asked to format what it replaces."""
+    tools = _tools(monkeypatch, tmp_path, "clang-apply-replacements")
+    _export(tmp_path / "fixes", "one", source, (4, 1, "x"))
+
+    result = apply_exported_fixes(tmp_path / "fixes", "google")
+
+    assert not result.errors
+    log = json.loads(
+        Path(f"{tools['clang-apply-replacements']}.log").read_text("utf-8")
+    )
+    assert log == ["-format", "-style=google", str(tmp_path / "fixes")]
@@ -0,0 +1,128 @@
+"""clang-tidy check profiles and per-check time profiling.
+
+A check profile disables a set of checks on top of the ones .clang-tidy
+enables. The "full" profile runs every check, for CI; the "fast" profile
+leaves out the checks that run data-flow or call-graph analyses, which
+cost most of the analysis time, so pre-commit hooks get quick feedback.
+
+With --enable-check-profile, clang-tidy measures the time spent in each
+check and --store-check-profile writes it to one JSON file per
+translation unit. load_check_times() adds these up across all units so
+that the most expensive checks can be ranked.
+"""
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+# Checks disabled by each profile, on top of the .clang-tidy configuration
+CHECK_PROFILES: Dict[str, Sequence[str]] = {
+    "full": (),
+    "fast": (
+        "bugprone-easily-swappable-parameters",
+        "bugprone-exception-escape",
+        "bugprone-infinite-loop",
+        "bugprone-unchecked-optional-access",
+        "performance-unnecessary-copy-initialization",
+        "performance-unnecessary-value-param",
+        "readability-function-cognitive-complexity",
+        "readability-suspicious-call-argument",
+    ),
+}
+
+DEFAULT_PROFILE = "full"
+
+# Keys of the per-check wall times in the stored profiles, e.g.
+# "time.clang-tidy.bugprone-use-after-move.wall"
+TIME_KEY_PREFIX = "time.clang-tidy."
+TIME_KEY_SUFFIX = ".wall"
+
+
+@dataclass
+class CheckTime:
+    """Time spent in one check across all profiled translation units."""
+
+    check: str
+    seconds: float
+    units: int
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --profile option to a parser."""
+    parser.add_argument(
+        "--profile",
+        choices=sorted(CHECK_PROFILES),
+        default=DEFAULT_PROFILE,
+        help="Checks to run: full runs all of .clang-tidy, fast skips the "
+        f"most expensive ones (default: {DEFAULT_PROFILE})",
+    )
+
+
+def profile_args(profile: str) -> List[str]:
+    """Return the clang-tidy options applying a check profile."""
+    disabled = CHECK_PROFILES[profile]
+    if not disabled:
+        return []
+    return ["--checks=" + ",".join(f"-{check}" for check in disabled)]
+
+
+def profiling_args(directory: Path) -> List[str]:
+    """Return the clang-tidy options storing per-check times in directory."""
+    return ["--enable-check-profile", f"--store-check-profile={directory}"]
+
+
+def merge_checks_args(args: Sequence[str]) -> List[str]:
+    """Combine all --checks options of args into one.
+
+    clang-tidy accepts --checks only once; its globs are applied in order
+    on top of the configuration file, so joining them keeps their effect.
+    """
+    checks = [arg[len("--checks=") :] for arg in args if arg.startswith("--checks=")]
+    others = [arg for arg in args if not arg.startswith("--checks=")]
+    return others + ["--checks=" + ",".join(checks)] if checks else others
+
+
+def load_check_times(directory: Path) -> List[CheckTime]:
+    """Add up the check times stored by the profiled runs in directory.
+
+    Unreadable profile files are skipped.
+
+    Returns:
+        The checks, from the most to the least expensive.
+    """
+    times: Dict[str, CheckTime] = {}
+    for path in sorted(directory.rglob("*.json")):
+        try:
+            profile = json.loads(path.read_text(encoding="utf-8"))["profile"]
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+        for key, seconds in profile.items():
+            if not (key.startswith(TIME_KEY_PREFIX) and key.endswith(TIME_KEY_SUFFIX)):
+                continue
+            check = key[len(TIME_KEY_PREFIX) : -len(TIME_KEY_SUFFIX)]
+            entry = times.setdefault(check, CheckTime(check, 0.0, 0))
+            entry.seconds += float(seconds)
+            entry.units += 1
+    return sorted(times.values(), key=lambda entry: (-entry.seconds, entry.check))
+
+
+def print_check_times(times: List[CheckTime], count: int) -> None:
+    """Print the count most expensive checks as a ranked table."""
+    if not times:
+        print("No check profiles were written")
+        return
+    total = sum(entry.seconds for entry in times)
+    width = max(len(entry.check) for entry in times[:count] or times)
+    print(f"Time per check, {len(times)} check(s), {int(total * 1000)}ms in total:")
+    print(f"  {'#':>3}  {'check':<{width}}  {'time':>9}  {'share':>6}  {'units':>5}")
+    for rank, entry in enumerate(times[:count], start=1):
+        share = entry.seconds / total if total else 0.0
+        print(
+            f"  {rank:>3}  {entry.check:<{width}}  {entry.seconds * 1000:>7.0f}ms  "
+            f"{share:>6.1%}  {entry.units:>5}"
+        )
+    if len(times) > count:
+        rest = sum(entry.seconds for entry in times[count:])
+        print(f"  ... {len(times) - count} more check(s), {rest * 1000:.0f}ms")
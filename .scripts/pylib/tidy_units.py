@@ -0,0 +1,217 @@
+"""Grouping of lint targets into clang-tidy runs.
+
+clang-tidy only takes files with a compile command, so headers are linted
+through a source file that includes them: the source's run reports the
+header's diagnostics through --header-filter. A LintUnit is one such run
+and the files whose results it reports; split_output() attributes the
+output of the run back to those files.
+
+Units run by remote workers travel as tasks (see unit_task()), from which
+the worker builds the clang-tidy options itself (see task_args()).
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .compile_db import CompileDatabase
+from .includes import IncludeScanner, assign_headers
+from .tidy_profile import CHECK_PROFILES, DEFAULT_PROFILE, profile_args
+
+# Files linted through an including source file rather than on their own
+HEADER_EXTENSIONS = (".hpp", ".h")
+
+# First line of a diagnostic; the "note:" lines that follow belong to it
+DIAGNOSTIC_RE = re.compile(r"^(?P<path>.+?):\d+:\d+: (?:warning|error): ")
+
+# Characters with a special meaning in the POSIX regexes of --header-filter
+ERE_SPECIAL_RE = re.compile(r"[.\[\]()*+?{}|^$\\]")
+
+
+@dataclass
+class LintUnit:
+    """One clang-tidy run and the files whose results it reports.
+
+    source is the file passed to clang-tidy. files lists the lint targets
+    covered by the run: the source itself when it is a target, and the
+    headers assigned to it, whose diagnostics come through --header-filter.
+    """
+
+    source: Path
+    files: List[Path] = field(default_factory=list)
+
+    def header_args(self) -> List[str]:
+        """Return the --header-filter option selecting the unit's headers.
+
+        Headers that are not assigned to this unit are excluded even if the
+        configured HeaderFilterRegex matches them, so each header is only
+        analyzed (and fixed) once per run.
+        """
+        headers = [file for file in self.files if file != self.source]
+        if not headers:
+            return ["--header-filter=^$"]
+        names = "|".join(
+            ERE_SPECIAL_RE.sub(r"\\\g<0>", header.as_posix()).replace("/", r"[/\\]")
+            for header in headers
+        )
+        return [f"--header-filter=(^|[/\\])({names})$"]
+
+
+def plan_units(
+    files: List[Path], database: CompileDatabase, scanner: IncludeScanner
+) -> List[LintUnit]:
+    """Group files into clang-tidy runs.
+
+    Headers have no compile command of their own, so each header is linted
+    through one source file that includes it, preferring sources that are
+    themselves being linted. Headers no known source includes get a unit of
+    their own, so that clang-tidy lints them directly.
+
+    Args:
+        files: Files to lint.
+        database: Compilation database to take sources and flags from.
+        scanner: Scanner used to follow #include directives.
+
+    Returns:
+        Units ordered by the position of their first file in files.
+    """
+    resolved = {file.resolve(): file for file in files}
+    headers = [
+        path for path, file in resolved.items() if file.suffix in HEADER_EXTENSIONS
+    ]
+
+    assigned: Dict[Path, Path] = {}
+    if headers:
+        linted = {
+            path: database.include_dirs(path) for path in resolved if path in database
+        }
+        assigned = assign_headers(headers, linted, scanner)
+        missing = [header for header in headers if header not in assigned]
+        if missing:
+            others = {
+                path: database.include_dirs(path)
+                for path in database.sources()
+                if path not in linted
+            }
+            assigned.update(assign_headers(missing, others, scanner))
+
+    units: Dict[Path, LintUnit] = {}
+    for file in files:
+        source = assigned.get(file.resolve())
+        source = resolved.get(source, source) if source is not None else file
+        units.setdefault(source, LintUnit(source)).files.append(file)
+    return list(units.values())
+
+
+def split_output(output: str, unit: LintUnit) -> Optional[Dict[Path, str]]:
+    """Attribute the diagnostics of a unit's run to the unit's files.
+
+    Diagnostics in the source are dropped when the source is only linted on
+    behalf of its headers; identical diagnostics are reported once.
+
+    Returns:
+        Output per file, or None if the output contains no diagnostics
+        (e.g. a tool error), in which case it applies to the whole unit.
+    """
+    by_path = {file.resolve(): file for file in unit.files}
+    source = unit.source.resolve()
+    fallback = unit.source if unit.source in unit.files else unit.files[0]
+
+    chunks: List[Tuple[Optional[Path], List[str]]] = [(fallback, [])]
+    for line in output.splitlines():
+        match = DIAGNOSTIC_RE.match(line)
+        if match:
+            path = Path(match.group("path")).resolve()
+            chunks.append((by_path.get(path, None if path == source else fallback), []))
+        chunks[-1][1].append(line)
+    if len(chunks) == 1:
+        return None
+
+    diagnostics: Dict[Path, Dict[str, None]] = {file: {} for file in unit.files}
+    for owner, lines in chunks:
+        text = "\n".join(lines).strip()
+        if owner is not None and text:
+            diagnostics[owner][text] = None
+    return {file: "\n".join(texts) for file, texts in diagnostics.items()}
+
+
+def line_filter_args(line_filter: Optional[str]) -> List[str]:
+    """Return the --line-filter option of a line filter value, if any."""
+    return [] if line_filter is None else [f"--line-filter={line_filter}"]
+
+
+def _relative_to(path: Path, root: Path) -> Path:
+    """Return an absolute path relative to root, if it is inside root."""
+    if not path.is_absolute():
+        return path
+    try:
+        return path.relative_to(root)
+    except ValueError:
+        return path
+
+
+def unit_task(
+    unit: LintUnit, line_filter: Optional[str], profile: str
+) -> Dict[str, Any]:
+    """Describe a unit's clang-tidy run for a remote worker.
+
+    The task names the unit's files, relative to the checkout's root since
+    the worker's checkout may live elsewhere, and the settings the worker
+    builds its clang-tidy options from: the --line-filter value and the
+    check profile.
+    """
+    root = Path.cwd().resolve()
+    return {
+        "source": _relative_to(unit.source, root).as_posix(),
+        "files": [_relative_to(file, root).as_posix() for file in unit.files],
+        "line_filter": line_filter,
+        "profile": profile,
+        "root": str(root),
+    }
+
+
+def _checkout_path(value: Any) -> Path:
+    """Return a path of a task relative to this checkout.
+
+    Raises:
+        ValueError: If the value is not a path inside the checkout.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"expected a path, got {value!r}")
+    root = Path.cwd().resolve()
+    path = (root / value).resolve()
+    if not path.is_relative_to(root):
+        raise ValueError(f"{value} is outside the checkout")
+    return path.relative_to(root)
+
+
+def task_args(task: Dict[str, Any]) -> Tuple[Path, List[str]]:
+    """Build the clang-tidy run of a task on the worker side.
+
+    Tasks carry no clang-tidy options, only the files and settings of the
+    run, so a coordinator cannot make clang-tidy load plugins, write files
+    or read anything outside the worker's checkout.
+
+    Returns:
+        Tuple of (source to lint, relative to the checkout, its options)
+
+    Raises:
+        ValueError: If the task names a path outside the checkout, an
+            unknown check profile or a malformed line filter.
+    """
+    unit = LintUnit(
+        _checkout_path(task.get("source")),
+        [_checkout_path(file) for file in task.get("files", [])],
+    )
+    profile = task.get("profile", DEFAULT_PROFILE)
+    if profile not in CHECK_PROFILES:
+        raise ValueError(f"unknown check profile {profile!r}")
+    line_filter = task.get("line_filter")
+    if line_filter is not None and not (
+        isinstance(line_filter, str) and isinstance(json.loads(line_filter), list)
+    ):
+        raise ValueError("malformed line filter")
+    args = unit.header_args() + line_filter_args(line_filter) + profile_args(profile)
+    return unit.source, args
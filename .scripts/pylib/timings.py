@@ -0,0 +1,118 @@
+"""Per-file timing history used to schedule tool runs.
+
+Run times per file vary by orders of magnitude (a template-heavy
+translation unit can take 200 times longer than a trivial one). If the
+expensive files happen to be dispatched last, they stretch the wall time
+of a parallel run. The times measured on earlier runs are therefore kept
+in a small JSON file, so the next run can start the most expensive files
+first (longest processing time first, LPT) and predict its duration.
+"""
+
+import contextlib
+import json
+import statistics
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .atomic_write import write_atomic
+
+# File name of the timing history inside a tool's cache directory
+TIMINGS_NAME = "timings.json"
+
+# Weight of the newest measurement in the running average, which smooths
+# out noise from machine load without lagging far behind real changes
+SMOOTHING = 0.5
+
+
+class TimingDatabase:
+    """Smoothed run time per file, persisted between runs.
+
+    Files are keyed by path relative to the working directory (the project
+    root), so the history stays valid in another checkout of the project,
+    e.g. when restored from a CI cache. Recording is thread-safe, so
+    workers can record their own measurements.
+    """
+
+    def __init__(self, path: Optional[Path], times: Dict[str, float]):
+        """Initialize from already loaded times.
+
+        Args:
+            path: File to save the history to, or None to keep it in memory.
+            times: Seconds per file key.
+        """
+        self.path = path
+        self.times = times
+        # Unsmoothed measurements of this run, for the timing history
+        self.samples: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "TimingDatabase":
+        """Load the timing history from path; missing or invalid is empty."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        times = {
+            name: float(seconds)
+            for name, seconds in data.items()
+            if isinstance(seconds, (int, float)) and seconds >= 0
+        }
+        return cls(path, times)
+
+    @staticmethod
+    def key(file: Path) -> str:
+        """Return the key of a file: its path relative to the project root.
+
+        Files outside the working directory are keyed by absolute path.
+        """
+        resolved = file.resolve()
+        try:
+            return resolved.relative_to(Path.cwd().resolve()).as_posix()
+        except ValueError:
+            return str(resolved)
+
+    def get(self, file: Path) -> Optional[float]:
+        """Return the expected run time of a file, or None if never timed."""
+        return self.times.get(self.key(file))
+
+    def record(self, file: Path, elapsed: float) -> None:
+        """Fold a new measurement into the file's running average."""
+        name = self.key(file)
+        with self._lock:
+            self.samples[name] = elapsed
+            previous = self.times.get(name)
+            if previous is not None:
+                elapsed = SMOOTHING * elapsed + (1 - SMOOTHING) * previous
+            self.times[name] = elapsed
+
+    def costs(self, files: Sequence[Path]) -> Tuple[List[float], int]:
+        """Return the expected run time of each file.
+
+        Files without history are assumed to take the median time of the
+        files that have one (or zero if none has).
+
+        Returns:
+            Tuple of (cost per file in order, number of files without history)
+        """
+        known = [self.get(file) for file in files]
+        measured = [cost for cost in known if cost is not None]
+        default = statistics.median(measured) if measured else 0.0
+        costs = [default if cost is None else cost for cost in known]
+        return costs, len(known) - len(measured)
+
+    def save(self) -> None:
+        """Write the history back, dropping files that no longer exist.
+
+        Failures are ignored; the history is only an optimization.
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            times = {name: t for name, t in self.times.items() if Path(name).exists()}
+        with contextlib.suppress(OSError):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.path, json.dumps(times, sort_keys=True).encode("utf-8"))
@@ -0,0 +1,178 @@
+"""Chrome trace-event output for the lint and format scripts.
+
+With --trace FILE, a script records a span for each phase of its run
+(file discovery, planning, the tool runs, printing, saving caches) and for
+each tool process, on the thread it ran on. The spans are written as
+Chrome trace-event JSON, which chrome://tracing and ui.perfetto.dev show
+as a timeline per thread, so stragglers and serialized phases stand out.
+
+Tracing is off unless tracing() is active; span() then costs next to
+nothing, so it can stay in the code paths permanently.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .atomic_write import write_atomic
+
+Event = Dict[str, Any]
+
+
+class Tracer:
+    """Collects complete ("X") trace events from any thread."""
+
+    def __init__(self) -> None:
+        """Start an empty trace; timestamps are relative to now."""
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: List[Event] = []
+        self._threads: Dict[int, str] = {}
+
+    def _timestamp(self, moment: float) -> float:
+        """Convert a perf_counter() value to trace microseconds."""
+        return round((moment - self._origin) * 1_000_000, 1)
+
+    def add(
+        self, name: str, category: str, start: float, end: float, args: Dict[str, Any]
+    ) -> None:
+        """Record a span that ran on the current thread.
+
+        Args:
+            name: Span name shown on the timeline.
+            category: Event category (e.g. "phase" or "process").
+            start: perf_counter() value at the start of the span.
+            end: perf_counter() value at the end of the span.
+            args: Details shown when the span is selected.
+        """
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": self._timestamp(start),
+            "dur": round((end - start) * 1_000_000, 1),
+            "pid": os.getpid(),
+            "tid": thread.native_id,
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads[thread.native_id] = thread.name
+
+    def events(self) -> List[Event]:
+        """Return the recorded spans, preceded by process and thread names."""
+        pid = os.getpid()
+        with self._lock:
+            names = [
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "args": {"name": Path(sys.argv[0]).name or "python"},
+                }
+            ]
+            names.extend(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self._threads.items()
+            )
+            return names + list(self._events)
+
+    def write(self, path: Path) -> None:
+        """Write the trace as Chrome trace-event JSON.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        data = {"traceEvents": self.events(), "displayTimeUnit": "ms"}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(data).encode("utf-8"))
+
+
+class _Active:
+    """The tracer of the running script, if tracing is on."""
+
+    tracer: Optional[Tracer] = None
+
+
+@contextlib.contextmanager
+def span(name: str, category: str = "phase", **args: Any) -> Iterator[None]:
+    """Record the enclosed code as a span, if tracing is on.
+
+    Args:
+        name: Span name shown on the timeline.
+        category: Event category (e.g. "phase" or "process").
+        **args: Details shown when the span is selected; must be JSON values.
+    """
+    tracer = _Active.tracer
+    if tracer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.add(name, category, start, time.perf_counter(), args)
+
+
+@contextlib.contextmanager
+def tracing(path: Optional[Path]) -> Iterator[None]:
+    """Trace the enclosed code and write the trace to path on exit.
+
+    The trace is also written when the code exits with an exception
+    (including sys.exit()). Without a path, nothing is traced.
+    """
+    if path is None:
+        yield
+        return
+    tracer = Tracer()
+    _Active.tracer = tracer
+    try:
+        with span("run", argv=sys.argv[1:]):
+            yield
+    finally:
+        _Active.tracer = None
+        try:
+            tracer.write(path)
+        except OSError as exc:
+            print(f"Warning: cannot write trace to {path}: {exc}", file=sys.stderr)
+
+
+def add_trace_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --trace option to a parser."""
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="FILE",
+        help="Write a Chrome trace-event profile of the run "
+        "(open it in chrome://tracing or ui.perfetto.dev)",
+    )
+
+
+def run_traced(
+    parser: argparse.ArgumentParser, main: Callable[[argparse.Namespace], int]
+) -> int:
+    """Parse the command line and run main, traced if --trace is given.
+
+    The --trace option is added to parser here, after the script's own
+    options.
+
+    Returns:
+        The exit code returned by main.
+    """
+    add_trace_argument(parser)
+    args = parser.parse_args()
+    with tracing(args.trace):
+        return main(args)
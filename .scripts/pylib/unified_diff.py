@@ -0,0 +1,100 @@
+"""Parsing of unified diffs, as printed by git diff and ShellCheck.
+
+A diff is split into one patch per file. Hunk bodies are skipped using the
+line counts of their headers, so an added line starting with "++ " or a
+removed line starting with "-- " is never taken for a file header.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# "@@ -a,b +c,d @@" hunk headers; a missing count means one line
+HUNK_RE = re.compile(
+    r"^@@ -\d+(?:,(?P<old>\d+))? \+(?P<first>\d+)(?:,(?P<new>\d+))? @@"
+)
+
+
+@dataclass
+class FilePatch:
+    """The part of a unified diff that changes one file."""
+
+    # Path in the new version of the file, without the "b/" prefix; the old
+    # path if the file was deleted
+    path: Optional[str] = None
+    # Lines of the patch, with their line endings and file headers
+    lines: List[str] = field(default_factory=list)
+    # (first line, line count) of each hunk in the new version of the file
+    hunks: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """The patch as a string, ready to be applied on its own."""
+        return "".join(self.lines)
+
+
+def parse_diff(diff: str) -> List[FilePatch]:
+    """Split a multi-file unified diff into per-file patches.
+
+    Each file starts at a "diff --git" line, or at a "--- <path>" line
+    directly followed by "+++ <path>". Lines before the first file are
+    dropped.
+    """
+    lines = diff.splitlines(keepends=True)
+    patches: List[FilePatch] = []
+    old = new = 0
+    for index, line in enumerate(lines):
+        in_hunk = old > 0 or new > 0
+        hunk = None if in_hunk else HUNK_RE.match(line)
+        if in_hunk:
+            if line.startswith("-"):
+                old -= 1
+            elif line.startswith("+"):
+                new -= 1
+            elif not line.startswith("\\"):
+                old -= 1
+                new -= 1
+        elif hunk:
+            old = int(hunk.group("old") or 1)
+            new = int(hunk.group("new") or 1)
+            if patches:
+                patches[-1].hunks.append((int(hunk.group("first")), new))
+        elif line.startswith("diff --git "):
+            patches.append(FilePatch())
+        elif (
+            line.startswith("--- ")
+            and index + 1 < len(lines)
+            and lines[index + 1].startswith("+++ ")
+        ):
+            # A "diff --git" line already started this file's patch
+            if not patches or patches[-1].path is not None:
+                patches.append(FilePatch())
+            patches[-1].path = _header_path(lines[index + 1]) or _header_path(line)
+        if patches:
+            patches[-1].lines.append(line)
+    return patches
+
+
+def _header_path(header: str) -> Optional[str]:
+    """Return the path of a "--- a/<path>" or "+++ b/<path>" line.
+
+    Returns:
+        The path without its "a/" or "b/" prefix, or None for /dev/null.
+    """
+    name = header[len("+++ ") :].rstrip("\r\n")
+    # Quoted names have special characters escaped; others end at a tab,
+    # which git adds after names containing spaces
+    name = _unquote(name) if name.startswith('"') else name.split("\t", 1)[0]
+    if name == "/dev/null":
+        return None
+    return name[2:] if name.startswith(("a/", "b/")) else name
+
+
+def _unquote(name: str) -> str:
+    """Decode a path that git quoted because of special characters."""
+    escaped = name[1:-1].encode("latin-1", "backslashreplace")
+    return (
+        escaped.decode("unicode_escape")
+        .encode("latin-1")
+        .decode("utf-8", "surrogateescape")
+    )
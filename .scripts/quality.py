@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Format and lint config, Python, shell and PowerShell files in one pass.
+
+Discovers the tree once, hands each tool the files of its types and runs
+prettier, ruff, ESLint, pylint, shlint.py and pwshlint.py concurrently
+within one job budget. With --fix, formatters run before the linters of
+the same files. C++ files are left to format_clang.py and lint_clang.py,
+which need the compilation database.
+
+Usage:
+    python .scripts/quality.py lint              # check with the linters
+    python .scripts/quality.py all --fix         # format, then lint with fixes
+    python .scripts/quality.py format --staged   # check staged files only
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path for pylib imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+# pylint: disable=wrong-import-position
+from pylib import Colors, find_files, fix_windows_console
+from pylib.git_files import add_git_arguments
+from pylib.orchestrator import (
+    StepResult,
+    Tool,
+    discovery_patterns,
+    pipeline_failed,
+    plan_steps,
+    print_pipeline_summary,
+    print_step_output,
+    run_pipeline,
+)
+from pylib.parallel import MAX_ARGV_CHARS, add_jobs_argument
+from pylib.tracing import run_traced, span
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# File types of prettier and ESLint
+CONFIG_EXTENSIONS = (".cjs", ".js", ".json", ".md", ".mjs", ".toml", ".yaml", ".yml")
+
+# Directories no tool should see, on top of the file_finder defaults
+IGNORES = [
+    ".jscpd",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    ".xmake",
+    "coverage",
+    "docs-html",
+    "_uvx_install",
+]
+
+# npx is a batch file on Windows, and cmd.exe caps command lines at 8191
+NPX_MAX_CHARS = 8000 if sys.platform == "win32" else MAX_ARGV_CHARS
+
+ACTIONS = ("format", "lint", "all")
+
+
+def build_tools() -> List[Tool]:
+    """Return the tools of the pipeline, run with this interpreter."""
+    python = sys.executable
+    shlint = str(SCRIPT_DIR / "shlint.py")
+    pwshlint = str(SCRIPT_DIR / "pwshlint.py")
+    return [
+        Tool(
+            "prettier",
+            CONFIG_EXTENSIONS,
+            ("npx", "prettier", "--check", "--ignore-unknown"),
+            ("npx", "prettier", "--write", "--ignore-unknown"),
+            formatter=True,
+            max_chars=NPX_MAX_CHARS,
+            walks_tree=True,
+        ),
+        Tool(
+            "ruff",
+            (".py",),
+            (python, "-m", "ruff", "format", "--check", "--force-exclude"),
+            (python, "-m", "ruff", "format", "--force-exclude"),
+            formatter=True,
+        ),
+        Tool(
+            "eslint",
+            CONFIG_EXTENSIONS,
+            ("npx", "eslint", "--no-warn-ignored"),
+            ("npx", "eslint", "--no-warn-ignored", "--fix"),
+            max_chars=NPX_MAX_CHARS,
+            walks_tree=True,
+        ),
+        Tool(
+            "pylint",
+            (".py",),
+            (python, "-m", "pylint"),
+            (python, "-m", "pylint"),
+            jobs_option="--jobs",
+            walks_tree=True,
+        ),
+        Tool("shlint", (".sh",), (python, shlint), (python, shlint, "--fix")),
+        Tool("pwshlint", (".ps1",), (python, pwshlint), (python, pwshlint, "--fix")),
+    ]
+
+
+def select_tools(args: argparse.Namespace) -> List[Tool]:
+    """Return the tools selected by the action and --only/--skip."""
+    tools = build_tools()
+    if args.action == "format":
+        tools = [tool for tool in tools if tool.formatter]
+    elif args.action == "lint":
+        tools = [tool for tool in tools if not tool.formatter]
+    if args.only:
+        tools = [tool for tool in tools if tool.name in args.only]
+    return [tool for tool in tools if tool.name not in (args.skip or [])]
+
+
+def main() -> int:
+    """Main entry point."""
+    fix_windows_console()
+    names = [tool.name for tool in build_tools()]
+    parser = argparse.ArgumentParser(
+        description="Format and lint config, Python, shell and PowerShell files"
+    )
+    parser.add_argument(
+        "action",
+        choices=ACTIONS,
+        help="format: run the formatters; lint: run the linters; all: both",
+    )
+    parser.add_argument(
+        "--fix", action="store_true", help="Modify files instead of only checking"
+    )
+    parser.add_argument(
+        "--only", action="append", choices=names, help="Only run this tool"
+    )
+    parser.add_argument("--skip", action="append", choices=names, help="Skip this tool")
+    parser.add_argument("--ignore", action="append", help="Directory names to ignore")
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Only print the output of failed tools",
+    )
+    add_git_arguments(parser)
+    add_jobs_argument(parser)
+    return run_traced(parser, _run)
+
+
+def _run(args: argparse.Namespace) -> int:
+    """Discover the files once and run the selected tools on them."""
+    use_color = Colors.supports_color()
+    start = time.perf_counter()
+    tools = select_tools(args)
+
+    with span("find files"):
+        files = find_files(
+            discovery_patterns(tools),
+            IGNORES + (args.ignore or []),
+            use_git=args.git,
+            include_untracked=args.untracked,
+            staged_only=args.staged,
+            since=args.since,
+        )
+    # Selections must be passed file by file; on the whole tree, prettier,
+    # ESLint and pylint walk it themselves and apply their own ignore files
+    whole_tree = not (args.git or args.staged or args.since)
+    steps = plan_steps(tools, files, args.fix, whole_tree)
+    print(
+        f"Running {len(steps)} tool(s) on {len(files)} file(s) with {args.jobs} job(s)"
+    )
+    print()
+
+    def report(result: StepResult) -> None:
+        if not args.quiet or pipeline_failed([result]):
+            print_step_output(result, use_color)
+        sys.stdout.flush()
+
+    with span("run tools", tools=len(steps)):
+        results = run_pipeline(steps, args.jobs, args.fix, report)
+
+    print_pipeline_summary(
+        results, int((time.perf_counter() - start) * 1000), use_color
+    )
+    return 1 if pipeline_failed(results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
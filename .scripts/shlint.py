@@ -5,21 +5,33 @@ This script provides a Python interface to shellcheck with consistent
 output formatting and optional auto-fix support via git apply.
 """
 
+import json
 import os
 import shutil
 import subprocess
 import sys
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 # Add the current directory to sys.path to allow importing pylib
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, SCRIPT_DIR)
 
+from pylib.limits import LimitExceeded, run_limited  # noqa: E402  # pylint: disable=wrong-import-position
 from pylib.linter import Colors, Linter  # noqa: E402  # pylint: disable=wrong-import-position
+from pylib.parallel import make_batches  # noqa: E402  # pylint: disable=wrong-import-position
+from pylib.unified_diff import parse_diff  # noqa: E402  # pylint: disable=wrong-import-position
+
+SHELLCHECK_ARGS = ["shellcheck", "-x", "--severity=style"]
 
 
 class ShellLinter(Linter):
     """Linter for shell scripts using ShellCheck."""
 
+    SUPPORTS_LIMITS = True
+
+    # Maximum number of scripts passed to one shellcheck invocation
+    BATCH_SIZE = 200
+
     def __init__(self):
         """Initialize the ShellCheck linter."""
         super().__init__("ShellCheck", "**/*.sh")
@@ -31,6 +43,17 @@ class ShellLinter(Linter):
             print("Install it: https://github.com/koalaman/shellcheck#installing")
             sys.exit(2)
 
+    def tool_version(self) -> Optional[str]:
+        """Return the ShellCheck version string, or None if it is unknown."""
+        result = subprocess.run(
+            ["shellcheck", "--version"], capture_output=True, text=True, check=False
+        )
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def settings_files(self) -> List[str]:
+        """Return the ShellCheck config file."""
+        return [os.path.join(os.path.dirname(SCRIPT_DIR), ".shellcheckrc")]
+
     def lint_file(self, file_path: str, fix: bool) -> bool:
         """Lint a shell script using ShellCheck.
 
@@ -39,19 +62,30 @@ class ShellLinter(Linter):
             fix: Whether to attempt automatic fixes via git apply.
 
         Returns:
-            True if issues were found, False otherwise.
+            True if issues were found, or ShellCheck failed or was killed by
+            one of the limits, False otherwise.
         """
         if fix:
             self._try_fix(file_path)
 
-        result = subprocess.run(
-            ["shellcheck", "-x", "--severity=style", "--format=tty", file_path],
-            capture_output=True,
-            text=True,
-            check=False,
-        )
+        try:
+            result = run_limited(
+                ["shellcheck", "-x", "--severity=style", "--format=tty", file_path],
+                self.limits,
+                text=True,
+            )
+        except LimitExceeded as exc:
+            return self.report_killed(file_path, exc)
 
-        if result.returncode != 0 and result.stdout.strip():
+        # Exit code 1 means comments; anything else is a failure of shellcheck
+        if result.returncode not in (0, 1) or (
+            result.returncode == 1 and not result.stdout.strip()
+        ):
+            return self.report_tool_error(
+                file_path,
+                result.stderr.strip() or f"shellcheck exited with {result.returncode}",
+            )
+        if result.returncode != 0:
             print(f"{Colors.WHITE}{file_path}{Colors.RESET}")
             print(result.stdout)
             return True
@@ -59,6 +93,107 @@ class ShellLinter(Linter):
         print(f"{Colors.GRAY}  OK: {file_path}{Colors.RESET}")
         return False
 
+    def lint_batch(self, file_paths: List[str], fix: bool) -> Iterator[bool]:
+        """Lint scripts with one shellcheck run per batch instead of per file.
+
+        Each batch is checked with --format=json1, which tells which files
+        have comments; only those are run again on their own, to print
+        ShellCheck's tty output with its spans and suggested fixes. In fix
+        mode, one --format=diff run produces a combined patch that is applied
+        with a single git apply. If shellcheck's JSON cannot be parsed, or
+        the run is killed by the limits (the time limit is scaled to the
+        batch size), the batch falls back to per-file linting.
+        """
+        for batch in make_batches(file_paths, self.BATCH_SIZE):
+            fixed: Set[str] = set()
+            failed: Dict[str, str] = {}
+            if fix:
+                fixed, failed = self._fix_batch(batch)
+
+            comments = self._check_batch(batch)
+            for file_path in batch:
+                if file_path in fixed:
+                    print(f"{Colors.WHITE}  Fixed: {file_path}{Colors.RESET}")
+                elif file_path in failed:
+                    print(
+                        f"{Colors.YELLOW}  Warning: Could not apply fixes "
+                        f"to {file_path}{Colors.RESET}"
+                    )
+                    print(failed[file_path])
+
+                if comments is None or comments.get(file_path):
+                    yield self.lint_file(file_path, False)
+                else:
+                    print(f"{Colors.GRAY}  OK: {file_path}{Colors.RESET}")
+                    yield False
+
+    def _check_batch(self, batch: List[str]) -> Optional[Dict[str, List[Any]]]:
+        """Run shellcheck --format=json1 over a batch.
+
+        Returns:
+            Comments grouped by file, or None if the output was not valid JSON,
+            shellcheck failed on some file (which the per-file fallback then
+            reports on its own) or was killed by the limits.
+        """
+        try:
+            result = run_limited(
+                SHELLCHECK_ARGS + ["--format=json1"] + batch,
+                self.limits.for_batch(len(batch)),
+                text=True,
+            )
+            report = json.loads(result.stdout)
+        except (OSError, ValueError, LimitExceeded):
+            return None
+        if result.returncode not in (0, 1):
+            return None
+
+        comments: Dict[str, List[Any]] = {}
+        for comment in report.get("comments", []):
+            comments.setdefault(comment.get("file", ""), []).append(comment)
+        return comments
+
+    def _fix_batch(self, batch: List[str]) -> Tuple[Set[str], Dict[str, str]]:
+        """Apply ShellCheck fixes for a batch with one combined git apply.
+
+        If the combined patch does not apply, each file's section is applied
+        on its own so one bad hunk does not block the other fixes.
+
+        Returns:
+            Tuple of (fixed files, error output for files that failed), named
+            as in batch. If shellcheck is killed by the limits, no file is
+            fixed.
+        """
+        # The diff names files as they are passed, and its paths come back
+        # without their "a/" prefix; map them back to the batch's spelling
+        names = {_diff_name(file_path): file_path for file_path in batch}
+        try:
+            result = run_limited(
+                SHELLCHECK_ARGS + ["--format=diff"] + list(names),
+                self.limits.for_batch(len(batch)),
+                text=True,
+            )
+        except LimitExceeded:
+            return set(), {}
+        except OSError as exc:
+            return set(), dict.fromkeys(batch, str(exc))
+
+        patches = {
+            names.get(os.path.normpath(path), path): patch
+            for path, patch in _split_patch(result.stdout).items()
+        }
+        if not patches or _git_apply(result.stdout) is None:
+            return set(patches), {}
+
+        fixed: Set[str] = set()
+        failed: Dict[str, str] = {}
+        for path, patch in patches.items():
+            error = _git_apply(patch)
+            if error is None:
+                fixed.add(path)
+            else:
+                failed[path] = error
+        return fixed, failed
+
     def _try_fix(self, file_path: str) -> None:
         """Attempt to apply ShellCheck fixes via git apply.
 
@@ -66,17 +201,16 @@ class ShellLinter(Linter):
             file_path: Path to the file to fix.
         """
         try:
-            result = subprocess.run(
+            result = run_limited(
                 [
                     "shellcheck",
                     "-x",
                     "--severity=style",
                     "--format=diff",
-                    file_path,
+                    _diff_name(file_path),
                 ],
-                capture_output=True,
+                self.limits,
                 text=True,
-                check=False,
             )
 
             if result.stdout:
@@ -97,12 +231,50 @@ class ShellLinter(Linter):
                     )
                     print(apply_process.stderr)
 
-        except OSError as exc:
+        except (OSError, LimitExceeded) as exc:
             print(
                 f"{Colors.YELLOW}  Warning: Error during fix for {file_path}: "
                 f"{exc}{Colors.RESET}"
             )
 
 
+def _diff_name(file_path: str) -> str:
+    """Return the name to pass to shellcheck --format=diff for a script.
+
+    git apply rejects "./" and ".." components and strips the first
+    component of absolute paths, so scripts are named relative to the
+    current directory, where git apply runs.
+    """
+    try:
+        return os.path.relpath(file_path)
+    except ValueError:
+        # On another Windows drive
+        return os.path.normpath(file_path)
+
+
+def _split_patch(patch: str) -> Dict[str, str]:
+    """Split ShellCheck's multi-file diff into per-file patches, by path."""
+    return {file.path: file.text for file in parse_diff(patch) if file.path is not None}
+
+
+def _git_apply(patch: str) -> Optional[str]:
+    """Apply a patch with git apply.
+
+    Returns:
+        None on success, otherwise git's error output.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "apply", "--allow-empty"],
+            input=patch,
+            text=True,
+            capture_output=True,
+            check=False,
+        )
+    except OSError as exc:
+        return str(exc)
+    return None if result.returncode == 0 else result.stderr
+
+
 if __name__ == "__main__":
     ShellLinter().run()
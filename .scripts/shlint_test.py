@@ -0,0 +1,96 @@
+"""Tests of how shlint.py batches ShellCheck runs and splits their output."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from shlint import ShellLinter, _diff_name, _split_patch
+
+FIRST = (
+    "--- a/my script.sh\n"
+    "+++ b/my script.sh\n"
+    "@@ -1,3 +1,3 @@\n"
+    " #!/bin/sh\n"
+    "--- a/removed.sh\n"
+    "+++ b/added.sh\n"
+    "-echo $x\n"
+    '+echo "$x"\n'
+)
+
+SECOND = (
+    "--- a/lib.sh\t2024-01-01 00:00:00\n"
+    "+++ b/lib.sh\t2024-01-01 00:00:00\n"
+    "@@ -2 +2 @@\n"
+    "-cd $dir\n"
+    '+cd "$dir"\n'
+    "\\ No newline at end of file\n"
+)
+
+GIT = (
+    "diff --git a/run.sh b/run.sh\n"
+    "index 1111111..2222222 100644\n"
+    "--- a/run.sh\n"
+    "+++ b/run.sh\n"
+    "@@ -1,0 +1,1 @@\n"
+    "+set -e\n"
+)
+
+
+def test_split_patch_on_file_headers() -> None:
+    """Paths keep their spaces and hunk lines never start a new file."""
+    patches = _split_patch(FIRST + SECOND + GIT)
+
+    assert patches == {"my script.sh": FIRST, "lib.sh": SECOND, "run.sh": GIT}
+
+
+def test_split_patch_without_files() -> None:
+    """Output without file headers has no per-file patches."""
+    assert not _split_patch("")
+
+
+# Stand-in for shellcheck: scripts containing "bad" get one comment; the
+# tty format prints a marker line naming the script
+FAKE_SHELLCHECK = """\
+import json, pathlib, sys
+files = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+bad = [name for name in files if "bad" in pathlib.Path(name).read_text()]
+if "--format=json1" in sys.argv:
+    comments = [{"file": name, "line": 1, "code": 2086} for name in bad]
+    print(json.dumps({"comments": comments}))
+elif bad:
+    print(f"native tty output for {bad[0]}")
+sys.exit(1 if bad else 0)
+"""
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a script on PATH")
+def test_batch_prints_native_output_for_comments(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Clean files are reported from the batch run, others by ShellCheck."""
+    script = tmp_path / "bin" / "shellcheck"
+    script.parent.mkdir()
+    script.write_text(f"#!{sys.executable}\n{FAKE_SHELLCHECK}", encoding="utf-8")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{script.parent}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.chdir(tmp_path)
+    Path("ok.sh").write_text("echo ok\n", encoding="utf-8")
+    Path("bad.sh").write_text("echo bad\n", encoding="utf-8")
+
+    results = list(ShellLinter().lint_batch(["./ok.sh", "./bad.sh"], False))
+
+    assert results == [False, True]
+    output = capsys.readouterr().out
+    assert "OK: ./ok.sh" in output
+    assert "native tty output for ./bad.sh" in output
+
+
+def test_diff_names_are_relative_and_normalized(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Scripts are named the way git apply accepts them."""
+    monkeypatch.chdir(tmp_path)
+
+    assert _diff_name("./x.sh") == "x.sh"
+    assert _diff_name(str(tmp_path / "dir" / "y.sh")) == os.path.join("dir", "y.sh")